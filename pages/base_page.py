@@ -1,27 +1,66 @@
-from selenium.common import TimeoutException, NoSuchElementException
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common import TimeoutException, StaleElementReferenceException
 from selenium.webdriver.support import expected_conditions as EC
 
+from utils.composite_actions import CompositeAction
+from utils.locator_optimizer import optimize
+from utils.page_source import PageSnapshot, UnsupportedLocator, snapshot_cache_for
+from utils.wait_engine import DEFAULT_TIMEOUT, ElementNotFoundTimeout, wait_until
+
 
 class BasePage:
-    """Base class to hold common element interactions."""
+    """Base class to hold common element interactions.
+
+    With `use_snapshot=True`, read-only checks (`is_visible`, `get_text`,
+    `verify_element_text`) are answered from a cached `page_source` snapshot
+    shared by all page objects of the driver; actions invalidate it.
+
+    With `optimize_locators`, simple XPath locators are rewritten to their
+    native ID / accessibility id / UiSelector equivalent before they reach
+    the device (opt-in: `pytest --locator-rewrite`).
+
+    Multi-step interactions go through `actions()`, which finds each element
+    once; with `batch_actions` they are sent as a single command where the
+    server supports it (see `utils.composite_actions`).
+    """
 
-    def __init__(self, driver):
+    optimize_locators = False
+    batch_actions = False
+
+    def __init__(self, driver, use_snapshot: bool = False):
         self.driver = driver
-        self.wait = WebDriverWait(self.driver, 15)
+        self.timeout = DEFAULT_TIMEOUT
+        self.use_snapshot = use_snapshot
+        self.snapshots = snapshot_cache_for(driver)
+
+    @property
+    def platform(self) -> str | None:
+        """platformName of the session, if the driver reports one."""
+        return (getattr(self.driver, "capabilities", None) or {}).get("platformName")
 
-    def find(self, locator):
+    def native(self, locator):
+        """The locator as sent to the device: its fastest native equivalent when one exists."""
+        if not self.optimize_locators:
+            return locator
+        return optimize(locator, self.platform)
+
+    def find(self, locator, timeout: float | None = None):
         """Find element with explicit wait."""
-        return self.wait.until(EC.presence_of_element_located(locator))
+        locator = self.native(locator)
+        return wait_until(self.driver, EC.presence_of_element_located(locator), timeout or self.timeout,
+                          locator, "present")
 
     def click(self, locator):
         """Wait for element and click."""
+        self.snapshots.invalidate()
         self.find(locator).click()
 
     def type_text(self, locator, text):
-        """Wait for element and send text."""
-        self.find(locator).clear()
-        self.find(locator).send_keys(text)
+        """Wait for element once and replace its text."""
+        self.actions().type(locator, text).perform()
+
+    def actions(self) -> CompositeAction:
+        """Composite action on this page, e.g. `self.actions().type(A, "x").click(B).perform()`."""
+        return CompositeAction(self)
 
     def get_text(self, locator):
         """
@@ -29,7 +68,20 @@ class BasePage:
         :param locator: Tuple (By.ID, "value") or similar.
         :return: String value of the element's text.
         """
-        element = self.wait.until(EC.visibility_of_element_located(locator))
+        if self.use_snapshot:
+            try:
+                node = self._wait_for_node(locator, self.timeout)
+            except UnsupportedLocator:
+                node = None
+            else:
+                if node is None:
+                    present = self.snapshots.get().find_all(locator)
+                    error = TimeoutException if present else ElementNotFoundTimeout
+                    raise error(f"{locator} is not visible in the page source")
+                return PageSnapshot.node_text(node)
+
+        locator = self.native(locator)
+        element = wait_until(self.driver, EC.visibility_of_element_located(locator), self.timeout, locator, "visible")
         return element.text
 
     def is_visible(self, locator: tuple[str,str], timeout: int = 10) -> bool:
@@ -40,12 +92,91 @@ class BasePage:
         :param timeout: Maximum time to wait for the element in seconds.
         :return: True if the element is found and visible, False otherwise.
         """
+        if self.use_snapshot:
+            try:
+                return self._wait_for_node(locator, timeout) is not None
+            except UnsupportedLocator:
+                pass
+
+        locator = self.native(locator)
         try:
-            self.wait.until(EC.visibility_of_element_located(locator))
+            wait_until(self.driver, EC.visibility_of_element_located(locator), timeout, locator, "visible")
             return True
-        except (TimeoutException, NoSuchElementException):
+        except TimeoutException:
             return False
 
+    def are_visible(self, locators: list[tuple[str, str]], timeout: int = 10) -> dict:
+        """
+        Waits for a set of locators together and reports which ones became visible.
+
+        Each poll fetches `page_source` once and resolves every pending locator
+        against that snapshot; only locators the snapshot cannot evaluate fall
+        back to a `find_elements` call of their own.
+
+        :param locators: Locator tuples to check.
+        :param timeout: Maximum time to wait for all of them, in seconds.
+        :return: Dict of locator -> True/False.
+        """
+        results = {locator: False for locator in locators}
+        # In snapshot mode the first poll may reuse the cached snapshot
+        snapshots = self._snapshot_stream(reuse_cached=self.use_snapshot)
+
+        def all_visible(_driver):
+            snapshot = next(snapshots)
+            for locator in [locator for locator, found in results.items() if not found]:
+                try:
+                    results[locator] = snapshot.is_visible(locator)
+                except UnsupportedLocator:
+                    results[locator] = self._any_displayed(locator)
+            return all(results.values())
+
+        try:
+            wait_until(self.driver, all_visible, timeout, list(locators), "all visible")
+        except TimeoutException:
+            pass
+        return results
+
+    def _wait_for_node(self, locator, timeout: float):
+        """
+        Returns the first visible snapshot node matching the locator, or None on timeout.
+        Starts from the cached snapshot and only refetches `page_source` on a miss.
+        :raises UnsupportedLocator: if the locator cannot be evaluated on a snapshot.
+        """
+        snapshots = self._snapshot_stream(reuse_cached=True)
+
+        def visible_nodes(_driver):
+            # A list, because a childless ElementTree node is falsy on its own
+            snapshot = next(snapshots)
+            return [node for node in snapshot.find_all(locator) if snapshot.node_visible(node)]
+
+        try:
+            return wait_until(self.driver, visible_nodes, timeout, locator, "visible (snapshot)")[0]
+        except TimeoutException:
+            return None
+
+    def _snapshot_stream(self, reuse_cached: bool):
+        """Yields the cached snapshot first (if allowed), then a fresh one per poll."""
+        yield self.snapshots.get() if reuse_cached else self.snapshots.refresh()
+        while True:
+            yield self.snapshots.refresh()
+
+    def _any_displayed(self, locator) -> bool:
+        """Single non-waiting device query, used when a snapshot cannot help."""
+        try:
+            return any(element.is_displayed() for element in self.driver.find_elements(*self.native(locator)))
+        except StaleElementReferenceException:
+            return False
+
+    def verify_all_visible(self, locators: list[tuple[str, str]], message: str, timeout: int = 10):
+        """
+        Asserts that every locator is visible, listing the missing ones on failure.
+        :param locators: Locator tuples that must all be visible.
+        :param message: Prefix of the assertion message.
+        """
+        results = self.are_visible(locators, timeout=timeout)
+        missing = [locator for locator, found in results.items() if not found]
+        assert not missing, f"{message} Not visible: {missing}"
+
     def verify_element_text(self, locator, expected_text):
         """
         Retrieves the text from the given locator and asserts it matches the expected text.
@@ -60,5 +191,7 @@ class BasePage:
         Waits for the element to be visible and clears its text content.
         :param locator: The element locator (tuple).
         """
-        element = self.wait.until(EC.visibility_of_element_located(locator))
+        self.snapshots.invalidate()
+        locator = self.native(locator)
+        element = wait_until(self.driver, EC.visibility_of_element_located(locator), self.timeout, locator, "visible")
         element.clear()
\ No newline at end of file
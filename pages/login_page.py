@@ -55,11 +55,13 @@ class LoginPage(BasePage):
 
 
     def login(self, email: str, password: str):
-        """Main login method."""
+        """Main login method: fills in the form and submits it as one composite action."""
         # self.navigate_to_signin_screen()
-        self.type_text(self.EMAIL_INPUT, email)
-        self.type_text(self.PASSWORD_INPUT, password)
-        self.click(self.LOGIN_BUTTON)
+        self.actions().type(self.EMAIL_INPUT, email).type(self.PASSWORD_INPUT, password).click(self.LOGIN_BUTTON).perform()
+
+    def clear_signin_form(self):
+        """Empty both credential fields, e.g. to reuse the Sign in screen for the next case."""
+        self.actions().type(self.EMAIL_INPUT, "").type(self.PASSWORD_INPUT, "").perform()
 
     def handle_notification_prompt(self):
         """Handles post-login dismissible buttons and system notifications."""
@@ -82,6 +84,21 @@ class LoginPage(BasePage):
         """Verify that the first 'This field is required' error is visible."""
         assert self.is_visible(self.REQUIRED_ERROR_MESSAGE), "The required field error message is not visible!"
 
+    def verify_credentials_required_fields_visible(self):
+        """Verify that both 'This field is required' errors are visible (one batched wait)."""
+        self.verify_all_visible(
+            [self.REQUIRED_FIELD_ERRORS_1, self.REQUIRED_FIELD_ERRORS_2],
+            "The email/password required field error messages are not visible!",
+        )
+
+    def verify_wrong_email_format_and_required_messages(self):
+        """Verify the email format error and the password required error together."""
+        self.verify_all_visible(
+            [self.WRONG_EMAIL_FORMAT_MESSAGE, self.REQUIRED_ERROR_MESSAGE],
+            "The email format / password required error messages are not visible!",
+        )
+        self.verify_element_text(self.WRONG_EMAIL_FORMAT_MESSAGE, UIConstants.INVALID_EMAIL_FORMAT)
+
     def verify_credentials_required_field_visible_1(self):
         """Verify that the first 'This field is required' error is visible."""
         assert self.is_visible(self.REQUIRED_FIELD_ERRORS_1), "The email required field error message is not visible!"
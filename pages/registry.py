@@ -0,0 +1,83 @@
+"""Page-object registry behind the `app` fixture.
+
+Every `BasePage` subclass in `pages/` is discovered once per process and
+registered under an alias: its `alias` class attribute, or the snake_case
+class name without a `Page` suffix (`LoginPage` -> `login`). `AppPages`
+builds a page object on first attribute access and `pages_for` keeps one
+`AppPages` per driver session, so tests of a class (and pooled sessions)
+share their page objects.
+"""
+import functools
+import importlib
+import inspect
+import pkgutil
+import re
+import weakref
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pages.bottom_tabs import BottomTabs
+    from pages.login_page import LoginPage
+
+PAGES_PACKAGE = "pages"
+
+
+def default_alias(class_name: str) -> str:
+    """`LoginPage` -> `login`, `BottomTabs` -> `bottom_tabs`."""
+    name = class_name[:-len("Page")] if class_name.endswith("Page") and class_name != "Page" else class_name
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+@functools.cache
+def discover(package: str = PAGES_PACKAGE) -> dict[str, type]:
+    """Alias -> page-object class for every `BasePage` subclass defined in the package."""
+    from pages.base_page import BasePage
+
+    registry: dict[str, type] = {}
+    for module_info in pkgutil.iter_modules(importlib.import_module(package).__path__):
+        module = importlib.import_module(f"{package}.{module_info.name}")
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if not issubclass(cls, BasePage) or cls is BasePage or cls.__module__ != module.__name__:
+                continue
+            alias = cls.__dict__.get("alias") or default_alias(cls.__name__)
+            if alias in registry:
+                raise ValueError(f"Page alias '{alias}' is used by both {registry[alias].__name__} and {cls.__name__}!")
+            registry[alias] = cls
+    return registry
+
+
+class AppPages:
+    """Page objects of one driver session, built on first access.
+
+    The annotations give IDEs and type checkers the page types; any other
+    registered page is reachable by its alias as well.
+    """
+
+    login: "LoginPage"
+    bottom: "BottomTabs"
+
+    def __init__(self, driver, use_snapshot: bool = False, registry: dict[str, type] | None = None):
+        self._driver = driver
+        self._use_snapshot = use_snapshot
+        self._registry = registry if registry is not None else discover()
+
+    def __getattr__(self, alias: str):
+        # Only called for pages not built yet; afterwards they are plain instance attributes
+        if alias.startswith("_") or alias not in self._registry:
+            raise AttributeError(f"No page object is registered as '{alias}'")
+        page = self._registry[alias](self._driver, use_snapshot=self._use_snapshot)
+        setattr(self, alias, page)
+        return page
+
+
+_by_driver: "weakref.WeakKeyDictionary[object, tuple]" = weakref.WeakKeyDictionary()
+
+
+def pages_for(driver, use_snapshot: bool = False) -> AppPages:
+    """The cached `AppPages` of the driver's current session (a new session gets new pages)."""
+    key = (getattr(driver, "session_id", None), use_snapshot)
+    cached = _by_driver.get(driver)
+    if cached is None or cached[0] != key:
+        cached = (key, AppPages(driver, use_snapshot))
+        _by_driver[driver] = cached
+    return cached[1]
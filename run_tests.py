@@ -3,12 +3,47 @@ import subprocess
 import sys
 import os
 import shutil
+import time
+
+from utils.cloud_grid import BUILD_ENV
+from utils.device_pool import Device, DeviceScheduler, collect_node_ids, group_into_units, load_devices, pytest_runner
+from utils.results_stream import format_summary, merge_worker_results, merged_summary
+from utils.settings import load_settings
+from utils.timing_db import TimingDB, UnitDurations, format_duration
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Run mobile tests via pytest.")
     parser.add_argument("--platform", default="android", help="Target platform: android or ios")
-    parser.add_argument("--env", default="local", help="Execution environment: local or browserstack")
+    parser.add_argument("--env", default="local", help="Execution environment: local, browserstack or mock")
     parser.add_argument("-k", dest="keyword", default=None, help="Pytest keyword filter")
+    parser.add_argument(
+        "--pool",
+        action="store_true",
+        help="Spread test classes over the devicePool in config.json (BrowserStack: over parallel cloud sessions)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Use at most this many pool devices (BrowserStack: workers, default browserstack.maxParallelSessions)",
+    )
+    parser.add_argument(
+        "--failed-first",
+        action="store_true",
+        help="Run test classes with recent failures first (from .test_history.sqlite)",
+    )
+    parser.add_argument(
+        "--impacted-since",
+        default=None,
+        metavar="REV",
+        help="Only run tests affected by changes since this git revision (e.g. origin/main)",
+    )
+    parser.add_argument(
+        "--report",
+        choices=["serve", "generate", "none"],
+        default="none" if os.getenv("CI") else "serve",
+        help="Allure report after the run (default: serve locally, none when CI is set)",
+    )
     args = parser.parse_args()
 
     # --- STEP 1: Auto-detect Virtual Environment ---
@@ -23,26 +58,93 @@ def main() -> int:
     os.makedirs(report_dir)
 
     # --- STEP 3: Construct and Run Test Command ---
-    cmd = [
-        python_exe, "-m", "pytest",
+    live_dir = os.path.join(report_dir, "live")
+    pytest_args = [
         f"--platform={args.platform}",
         f"--env={args.env}",
-        f"--alluredir={report_dir}"
+        f"--live-dir={live_dir}",
+        "--history",
     ]
     if args.keyword:
-        cmd.extend(["-k", args.keyword])
+        pytest_args.extend(["-k", args.keyword])
+    if args.env.lower() == "browserstack":
+        # One BrowserStack build for every worker of this run
+        build = load_settings(args.platform, "browserstack").get("browserstack", {}).get("buildName", "Local Build")
+        os.environ.setdefault(BUILD_ENV, f"{build} {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    if args.failed_first:
+        pytest_args.append("--recent-failures-first")
+    if args.impacted_since:
+        pytest_args.append(f"--impacted-since={args.impacted_since}")
+
+    if args.pool:
+        returncode = run_on_device_pool(
+            python_exe, pytest_args, args.workers, report_dir, args.platform.lower(), args.env.lower(), args.failed_first
+        )
+    else:
+        print(f"\n--- Execution: Running tests using {python_exe} ---")
+        returncode = subprocess.run([python_exe, "-m", "pytest", *pytest_args, f"--alluredir={report_dir}"]).returncode
 
-    print(f"\n--- Execution: Running tests using {python_exe} ---")
-    result = subprocess.run(cmd)
+    print(f"\n--- Summary: {format_summary(merged_summary(live_dir))} ---")
 
     # --- STEP 4: Generate and Open Allure Report ---
-    if os.path.exists(report_dir) and os.listdir(report_dir):
+    if args.report == "none":
+        print(f"\n--- Report: skipped, raw Allure results are in {report_dir} ---")
+    elif os.path.exists(report_dir) and os.listdir(report_dir):
         print("\n--- Success: Generating and opening Allure Report ---")
-        subprocess.call(['allure', 'serve', report_dir], shell=True)
+        # Resolved here rather than through a shell: allure is a .bat script on Windows
+        allure = shutil.which("allure") or "allure"
+        if args.report == "serve":
+            subprocess.call([allure, 'serve', report_dir])
+        else:
+            subprocess.call([allure, 'generate', report_dir, '-o', 'allure-report', '--clean'])
     else:
         print("\n--- Error: No report data found. Allure could not be started. ---")
 
-    return result.returncode
+    return returncode
+
+
+def run_on_device_pool(python_exe: str, pytest_args: list[str], workers: int | None, report_dir: str,
+                       platform: str, env: str, failed_first: bool = False) -> int:
+    """Schedule test classes over the devices listed under `devicePool`.
+
+    Units are packed longest-first using the per-test durations in the
+    timing database (classes with recent failures first with `failed_first`).
+    Each device writes Allure results to its own `reports/workers/<device>`
+    directory; they are merged into `reports/` once every unit has run.
+    On BrowserStack the devices are cloud workers; their sessions share the
+    account's parallel sessions through `utils.cloud_grid`.
+    """
+    settings = load_settings(platform, env)
+    if env == "browserstack":
+        bs_conf = settings.get("browserstack", {})
+        count = workers or bs_conf.get("maxParallelSessions") or 1
+        devices = [Device(f"cloud-{index}", bs_conf.get("remoteUrl", "")) for index in range(count)]
+    else:
+        devices = load_devices(settings)
+        if workers:
+            devices = devices[:workers]
+
+    units = group_into_units(collect_node_ids(python_exe, pytest_args))
+    run_unit = pytest_runner(python_exe, pytest_args, report_dir, pin_device=env != "browserstack")
+
+    def run_and_report(device, node_ids):
+        code = run_unit(device, node_ids)
+        print(f"--- Live: {format_summary(merged_summary(os.path.join(report_dir, 'live')))} ---")
+        return code
+
+    history = UnitDurations(TimingDB(), units, platform, env)
+    first = [key for key in units if history.recently_failed(key)] if failed_first else []
+    scheduler = DeviceScheduler(devices, units, run_and_report, history, first)
+    print(
+        f"\n--- Execution: {len(units)} unit(s) on {len(devices)} device(s), "
+        f"estimated {format_duration(scheduler.estimated_makespan())} ---"
+    )
+    returncode = scheduler.run()
+    merge_worker_results(report_dir)
+
+    for key, device, code, seconds in scheduler.results:
+        print(f"    {key:<60} {device:<20} exit={code} {seconds:.1f}s")
+    return returncode
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
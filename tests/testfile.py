@@ -1,6 +1,10 @@
-import google.generativeai as genai
+"""List the Gemini models the API key can use: python tests/testfile.py"""
 import os
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-for m in genai.list_models():
-    print(m.name)
+if __name__ == "__main__":
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+    for m in genai.list_models():
+        print(m.name)
@@ -0,0 +1,49 @@
+"""Fixtures of the framework self-tests.
+
+These tests exercise `utils/` and `pages/` without a device. `tests/conftest.py`
+keeps them out of device runs; run them with `pytest tests/unit`.
+"""
+import pytest
+
+HOME_SCREEN = """<hierarchy>
+  <android.widget.FrameLayout displayed="true">
+    <android.widget.TextView text="Home" displayed="true"/>
+    <android.widget.TextView text="Portfolio" displayed="true"/>
+    <android.widget.TextView text="Markets" displayed="true"/>
+    <android.widget.TextView text="More" displayed="true"/>
+    <android.widget.TextView text="This field is required" displayed="true"/>
+    <android.widget.TextView text="This field is required" displayed="false"/>
+    <android.widget.EditText resource-id="login_email_input" displayed="true"/>
+    <android.view.View content-desc="Continue" resource-id="com.example:id/continue" displayed="true"/>
+  </android.widget.FrameLayout>
+</hierarchy>"""
+
+
+class PageSourceDriver:
+    """Driver stand-in that only serves a page source and counts round-trips."""
+
+    def __init__(self, source):
+        self.source = source
+        self.source_calls = 0
+
+    @property
+    def page_source(self):
+        self.source_calls += 1
+        return self.source
+
+    def find_element(self, by, value):
+        return self
+
+    def click(self):
+        pass
+
+
+@pytest.fixture
+def home_screen():
+    """Page source of the home screen, with a stray 'This field is required' on it."""
+    return HOME_SCREEN
+
+
+@pytest.fixture
+def home_driver():
+    return PageSourceDriver(HOME_SCREEN)
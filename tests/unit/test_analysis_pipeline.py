@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+
+from utils.allure_results import REF_LABEL, read_environment
+from utils.analysis_cache import AnalysisCache
+from utils.analysis_pipeline import FailureAnalysisPipeline
+from utils.failure_signature import FailureSignature, normalize_message
+from utils.gemini_analyzer import GeminiAnalyzer
+
+
+class StubModel:
+    """Local stand-in for the Gemini model: slow, and records concurrency."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+
+        class Response:
+            text = f"  Stub analysis of {len(prompt)} chars  "
+
+        return Response()
+
+
+def _write_result(report_dir, ref):
+    result = {"uuid": ref, "name": "test", "labels": [{"name": REF_LABEL, "value": ref}]}
+    (report_dir / f"{ref}-result.json").write_text(json.dumps(result))
+
+
+def test_failures_are_analyzed_off_the_test_thread_and_attached_at_the_end(tmp_path):
+    model = StubModel()
+    built = []
+    pipeline = FailureAnalysisPipeline(lambda: built.append(1) or GeminiAnalyzer(model=model), max_workers=2)
+
+    started = time.monotonic()
+    for i in range(4):
+        pipeline.submit(f"ref{i}", f"tests/test_login.py::test_{i}", "AssertionError: boom" * 500)
+        _write_result(tmp_path, f"ref{i}")
+    assert time.monotonic() - started < model.delay
+
+    assert pipeline.finish(str(tmp_path)) == 4
+    assert built == [1]
+    assert model.peak == 2
+
+    result = json.loads((tmp_path / "ref0-result.json").read_text())
+    attachment = result["attachments"][0]
+    assert attachment["name"] == "🤖 AI Failure Analysis (Gemini)"
+    assert (tmp_path / attachment["source"]).read_text().startswith("Stub analysis of")
+
+
+def test_analyzer_errors_are_attached_instead_of_raised(tmp_path):
+    class Broken:
+        def analyze(self, error_log):
+            raise RuntimeError("quota exceeded")
+
+    pipeline = FailureAnalysisPipeline(Broken)
+    pipeline.submit("ref", "tests/test_login.py::test_x", "boom")
+    _write_result(tmp_path, "ref")
+
+    assert pipeline.finish(str(tmp_path)) == 1
+    result = json.loads((tmp_path / "ref-result.json").read_text())
+    assert result["attachments"][0]["name"] == "⚠️ AI Analysis Error"
+
+
+def _signature(message):
+    return FailureSignature("TimeoutException", "login_page.login", "id=login_email_input", normalize_message(message))
+
+
+def test_repeated_failures_share_one_analysis_within_and_across_runs(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    model = StubModel(delay=0)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return GeminiAnalyzer(model=model)
+
+    first_run = FailureAnalysisPipeline(factory, cache=cache)
+    assert not (tmp_path / "cache").exists()  # created with the first analysis
+    for i in range(7):
+        first_run.submit(f"ref{i}", f"test_{i}", "boom", _signature(f"Timed out at 2026-10-17T10:0{i}:00Z, session 0x{i}f3a"))
+    first_run.finish(None)
+    assert (first_run.hits, first_run.misses) == (6, 1)
+
+    second_run = FailureAnalysisPipeline(factory, cache=cache)
+    job = second_run.submit("ref", "test_0", "boom", _signature("Timed out at 2026-10-18T09:00:00Z, session 0xbeef"))
+    second_run.finish(None)
+    assert job.source == "cache" and job.future.result().startswith("Stub analysis")
+    assert len(calls) == 1
+
+
+def test_cache_counters_are_summed_over_the_processes_of_a_run(tmp_path):
+    for _ in range(2):  # two unit processes of a pool worker, same results directory
+        pipeline = FailureAnalysisPipeline(lambda: GeminiAnalyzer(model=StubModel(delay=0)))
+        pipeline.submit("ref", "test_0", "boom", _signature("Timed out"))
+        pipeline.submit("ref", "test_1", "boom", _signature("Timed out"))
+        pipeline.finish(str(tmp_path))
+
+    assert read_environment(str(tmp_path)) == {"AI.analysis.cache.hits": "2", "AI.analysis.cache.misses": "2"}
+    assert len((tmp_path / "environment.properties").read_text().splitlines()) == 2
+
+
+def test_cache_expires_and_evicts_oldest_entries(tmp_path):
+    cache = AnalysisCache(str(tmp_path), ttl_seconds=3600, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, f"analysis {key}")
+        time.sleep(0.01)
+    assert cache.get("a") is None
+    assert cache.get("c") == "analysis c"
+
+    cache.ttl_seconds = -1
+    assert cache.get("c") is None
@@ -0,0 +1,30 @@
+from utils.benchmark import BENCHMARKS, compare, load_baseline, percentile, run, save_baseline
+
+
+def test_percentiles_interpolate_between_samples():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50.5
+    assert percentile(samples, 99) == 99.01
+    assert percentile([7], 95) == 7 and percentile([], 50) == 0.0
+
+
+def test_page_object_benchmarks_run_on_the_in_process_driver():
+    [result] = run(BENCHMARKS["waits.is_visible_hit"], quick=True)
+    stats = result.stats()
+
+    assert stats["n"] == 200
+    assert 0 < stats["p50_us"] <= stats["p95_us"] <= stats["p99_us"]
+    assert stats["peak_bytes"] > 0
+
+
+def test_regressions_need_both_a_relative_and_an_absolute_slowdown(tmp_path):
+    old = {"p50_us": 10.0, "p95_us": 20.0, "p99_us": 30.0, "peak_bytes": 4096}
+    save_baseline({"waits.find": old, "actions.click": old}, "ci", str(tmp_path))
+    baseline = load_baseline("ci", str(tmp_path))
+
+    results = {
+        "waits.find": {**old, "p50_us": 11.5, "p95_us": 40.0},  # p50 +15%: within tolerance
+        "actions.click": {**old, "peak_bytes": 4096 + 900},  # +22% but under the 1K noise floor
+        "reporting.allure_assert": {**old, "p50_us": 100.0},  # not in the baseline
+    }
+    assert compare(results, baseline, tolerance=0.25) == [("waits.find", "p95_us", 20.0, 40.0)]
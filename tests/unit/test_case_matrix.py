@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from pages.login_page import LoginPage
+from utils.case_matrix import StartScreen, StartScreens, forget_screen, load_cases, shown_value
+from utils.settings import ConfigError
+
+
+def _case(case_id, start="signin", **extra):
+    return {"id": case_id, "start": start, "inputs": {"EMAIL_INPUT": ""}, "visible": ["REQUIRED_ERROR_MESSAGE"], **extra}
+
+
+def test_the_credential_table_is_valid_and_grouped_by_start_screen(tmp_path):
+    assert [case.id for case in load_cases("credential_cases.jsonl")][0] == "required_email_password_fields"
+
+    path = tmp_path / "cases.jsonl"
+    path.write_text("\n".join(json.dumps(c) for c in [_case("a"), _case("b", "home"), _case("c"), _case("d", "home")]))
+    assert [case.id for case in load_cases(str(path))] == ["a", "c", "b", "d"]
+
+    typo = tmp_path / "typo.jsonl"
+    typo.write_text(json.dumps(_case("typo", visible=["REQUIRED_EROR_MESSAGE"])))
+    with pytest.raises(ConfigError, match="REQUIRED_EROR_MESSAGE"):
+        load_cases(str(typo))
+
+
+class App:
+    def __init__(self, driver):
+        self.login = LoginPage(driver)
+        self.calls = []
+
+
+def test_start_screen_is_reused_only_after_a_clean_pass(home_driver):
+    app = App(home_driver)
+    screens = {"signin": StartScreen("Sign In screen", lambda app: app.calls.append("navigate"),
+                                     lambda app: app.calls.append("reset"))}
+
+    StartScreens(app, home_driver, screens).enter("signin")
+    StartScreens(app, home_driver, screens).finished("signin")
+    StartScreens(app, home_driver, screens).enter("signin")  # previous case passed: reset in place
+    # Previous case passed but its message is still on screen after the reset: navigate
+    StartScreens(app, home_driver, screens).finished("signin", [LoginPage.REQUIRED_FIELD_ERRORS_1])
+    StartScreens(app, home_driver, screens).enter("signin")
+    StartScreens(app, home_driver, screens).enter("signin")  # previous case did not finish (failed)
+
+    assert app.calls == ["navigate", "reset", "reset", "navigate", "navigate"]
+
+
+def test_a_reset_app_is_navigated_again(home_driver):
+    app = App(home_driver)
+    screens = {"signin": StartScreen("Sign In screen", lambda app: app.calls.append("navigate"),
+                                     lambda app: app.calls.append("reset"))}
+
+    StartScreens(app, home_driver, screens).finished("signin")
+    forget_screen(home_driver)  # e.g. the pool handed the session to another class
+    StartScreens(app, home_driver, screens).enter("signin")
+
+    assert app.calls == ["navigate"]
+
+
+def test_secret_inputs_are_masked_in_step_names():
+    assert shown_value("PASSWORD_INPUT", "$valid_user.password", "Secret123!") == "***"
+    assert shown_value("CODE_INPUT", "$valid_user.pinCode", "1234") == "***"
+    assert shown_value("EMAIL_INPUT", "$valid_user.email", "user@example.com") == "user@example.com"
+    assert shown_value("PASSWORD_INPUT", "", "") == "(empty)"
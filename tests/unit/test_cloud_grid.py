@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+from appium import webdriver
+from appium.options.common import AppiumOptions
+from selenium.common import SessionNotCreatedException
+
+from utils.cloud_grid import CloudGrid, SessionSlots
+from utils.mock_appium import MockAppiumServer, load_scenario
+from utils.session_pool import renew_session, requested_capabilities
+
+CAPS = {"platformName": "Android", "automationName": "UiAutomator2"}
+
+
+def open_session(remote_url, caps):
+    options = AppiumOptions()
+    options.load_capabilities(caps)
+    return webdriver.Remote(remote_url, options=options)
+
+
+def run_workers(grid, hub, count, hold=0.2):
+    """`count` workers that each open a session, use it for `hold` seconds and quit it."""
+    errors = []
+
+    def work(index):
+        try:
+            grid.start_test(f"test_{index}")
+            driver = grid.open_session(hub.url, CAPS)
+            time.sleep(hold)
+            grid.quit(driver)
+        except Exception as exc:
+            errors.append(exc)
+
+    workers = [threading.Thread(target=work, args=(index,)) for index in range(count)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return errors
+
+
+def test_slots_are_shared_by_every_semaphore_on_the_same_directory(tmp_path):
+    first, second = SessionSlots(1, str(tmp_path)), SessionSlots(1, str(tmp_path))
+    slot = first.try_acquire()
+    assert slot is not None and second.try_acquire() is None
+    with pytest.raises(SessionNotCreatedException, match="still in use"):
+        SessionSlots(1, str(tmp_path), poll=0.01).acquire(timeout=0.05)
+    slot.release()
+    assert second.try_acquire() is not None
+
+
+def test_sessions_wait_for_a_slot_instead_of_being_refused(tmp_path):
+    with MockAppiumServer(load_scenario(), max_sessions=2) as hub:
+        grid = CloudGrid(open_session, max_sessions=2, lock_dir=str(tmp_path))
+        grid.slots.poll = 0.01
+        assert run_workers(grid, hub, 4) == []
+
+        assert hub.app.peak_sessions == 2 and hub.app.sessions_refused == 0
+    queued = sorted(session.queued for session in grid.sessions)
+    assert len(queued) == 4 and queued[1] < 0.1 and queued[2] >= 0.15  # two started at once, two waited
+
+
+def test_refused_sessions_are_retried_with_backoff():
+    with MockAppiumServer(load_scenario(), max_sessions=1) as hub:
+        grid = CloudGrid(open_session, backoff=0.05, max_backoff=0.1)  # no local limit: the hub refuses
+        assert run_workers(grid, hub, 2) == []
+
+        assert grid.refused >= 1 and hub.app.sessions_refused == grid.refused
+    retried = max(grid.sessions, key=lambda session: session.attempts)
+    assert retried.attempts > 1 and retried.queued >= 0.1
+
+    with MockAppiumServer(load_scenario(), max_sessions=1) as hub:
+        grid = CloudGrid(open_session, queue_timeout=0.1, backoff=0.05)
+        driver = grid.open_session(hub.url, CAPS)
+        with pytest.raises(SessionNotCreatedException, match="BROWSERSTACK_ALL_PARALLELS_IN_USE"):
+            grid.open_session(hub.url, CAPS)
+        grid.quit(driver)
+
+
+def test_sessions_are_named_annotated_and_marked_by_their_tests(tmp_path):
+    with MockAppiumServer(load_scenario()) as hub:
+        grid = CloudGrid(open_session, max_sessions=1, lock_dir=str(tmp_path))
+        grid.start_test("tests/test_login.py::TestLogin::test_ok")
+        driver = grid.open_session(hub.url, CAPS)
+        session = hub.app.sessions[driver.session_id]
+        grid.name_session(driver, "tests/test_login.py::TestLogin")
+        grid.annotate_test(driver, "tests/test_login.py::TestLogin::test_ok")
+        grid.annotate_test(driver, "tests/test_login.py::TestLogin::test_bad")
+        grid.test_failed(driver, "tests/test_login.py::TestLogin::test_bad")
+        grid.quit(driver)
+
+    assert [(command["action"], command["arguments"]) for command in session.executor] == [
+        ("setSessionName", {"name": "tests/test_login.py::TestLogin"}),
+        ("annotate", {"data": "test: tests/test_login.py::TestLogin::test_ok", "level": "info"}),
+        ("annotate", {"data": "test: tests/test_login.py::TestLogin::test_bad", "level": "info"}),
+        ("setSessionStatus", {"status": "failed", "reason": "failed: tests/test_login.py::TestLogin::test_bad"}),
+    ]
+    assert list(grid.queued_by_test) == ["tests/test_login.py::TestLogin::test_ok"]  # setup of the first test
+    assert grid.slots.try_acquire() is not None  # the slot was freed with the session
+
+
+def test_a_renewed_session_is_marked_and_keeps_its_slot_and_name(tmp_path):
+    def factory(remote_url, caps):
+        driver = open_session(remote_url, caps)
+        requested_capabilities[driver] = caps
+        return driver
+
+    with MockAppiumServer(load_scenario()) as hub:
+        grid = CloudGrid(factory, max_sessions=1, lock_dir=str(tmp_path))
+        driver = grid.open_session(hub.url, CAPS)
+        broken = hub.app.sessions[driver.session_id]
+        grid.name_session(driver, "tests/test_login.py::TestLogin")
+        grid.test_failed(driver, "tests/test_login.py::TestLogin::test_ok")
+        grid.renew_session(driver, renew_session)
+        renewed = hub.app.sessions[driver.session_id]
+        assert renewed is not broken and grid.slots.try_acquire() is None  # the slot stayed with the driver
+        grid.quit(driver)
+
+    def actions(session):
+        return [(command["action"], command["arguments"].get("status")) for command in session.executor]
+
+    assert actions(broken) == [("setSessionName", None), ("setSessionStatus", "failed")]
+    assert actions(renewed) == [("setSessionName", None), ("setSessionStatus", "passed")]
+    assert len(grid.sessions) == 2
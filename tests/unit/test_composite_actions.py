@@ -0,0 +1,89 @@
+import allure_commons
+import pytest
+from allure_commons import hookimpl
+
+from pages.login_page import LoginPage
+from utils.composite_actions import EXECUTE_DRIVER, REPLACE_VALUE, driver_script, supports
+from utils.constants import UIConstants
+from utils.mock_appium import MockAppium, MockError, in_process_driver, load_scenario
+
+
+class LegacyAppium(MockAppium):
+    """A server without the execute-driver plugin or `mobile: replaceElementValue`."""
+
+    def execute_driver(self, session, body):
+        raise MockError(404, "unknown command", "POST /appium/execute_driver is not supported")
+
+    def execute(self, session, body):
+        if body.get("script") == "mobile: replaceElementValue":
+            raise MockError(405, "unknown method", "Unknown mobile command")
+        return super().execute(session, body)
+
+
+def _signin(app, batch=False):
+    driver = in_process_driver(app)
+    driver.execute_script("mobile: deepLink", {"url": "mobileapp://signin"})
+    login = LoginPage(driver)
+    login.batch_actions = batch
+    return driver, login
+
+
+@pytest.mark.parametrize("batch, commands", [(False, 6), (True, 1)])
+def test_login_resolves_each_element_once(batch, commands):
+    app = MockAppium(load_scenario())
+    driver, login = _signin(app, batch)
+
+    sent = app.commands
+    login.login("user@example.com", "wrong")
+    assert app.commands - sent == commands
+    login.verify_element_text(login.WRONG_EMAIL_OR_PASSWORD_MESSAGE, UIConstants.INCORRECT_CREDENTIALS)
+    assert driver.find_element(*login.EMAIL_INPUT).text == "user@example.com"
+    driver.quit()
+
+
+def test_unsupported_features_fall_back_once_per_driver():
+    app = LegacyAppium(load_scenario())
+    driver, login = _signin(app, batch=True)
+
+    login.login("user@example.com", "wrong")
+    assert not supports(driver, EXECUTE_DRIVER) and not supports(driver, REPLACE_VALUE)
+    assert driver.find_element(*login.PASSWORD_INPUT).text == "wrong"
+
+    sent = app.commands
+    login.login("user@example.com", "Secret123!")  # find x3, clear + send keys x2, click
+    assert app.commands - sent == 8
+    assert login.is_visible(login.WRONG_EMAIL_OR_PASSWORD_MESSAGE, timeout=0) is False
+    driver.quit()
+
+
+def test_driver_script_embeds_the_steps_as_json():
+    script = driver_script([("type", ("id", "email"), 'a"b'), ("click", ("accessibility id", "Go"), None)], 5000)
+    assert script.startswith('const steps = [["type", "id", "email", "a\\"b"], ["click", "accessibility id", "Go", null]];')
+    assert "const timeout = 5000;" in script
+
+
+class StepNames:
+    """allure_commons plugin recording the names of the steps started."""
+
+    def __init__(self):
+        self.names = []
+
+    @hookimpl
+    def start_step(self, uuid, title, params):
+        self.names.append(title)
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_named_steps_are_reported_one_per_field(batch):
+    app = MockAppium(load_scenario())
+    driver, login = _signin(app, batch)
+    steps = StepNames()
+    allure_commons.plugin_manager.register(steps)
+    try:
+        (login.actions().type(login.EMAIL_INPUT, "user@example.com", step="Enter EMAIL_INPUT: user@example.com")
+         .type(login.PASSWORD_INPUT, "wrong", step="Enter PASSWORD_INPUT: ***")
+         .click(login.LOGIN_BUTTON, step="Click on LOGIN_BUTTON").perform())
+    finally:
+        allure_commons.plugin_manager.unregister(steps)
+    assert steps.names == ["Enter EMAIL_INPUT: user@example.com", "Enter PASSWORD_INPUT: ***", "Click on LOGIN_BUTTON"]
+    driver.quit()
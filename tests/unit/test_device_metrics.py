@@ -0,0 +1,92 @@
+import time
+
+from pages.base_page import BasePage
+from pages.bottom_tabs import BottomTabs
+from pages.login_page import LoginPage
+from utils import wait_engine
+from utils.composite_actions import CompositeAction
+from utils.device_metrics import (
+    CPU, FRAMES, MEMORY, DeviceMetrics, DeviceSampler, compare, instrument, load_baseline, metrics, parse_gfxinfo,
+    save_baseline,
+)
+from utils.mock_appium import MockAppium, MockError, in_process_driver, load_scenario
+from utils.tracing import restore
+
+GFXINFO = """Applications Graphics Acceleration Info:
+Total frames rendered: 240
+Janky frames: 12 (5.00%)
+50th percentile: 8ms
+90th percentile: 16ms
+99th percentile: 48ms
+"""
+
+
+class NoShellAppium(MockAppium):
+    """A server started without `--allow-insecure=adb_shell`."""
+
+    def execute(self, session, body):
+        if body.get("script") == "mobile: shell":
+            raise MockError(500, "unknown error", "Potentially insecure feature 'adb_shell' has not been enabled")
+        return super().execute(session, body)
+
+
+def test_gfxinfo_is_parsed_into_frame_stats():
+    assert parse_gfxinfo(GFXINFO) == {
+        "frames": 240.0, "janky_frames": 12.0, "janky_pct": 5.0,
+        "frame_p50_ms": 8.0, "frame_p90_ms": 16.0, "frame_p99_ms": 48.0,
+    }
+
+
+def test_samples_frames_and_transitions_are_collected_per_test():
+    click = BasePage.click
+    driver = in_process_driver(MockAppium(load_scenario()))
+    sampler = DeviceSampler(driver, "com.example.mobileapp", interval=0.01)
+    patched = instrument(metrics, BasePage, CompositeAction)
+    sampler.start()
+    try:
+        sampler.begin_test("test_login")
+        login = LoginPage(driver)
+        login.navigate_to_signin_screen()
+        login.login("user@example.com", "Secret123!")
+        BottomTabs(driver).verify_bottom_tabs_visible()
+        time.sleep(0.05)
+        sampler.end_test()
+    finally:
+        sampler.stop()
+        restore(patched)
+        driver.quit()
+    assert BasePage.click is click and wait_engine.on_satisfied is None  # nothing left behind
+
+    report, csv = metrics.test_report("test_login"), metrics.samples_csv("test_login")
+    del metrics.by_test["test_login"]
+    assert report["samples"] and {"cpu_pct", "memory_pss_kb"} <= set(report["samples"][0])
+    assert report["frames"]["frames"] > 0
+    assert [(t["action"], t["until"].split(" ")[0]) for t in report["transitions"]] == [
+        ("accessibility id=Sign in", "visible"),  # navigate_to_signin_screen -> Sign in form
+        ("accessibility id=Continue", "all"),  # login -> bottom tabs
+    ]
+    assert csv.startswith("t,cpu_pct,memory_pss_kb,native_heap_kb\n")
+
+
+def test_metrics_the_server_cannot_provide_are_dropped():
+    driver = in_process_driver(NoShellAppium(load_scenario()))
+    sampler = DeviceSampler(driver, "com.example.mobileapp", metrics=DeviceMetrics())
+    sampler.begin_test("test_a")
+    sampler.end_test()
+    assert sampler.kinds == {CPU, MEMORY} and FRAMES not in sampler.kinds
+    driver.quit()
+
+
+def test_regressions_need_both_a_relative_and_an_absolute_increase(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    save_baseline({"test_a": {"cpu_mean_pct": 10.0, "memory_max_kb": 50000, "transition_max_ms": 400.0}}, path)
+    save_baseline({"test_b": {"janky_pct": 1.0}}, path)
+
+    runs = {
+        "test_a": {"cpu_mean_pct": 14.0, "memory_max_kb": 70000, "transition_max_ms": 600.0},
+        "test_b": {"janky_pct": 2.5},  # +150% but under the 2-point noise floor (like cpu: +4 points)
+    }
+    assert compare(runs, load_baseline(path)) == [
+        ("test_a", "memory_max_kb", 50000, 70000),
+        ("test_a", "transition_max_ms", 400.0, 600.0),
+    ]
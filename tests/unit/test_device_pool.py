@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from appium import webdriver
+from appium.options.common import AppiumOptions
+
+from utils.device_pool import Device, DeviceScheduler, group_into_units, load_devices
+from utils.timing_db import TimingDB, UnitDurations
+
+
+class StandInAppium(BaseHTTPRequestHandler):
+    """Answers just enough of the W3C protocol to open and close sessions."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+        if self.path.endswith("/session"):
+            caps = body["capabilities"]["alwaysMatch"]
+            self.server.sessions.append(caps)
+            self._reply({"sessionId": uuid.uuid4().hex, "capabilities": caps})
+        else:
+            self._reply(None)
+
+    def do_DELETE(self):
+        self._reply(None)
+
+    def _reply(self, value):
+        payload = json.dumps({"value": value}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInAppium)
+    server.sessions = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_load_devices_from_config():
+    devices = load_devices({"devicePool": [{"name": "a", "remoteUrl": "http://x:1", "capabilities": {"udid": "a"}}]})
+    assert devices[0].name == "a" and devices[0].capabilities == {"udid": "a"}
+
+
+def test_units_are_balanced_by_duration(tmp_path):
+    db = TimingDB(str(tmp_path / "history.sqlite"))
+    durations = {"A": 4, "B": 3, "C": 2, "D": 2, "E": 1}
+    db.record([(f"t.py::{name}::test_x", "android", "local", "passed", seconds) for name, seconds in durations.items()])
+    units = group_into_units([f"t.py::{name}::test_x" for name in "ABCDE"])
+    history = UnitDurations(db, units, "android", "local")
+    devices = [Device("d1", "http://unused"), Device("d2", "http://unused")]
+
+    def runner(device, node_ids):
+        time.sleep(history.expected(node_ids[0].rsplit("::", 1)[0]) / 100)
+        return 0
+
+    scheduler = DeviceScheduler(devices, units, runner, history)
+    assert scheduler.ordered_units()[0] == "t.py::A"
+    assert scheduler.estimated_makespan() == 6
+    assert scheduler.run() == 0
+    assert {device for _, device, _, _ in scheduler.results} == {"d1", "d2"}
+
+
+@pytest.mark.parametrize("codes, expected", [
+    ((0, 0, 0), 0),
+    ((0, 5, 0), 5),  # no tests collected in one unit
+    ((5, 1, 0), 1),  # failing tests win over any other code
+    ((0, 3, 1), 1),
+    ((2, 4, 0), 2),
+])
+def test_pool_exit_code_reports_failed_tests_first(tmp_path, codes, expected):
+    units = group_into_units([f"t.py::C{i}::test_x" for i in range(len(codes))])
+    by_unit = dict(zip(units, codes))
+    history = UnitDurations(TimingDB(str(tmp_path / "history.sqlite")), units, "android", "local")
+
+    def runner(device, node_ids):
+        return by_unit[node_ids[0].rsplit("::", 1)[0]]
+
+    assert DeviceScheduler([Device("d1", "http://unused")], units, runner, history).run() == expected
+
+
+def test_each_worker_gets_its_own_appium_session(tmp_path):
+    servers = [_start_stand_in(), _start_stand_in()]
+    devices = [
+        Device(f"emu-{i}", f"http://127.0.0.1:{server.server_port}", {"udid": f"emu-{i}"})
+        for i, server in enumerate(servers)
+    ]
+    units = group_into_units([f"t.py::C{i}::test_x" for i in range(6)])
+
+    def runner(device, node_ids):
+        options = AppiumOptions()
+        options.load_capabilities({"platformName": "Android", **device.capabilities})
+        driver = webdriver.Remote(device.remote_url, options=options)
+        time.sleep(0.05)
+        driver.quit()
+        return 0
+
+    history = UnitDurations(TimingDB(str(tmp_path / "history.sqlite")), units, "android", "local")
+    assert DeviceScheduler(devices, units, runner, history).run() == 0
+
+    for i, server in enumerate(servers):
+        server.shutdown()
+        assert server.sessions, f"emu-{i} never received a session"
+        assert all(caps["appium:udid"] == f"emu-{i}" for caps in server.sessions)
+    assert sum(len(server.sessions) for server in servers) == 6
@@ -0,0 +1,94 @@
+import textwrap
+
+from utils.impact import ImpactIndex
+
+BASE_PAGE = """
+class BasePage:
+    def click(self, locator):
+        self.find(locator).click()
+
+    def find(self, locator):
+        return self.driver.find_element(*locator)
+"""
+
+LOGIN_PAGE = """
+from pages.base_page import BasePage
+
+
+class LoginPage(BasePage):
+    EMAIL_INPUT = ("id", "login_email_input")
+    LOGIN_BUTTON = ("accessibility id", "Continue")
+
+    def submit(self):
+        self.click(self.LOGIN_BUTTON)
+"""
+
+CONFTEST = """
+@pytest.fixture
+def app(driver):
+    return pages_for(driver)
+"""
+
+TEST_LOGIN = """
+import pytest
+
+
+class TestSignIn:
+    @pytest.fixture(autouse=True)
+    def open_screen(self, app):
+        app.login.find(app.login.EMAIL_INPUT)
+
+    def test_submit(self, app):
+        app.login.submit()
+
+    def test_email_only(self, app):
+        app.login.click(app.login.EMAIL_INPUT)
+
+
+def test_without_pages():
+    assert True
+"""
+
+
+def _tree(tmp_path, files):
+    for rel_path, source in files.items():
+        path = tmp_path / rel_path
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(textwrap.dedent(source))
+
+
+def _index(tmp_path):
+    return ImpactIndex(str(tmp_path), str(tmp_path / "index.json"))
+
+
+def test_a_locator_change_selects_only_the_tests_that_reach_it(tmp_path):
+    files = {"pages/base_page.py": BASE_PAGE, "pages/login_page.py": LOGIN_PAGE,
+             "tests/conftest.py": CONFTEST, "tests/test_login.py": TEST_LOGIN}
+    _tree(tmp_path, files)
+    _tree(tmp_path, {"pages/login_page.py": LOGIN_PAGE.replace('"Continue"', '"Next"')})
+
+    selected = _index(tmp_path).impacted(["pages/login_page.py"], files.get)
+    assert selected == {"tests/test_login.py::TestSignIn::test_submit"}
+
+    # Reached through the autouse fixture by every test of the class
+    _tree(tmp_path, {"pages/login_page.py": LOGIN_PAGE.replace("login_email_input", "email")})
+    selected = _index(tmp_path).impacted(["pages/login_page.py"], files.get)
+    assert selected == {"tests/test_login.py::TestSignIn::test_submit", "tests/test_login.py::TestSignIn::test_email_only"}
+
+    assert _index(tmp_path).impacted(["README.md"], files.get) == set()
+    assert _index(tmp_path).impacted(["tests/unit/test_impact.py"], files.get) == set()
+    assert _index(tmp_path).impacted(["tests/conftest.py"], files.get) is None
+
+
+def test_index_only_reanalyzes_changed_files(tmp_path):
+    _tree(tmp_path, {"pages/base_page.py": BASE_PAGE, "pages/login_page.py": LOGIN_PAGE,
+                     "tests/conftest.py": CONFTEST, "tests/test_login.py": TEST_LOGIN})
+    index = _index(tmp_path)
+    index.refresh()
+    index.save()
+    assert index.analyzed == 3
+
+    _tree(tmp_path, {"tests/test_login.py": TEST_LOGIN + "\n\ndef test_new(app):\n    app.login.submit()\n"})
+    index = _index(tmp_path)
+    assert index.impacted(["tests/test_login.py"], lambda rel_path: TEST_LOGIN) == {"tests/test_login.py::test_new"}
+    assert index.analyzed == 1  # the new test module; the base version and the pages come from the index
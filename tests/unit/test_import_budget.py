@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+from utils.import_budget import ROOT, by_package, deferred_loaded, import_time_us, parse_importtime, profile
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        900 |     google.protobuf
+import time:       500 |       1400 |   google.generativeai
+import time:        50 |       1450 | utils.gemini_analyzer
+import time:       200 |       2000 | tests.conftest
+"""
+
+
+def test_importtime_output_is_parsed_per_module():
+    records = parse_importtime(IMPORTTIME)
+    assert [(r.name, r.self_us, r.cumulative_us, r.depth) for r in records] == [
+        ("_io", 120, 120, 1),
+        ("google.protobuf", 300, 900, 2),
+        ("google.generativeai", 500, 1400, 1),
+        ("utils.gemini_analyzer", 50, 1450, 0),
+        ("tests.conftest", 200, 2000, 0),
+    ]
+    assert import_time_us(records) == 3450  # conftest and a plugin imported after it
+    assert by_package(records) == {"google": 800, "tests": 200, "_io": 120, "utils": 50}
+    assert deferred_loaded(records) == ["google.generativeai"]
+
+
+def test_conftest_does_not_import_deferred_dependencies():
+    assert deferred_loaded(profile()) == []
+
+
+def test_analyzing_with_a_stub_model_imports_no_google_client():
+    script = (
+        "import sys\n"
+        "from utils.gemini_analyzer import GeminiAnalyzer\n"
+        "class Stub:\n"
+        "    def generate_content(self, prompt):\n"
+        "        raise RuntimeError('quota exceeded')\n"
+        "print(GeminiAnalyzer(model=Stub()).analyze('boom'))\n"
+        "print(sorted({name.split('.')[1] for name in sys.modules if name.startswith('google.')}))\n"
+    )
+    process = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert process.stdout.splitlines() == [
+        "An unexpected error occurred during Gemini analysis: quota exceeded", "[]",
+    ]
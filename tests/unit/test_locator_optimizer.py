@@ -0,0 +1,49 @@
+from appium.webdriver.common.appiumby import AppiumBy
+
+from pages.base_page import BasePage
+from pages.bottom_tabs import BottomTabs
+from pages.login_page import LoginPage
+from utils.locator_optimizer import optimize, page_locators
+from utils.page_source import PageSnapshot
+
+
+def test_simple_xpaths_are_rewritten_for_android():
+    assert optimize(BottomTabs.HOME, "Android") == (
+        AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().className("android.widget.TextView").text("Home")'
+    )
+    assert optimize(LoginPage.REQUIRED_FIELD_ERRORS_2, "Android")[1].endswith(".instance(1)")
+    assert optimize((AppiumBy.XPATH, "//*[@resource-id='com.example:id/title']"), "Android") == (
+        AppiumBy.ID, "com.example:id/title"
+    )
+    # An ID lookup ignores the class, so a typed tag keeps it through UiSelector
+    assert optimize((AppiumBy.XPATH, "//android.widget.Button[@resource-id='com.example:id/title']"), "Android") == (
+        AppiumBy.ANDROID_UIAUTOMATOR,
+        'new UiSelector().className("android.widget.Button").resourceId("com.example:id/title")',
+    )
+
+
+def test_locators_without_native_equivalent_are_left_alone():
+    complex_xpath = (AppiumBy.XPATH, "//android.widget.TextView[contains(@text, 'Home')]")
+    assert optimize(complex_xpath, "Android") == complex_xpath
+    assert optimize(LoginPage.LOGIN_BUTTON, "Android") == LoginPage.LOGIN_BUTTON
+    assert optimize(BottomTabs.HOME, "iOS") == BottomTabs.HOME
+    assert optimize(BottomTabs.HOME, None) == BottomTabs.HOME
+
+
+def test_rewritten_locators_match_the_same_nodes(home_screen):
+    snapshot = PageSnapshot(home_screen)
+    for page in (LoginPage, BottomTabs):
+        for name, locator in page_locators(page).items():
+            assert snapshot.find_all(optimize(locator, "Android")) == snapshot.find_all(locator), name
+
+
+class AndroidDriver:
+    capabilities = {"platformName": "Android"}
+
+
+def test_page_objects_send_their_own_locators_unless_rewriting_is_enabled(monkeypatch):
+    page = BasePage(AndroidDriver())
+    assert page.native(BottomTabs.HOME) == BottomTabs.HOME
+
+    monkeypatch.setattr(BasePage, "optimize_locators", True)
+    assert page.native(BottomTabs.HOME) == optimize(BottomTabs.HOME, "Android") != BottomTabs.HOME
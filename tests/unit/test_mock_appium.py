@@ -0,0 +1,81 @@
+import pytest
+from appium import webdriver
+from appium.options.common import AppiumOptions
+from selenium.common import NoSuchElementException, StaleElementReferenceException
+
+from pages.bottom_tabs import BottomTabs
+from pages.login_page import LoginPage
+from utils.constants import UIConstants
+from utils.mock_appium import MockAppiumServer, Scenario, load_scenario
+from utils.session_pool import reset_app_state
+from utils.settings import ConfigError
+
+
+@pytest.fixture(scope="module")
+def server():
+    with MockAppiumServer(load_scenario()) as server:
+        yield server
+
+
+def _open(server):
+    options = AppiumOptions()
+    options.load_capabilities({"platformName": "Android", "automationName": "UiAutomator2"})
+    return webdriver.Remote(server.url, options=options)
+
+
+def test_page_objects_run_against_the_scripted_app(server):
+    driver = _open(server)
+    try:
+        login = LoginPage(driver)
+        login.navigate_to_signin_screen()
+
+        login.login("user@example.com", "wrong")
+        login.verify_element_text(login.WRONG_EMAIL_OR_PASSWORD_MESSAGE, UIConstants.INCORRECT_CREDENTIALS)
+        assert 'text="user@example.com"' in driver.page_source
+
+        email = driver.find_element(*login.EMAIL_INPUT)
+        login.clear_signin_form()  # typing goes back to the plain form, which still has the field
+        assert email.text == "" and not login.is_visible(login.WRONG_EMAIL_OR_PASSWORD_MESSAGE, timeout=0)
+
+        login.login("user@example.com", "Secret123!")
+        BottomTabs(driver).verify_bottom_tabs_visible()
+        with pytest.raises(StaleElementReferenceException):
+            email.clear()
+        with pytest.raises(NoSuchElementException):
+            driver.find_element(*login.EMAIL_INPUT)
+        assert driver.get_screenshot_as_png().startswith(b"\x89PNG")
+
+        reset_app_state(driver, "com.example.mobileapp")
+        assert login.is_visible(login.SIGN_IN_BUTTON_ONBOARDING, timeout=0)
+    finally:
+        driver.quit()
+
+
+def test_sessions_are_cheap_and_independent(server):
+    before = server.app.sessions_created
+    drivers = [_open(server) for _ in range(50)]
+    LoginPage(drivers[0]).navigate_to_signin_screen()
+
+    assert server.app.sessions_created - before == 50
+    assert LoginPage(drivers[1]).is_visible(LoginPage.SIGN_IN_BUTTON_ONBOARDING, timeout=0)
+    for driver in drivers:
+        driver.quit()
+    assert not server.app.sessions
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"start": "nowhere"}, "start screen 'nowhere'"),
+    ({"transitions": [{"element": ["accessibility id", "Sign in"], "to": "nowhere"}]}, "unknown screen 'nowhere'"),
+    ({"transitions": [{"element": ["accessibility id", "Sgn in"], "to": "signin"}]}, "matches nothing"),
+])
+def test_scenario_mistakes_are_reported_on_load(change, message):
+    data = {
+        "start": "onboarding",
+        "screens": {
+            "onboarding": '<hierarchy><android.view.View content-desc="Sign in"/></hierarchy>',
+            "signin": {"base": "onboarding", "extra": ['<android.widget.EditText resource-id="email"/>']},
+        },
+    }
+    Scenario(data)
+    with pytest.raises(ConfigError, match=message):
+        Scenario({**data, **change})
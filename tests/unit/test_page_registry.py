@@ -0,0 +1,46 @@
+import typing
+
+import pytest
+
+from pages.bottom_tabs import BottomTabs
+from pages.login_page import LoginPage
+from pages.registry import AppPages, default_alias, discover, pages_for
+
+
+class SessionDriver:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.capabilities = {"platformName": "Android"}
+
+
+def test_every_page_object_is_registered_under_its_alias():
+    registry = discover()
+    assert registry["login"] is LoginPage
+    assert registry["bottom"] is BottomTabs
+    assert default_alias("ProductDetailsPage") == "product_details"
+
+    # The typed attributes of AppPages must exist in the registry with the same class
+    hints = typing.get_type_hints(AppPages, localns={"LoginPage": LoginPage, "BottomTabs": BottomTabs})
+    assert all(registry[alias] is page_type for alias, page_type in hints.items())
+
+
+def test_pages_are_built_on_first_access_and_cached_per_session():
+    built = []
+
+    class CountingPage(LoginPage):
+        def __init__(self, driver, use_snapshot=False):
+            built.append(driver.session_id)
+            super().__init__(driver, use_snapshot)
+
+    driver = SessionDriver("s1")
+    app = AppPages(driver, registry={"login": CountingPage})
+    assert built == []
+    assert app.login is app.login
+    assert built == ["s1"]
+    with pytest.raises(AttributeError):
+        app.settings
+
+    assert pages_for(driver) is pages_for(driver)
+    first = pages_for(driver).login
+    driver.session_id = "s2"  # recycled session
+    assert pages_for(driver).login is not first
@@ -0,0 +1,45 @@
+from appium.webdriver.common.appiumby import AppiumBy
+
+from pages.bottom_tabs import BottomTabs
+from pages.login_page import LoginPage
+from utils.page_source import PageSnapshot
+
+
+def test_snapshot_resolves_page_object_locators(home_screen):
+    snapshot = PageSnapshot(home_screen)
+
+    assert snapshot.is_visible(LoginPage.EMAIL_INPUT)
+    assert snapshot.is_visible(LoginPage.LOGIN_BUTTON)
+    assert snapshot.is_visible(LoginPage.REQUIRED_FIELD_ERRORS_1)
+    assert not snapshot.is_visible(LoginPage.REQUIRED_FIELD_ERRORS_2)
+    assert snapshot.is_visible((AppiumBy.ID, "continue"))
+    # UiAutomator compares resourceId with the full id; only the ID strategy adds the package
+    assert not snapshot.is_visible((AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().resourceId("continue")'))
+    assert snapshot.is_visible((AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().resourceId("com.example:id/continue")'))
+    assert snapshot.is_visible((AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().text("Markets")'))
+
+
+def test_bottom_tabs_are_checked_with_one_round_trip(home_driver):
+    BottomTabs(home_driver).verify_bottom_tabs_visible()
+    assert home_driver.source_calls == 1
+
+
+def test_are_visible_reports_each_locator(home_driver):
+    results = LoginPage(home_driver).are_visible(
+        [LoginPage.REQUIRED_FIELD_ERRORS_1, LoginPage.REQUIRED_FIELD_ERRORS_2], timeout=0
+    )
+    assert results == {LoginPage.REQUIRED_FIELD_ERRORS_1: True, LoginPage.REQUIRED_FIELD_ERRORS_2: False}
+
+
+def test_snapshot_mode_answers_assertions_from_one_fetch_until_an_action(home_driver):
+    login = LoginPage(home_driver, use_snapshot=True)
+    bottom = BottomTabs(home_driver, use_snapshot=True)
+
+    assert login.is_visible(login.EMAIL_INPUT)
+    assert login.get_text(login.REQUIRED_ERROR_MESSAGE) == "This field is required"
+    bottom.verify_bottom_tabs_visible()
+    assert home_driver.source_calls == 1
+
+    login.click(login.LOGIN_BUTTON)
+    assert bottom.is_visible(bottom.HOME)
+    assert home_driver.source_calls == 2
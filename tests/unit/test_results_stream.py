@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+from utils.allure_results import read_environment, reset_counters, update_environment
+from utils.results_stream import WORKER_ARTIFACTS, artifact_path, merge_worker_results
+
+
+def dump_from_processes(report_dir, worker, file_name, pids):
+    """What `pids` unit processes of one pool worker leave behind for `file_name`."""
+    worker_dir = report_dir / "workers" / worker
+    worker_dir.mkdir(parents=True, exist_ok=True)
+    stem, extension = os.path.splitext(file_name)
+    for pid in pids:
+        (worker_dir / f"{stem}-{pid}{extension}").write_text(json.dumps({"pid": pid}))
+    (worker_dir / f"{worker}-result.json").write_text("{}")  # an Allure result
+
+
+def test_artifacts_are_unique_per_worker_process():
+    assert artifact_path("reports", "wait_timings.json") == os.path.join("reports", "wait_timings.json")
+    assert artifact_path("reports", "wait_timings.json", "emulator-5554") == os.path.join(
+        "reports", f"wait_timings-{os.getpid()}.json")
+    with pytest.raises(ValueError, match="not registered"):
+        artifact_path("reports", "unregistered.json")
+
+
+@pytest.mark.parametrize("file_name", WORKER_ARTIFACTS)
+def test_merging_two_workers_keeps_every_process_artifact(tmp_path, file_name):
+    dump_from_processes(tmp_path, "emulator-5554", file_name, [101, 102])
+    dump_from_processes(tmp_path, "emulator-5556", file_name, [201])
+
+    assert merge_worker_results(str(tmp_path)) == 5
+    stem, extension = os.path.splitext(file_name)
+    assert sorted(name for name in os.listdir(tmp_path) if stem in name) == [
+        f"emulator-5554-{stem}-101{extension}",
+        f"emulator-5554-{stem}-102{extension}",
+        f"emulator-5556-{stem}-201{extension}",
+    ]
+    assert not (tmp_path / "workers").exists()
+
+
+def test_worker_environments_are_merged_key_by_key(tmp_path):
+    for worker, hits in (("emulator-5554", 3), ("emulator-5556", 1)):
+        update_environment(
+            str(tmp_path / "workers" / worker), {"Platform": "Android", "Platform.version": "14"}, add={"AI.analysis.cache.hits": hits}
+        )
+
+    merge_worker_results(str(tmp_path))
+    assert read_environment(str(tmp_path)) == {"Platform": "Android", "Platform.version": "14", "AI.analysis.cache.hits": "4"}
+
+
+def test_counters_restart_with_each_run_into_the_same_results(tmp_path):
+    update_environment(str(tmp_path), {"Platform.version": "14"}, add={"AI.analysis.cache.hits": 3})
+
+    reset_counters(str(tmp_path))
+    update_environment(str(tmp_path), {"Platform.version": "14"}, add={"AI.analysis.cache.hits": 1})
+    assert read_environment(str(tmp_path)) == {"Platform.version": "14", "AI.analysis.cache.hits": "1"}
@@ -0,0 +1,134 @@
+import pytest
+from selenium.common import InvalidSessionIdException, NoSuchElementException, TimeoutException, WebDriverException
+
+from utils.retry import ASSERTION, INFRASTRUCTURE, TIMING, RetryPlugin, classify
+from utils.timing_db import HistoryEntry, HistoryPlugin, TimingDB
+from utils.wait_engine import ElementNotFoundTimeout, wait_until
+
+SUITE = '''
+import pytest
+from selenium.common import InvalidSessionIdException, TimeoutException
+
+calls = {}
+
+def attempt(name):
+    calls[name] = calls.get(name, 0) + 1
+    return calls[name]
+
+@pytest.fixture(scope="module")
+def driver():
+    calls["driver"] = calls.get("driver", 0) + 1
+    return "driver"
+
+def test_session_died_once(driver):
+    if attempt("session") == 1:
+        raise InvalidSessionIdException("session deleted")
+
+def test_always_slow(driver):
+    attempt("slow")
+    raise TimeoutException("Timed out after 10s waiting for visible")
+
+def test_product_bug(driver):
+    attempt("bug")
+    assert 1 == 2
+
+def test_quarantined(driver):
+    assert attempt("quarantined") == 0
+
+def test_last(driver):
+    assert calls["driver"] == 1
+'''
+
+
+class Outcomes:
+    def __init__(self):
+        self.reports = []
+
+    def pytest_runtest_logreport(self, report):
+        if report.when == "call":
+            self.reports.append((report.nodeid.split("::")[-1], report.outcome,
+                                 [kind for name, kind in report.user_properties if name == "retry"]))
+
+
+class FailureReports:
+    """Like the conftest report hook: tells failures about to be retried from those that stand."""
+
+    def __init__(self, retry):
+        self.retry = retry
+        self.analyzed, self.skipped = [], []
+
+    @pytest.hookimpl(tryfirst=True, hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        if call.when == "call" and outcome.get_result().failed:
+            (self.skipped if self.retry.will_retry(item) else self.analyzed).append(item.name)
+
+
+@pytest.mark.parametrize("exc, kind", [
+    (InvalidSessionIdException("session deleted"), INFRASTRUCTURE),
+    (WebDriverException("An unknown server-side error occurred"), INFRASTRUCTURE),
+    (ConnectionRefusedError(), INFRASTRUCTURE),
+    (TimeoutException("Timed out"), TIMING),
+    (AssertionError("1 != 2"), ASSERTION),
+    (NoSuchElementException("no such element"), ASSERTION),
+    (ElementNotFoundTimeout("Timed out"), ASSERTION),
+])
+def test_failures_are_classified_by_exception(exc, kind):
+    assert classify(exc) == kind
+
+
+def test_an_assertion_raised_from_a_timeout_counts_as_timing():
+    try:
+        try:
+            raise TimeoutException("Timed out")
+        except TimeoutException as exc:
+            raise AssertionError("not visible") from exc
+    except AssertionError as exc:
+        assert classify(exc) == TIMING
+
+
+def test_a_wait_for_an_element_that_never_appears_is_not_timing():
+    def missing(driver):
+        raise NoSuchElementException("no such element")
+
+    with pytest.raises(ElementNotFoundTimeout) as not_found:
+        wait_until(None, missing, timeout=0.05)
+    with pytest.raises(TimeoutException) as slow:
+        wait_until(None, lambda driver: False, timeout=0.05)  # found, but not yet in the expected state
+    assert (classify(not_found.value), classify(slow.value)) == (ASSERTION, TIMING)
+
+
+def test_only_infrastructure_and_timing_failures_are_retried_in_place(tmp_path):
+    (tmp_path / "test_suite.py").write_text(SUITE)
+    (tmp_path / "pytest.ini").write_text("[pytest]\n")
+    recovered = []
+    history = {"test_suite.py::test_quarantined": HistoryEntry([1.0] * 6, ["flaky", "passed", "flaky"] * 2)}
+    retry = RetryPlugin(recover=lambda driver, kind: recovered.append((driver, kind)), max_retries=1,
+                        history=history, quarantine_threshold=0.5, quarantine_min_runs=5)
+    outcomes = Outcomes()
+    failures = FailureReports(retry)
+    db = TimingDB(str(tmp_path / "history.sqlite"))
+
+    code = pytest.main([str(tmp_path), "-c", str(tmp_path / "pytest.ini"), "--rootdir", str(tmp_path),
+                        "-p", "no:cacheprovider", "-q"],
+                       plugins=[retry, outcomes, failures, HistoryPlugin(db, "android", "ci")])
+
+    assert code == 1
+    assert outcomes.reports == [
+        ("test_session_died_once", "passed", ["infrastructure"]),
+        ("test_always_slow", "failed", ["timing"]),
+        ("test_product_bug", "failed", []),
+        ("test_quarantined", "skipped", []),  # xfailed
+        ("test_last", "passed", []),  # the module's driver fixture was set up once
+    ]
+    assert recovered == [("driver", INFRASTRUCTURE), ("driver", TIMING)]
+    # Only the failures that stand are captured and analyzed
+    assert failures.skipped == ["test_session_died_once", "test_always_slow"]
+    assert failures.analyzed == ["test_always_slow", "test_product_bug"]
+    assert [(node_id.split("::")[-1], passed) for node_id, _, passed in retry.retried] == [
+        ("test_session_died_once", True), ("test_always_slow", False),
+    ]
+    assert list(retry.quarantined) == ["test_suite.py::test_quarantined"]
+    recorded = {node_id.split("::")[-1]: entry.outcomes[0] for node_id, entry in db.load("android", "ci").items()}
+    assert recorded == {"test_session_died_once": "flaky", "test_always_slow": "failed", "test_product_bug": "failed",
+                        "test_quarantined": "failed", "test_last": "passed"}
@@ -0,0 +1,85 @@
+import io
+import json
+
+import allure
+from PIL import Image, ImageDraw
+
+from utils.allure_results import REF_LABEL
+from utils.screenshots import ScreenshotPipeline
+
+
+def _screen(button_y=400, noise_pixel=None):
+    """A 1080x1920 'login screen' PNG; `button_y` moves the button, `noise_pixel` flips one pixel."""
+    image = Image.new("RGB", (1080, 1920), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 1080, 200), fill="navy")
+    draw.rectangle((140, button_y, 940, button_y + 160), fill="orange")
+    if noise_pixel:
+        image.putpixel(noise_pixel, (0, 0, 0))
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    return out.getvalue()
+
+
+class ScreenshotDriver:
+    def __init__(self, *screens):
+        self.screens = list(screens)
+
+    def get_screenshot_as_png(self):
+        return self.screens.pop(0)
+
+
+def _write_result(report_dir, ref):
+    result = {"uuid": ref, "name": "test", "labels": [{"name": REF_LABEL, "value": ref}]}
+    (report_dir / f"{ref}-result.json").write_text(json.dumps(result))
+
+
+def test_screenshots_are_downscaled_reencoded_and_stored_once(tmp_path):
+    login, login_again, login_with_noise, home = _screen(), _screen(), _screen(noise_pixel=(5, 1900)), _screen(1200)
+    driver = ScreenshotDriver(login, login_again, login_with_noise, home)
+    # Near-duplicate matching is enabled, but failure screenshots never use it
+    pipeline = ScreenshotPipeline(str(tmp_path), image_format="jpeg", quality=60, max_width=360,
+                                  near_duplicate_distance=4)
+
+    for i in range(4):
+        pipeline.capture(driver, f"ref{i}", "error_screenshot")
+        _write_result(tmp_path, f"ref{i}")
+    assert pipeline.finish() == 4
+
+    stored = sorted(tmp_path.glob("*-attachment.jpg"))
+    assert len(stored) == 3  # only the exact duplicate of the first screen shares its file
+    assert Image.open(stored[0]).size == (360, 640)
+    assert sum(path.stat().st_size for path in stored) < pipeline.raw_bytes / 2
+
+    attachments = [json.loads((tmp_path / f"ref{i}-result.json").read_text())["attachments"][0] for i in range(4)]
+    assert attachments[0]["source"] == attachments[1]["source"]
+    assert len({a["source"] for a in attachments[1:]}) == 3
+    assert attachments[0]["type"] == allure.attachment_type.JPG.mime_type
+
+
+def test_near_duplicates_are_merged_only_for_step_screenshots_that_opt_in(tmp_path):
+    login, login_with_noise = _screen(), _screen(noise_pixel=(5, 1900))
+    for distance, expected in ((0, 2), (4, 1)):
+        report_dir = tmp_path / str(distance)
+        report_dir.mkdir()
+        pipeline = ScreenshotPipeline(str(report_dir), image_format="png", max_width=0,
+                                      near_duplicate_distance=distance)
+        driver = ScreenshotDriver(login, login_with_noise)
+        for _ in range(2):
+            pipeline.capture(driver, "ref", "step_screenshot", near_duplicates=True)
+        pipeline.finish()
+        assert len(list(report_dir.glob("*-attachment.png"))) == expected
+
+
+def test_step_screenshots_stop_at_the_per_test_budget(tmp_path):
+    screens = [_screen(200 + 100 * i) for i in range(6)]
+    pipeline = ScreenshotPipeline(str(tmp_path), image_format="png", max_width=0, step_budget=1)
+
+    pipeline.begin_test(ScreenshotDriver(*screens), "ref")
+    for _ in range(6):
+        pipeline.stop_step("step", None, None, None)
+        pipeline._executor.submit(lambda: None).result()  # let the size of the capture be counted
+    pipeline.end_test()
+    pipeline.stop_step("after the test", None, None, None)
+
+    assert pipeline.captured == 1
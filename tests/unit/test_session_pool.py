@@ -0,0 +1,95 @@
+import pytest
+from selenium.common import InvalidSessionIdException, WebDriverException
+
+from pages.login_page import LoginPage
+from utils.mock_appium import MockAppium, in_process_driver, load_scenario
+from utils.page_source import snapshot_cache_for
+from utils.session_pool import SessionPool, renew_session, requested_capabilities, reset_app_state
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.calls = []
+
+    @property
+    def timeouts(self):
+        if not self.alive:
+            raise WebDriverException("session is gone")
+        return {}
+
+    def terminate_app(self, app_id):
+        self.calls.append(("terminate", app_id))
+
+    def activate_app(self, app_id):
+        self.calls.append(("activate", app_id))
+
+    def quit(self):
+        self.calls.append(("quit",))
+
+
+def _pool(**kwargs):
+    return SessionPool(lambda url, caps: FakeDriver(), app_id="com.example.mobileapp", **kwargs)
+
+
+def test_session_is_reset_and_reused_between_classes():
+    pool = _pool()
+    first = pool.acquire("http://hub", {"platformName": "Android"})
+    pool.release(first)
+    second = pool.acquire("http://hub", {"platformName": "Android"})
+
+    assert second is first
+    assert first.calls == [("terminate", "com.example.mobileapp"), ("activate", "com.example.mobileapp")]
+    assert (pool.created, pool.reused) == (1, 1)
+
+
+def test_session_is_recycled_after_max_uses_or_when_unhealthy():
+    pool = _pool(max_uses=1)
+    first = pool.acquire("http://hub", {})
+    pool.release(first)
+    assert pool.acquire("http://hub", {}) is not first
+    assert ("quit",) in first.calls
+
+    pool = _pool()
+    dead = pool.acquire("http://hub", {})
+    pool.release(dead)
+    dead.alive = False
+    assert pool.acquire("http://hub", {}) is not dead
+    assert pool.recycled == 1
+
+
+def test_different_capabilities_do_not_share_sessions():
+    pool = _pool()
+    android = pool.acquire("http://hub", {"platformName": "Android"})
+    pool.release(android)
+    assert pool.acquire("http://hub", {"platformName": "iOS"}) is not android
+
+
+def test_a_dead_session_is_renewed_on_the_same_driver():
+    app = MockAppium(load_scenario())
+    driver = in_process_driver(app)
+    requested_capabilities[driver] = {"platformName": "Android", "automationName": "UiAutomator2"}
+    app.sessions.clear()  # e.g. the server restarted
+    with pytest.raises(InvalidSessionIdException):
+        driver.page_source
+
+    renew_session(driver)
+    assert LoginPage(driver).is_visible(LoginPage.SIGN_IN_BUTTON_ONBOARDING, timeout=0)
+    assert list(app.sessions) == [driver.session_id]
+    driver.quit()
+
+
+def test_resets_and_renewals_drop_the_cached_page_source():
+    driver = in_process_driver(MockAppium(load_scenario()))
+    requested_capabilities[driver] = {"platformName": "Android", "automationName": "UiAutomator2"}
+    snapshots = snapshot_cache_for(driver)
+    snapshots.get()
+    snapshots.get()
+    assert snapshots.fetches == 1
+
+    reset_app_state(driver, "com.example.mobileapp")
+    snapshots.get()
+    renew_session(driver)
+    snapshots.get()
+    assert snapshots.fetches == 3
+    driver.quit()
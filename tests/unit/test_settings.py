@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from utils.settings import ConfigError, JsonlDataset, load_settings
+
+BASE = {
+    "android": {"platformName": "Android", "app": "app/android/my_app.apk"},
+    "sessionPool": {"enabled": True, "maxUses": 10, "appId": "com.example.app", "reset": "relaunch"},
+}
+
+
+def _config_dir(tmp_path, **files):
+    for name, content in {"config.json": BASE, **files}.items():
+        (tmp_path / name).write_text(json.dumps(content))
+    return str(tmp_path)
+
+
+def test_layers_override_in_order_and_the_result_is_cached_and_read_only(tmp_path):
+    config_dir = _config_dir(
+        tmp_path,
+        **{"config.android.json": {"sessionPool": {"maxUses": 5}}, "config.ci.json": {"sessionPool": {"reset": "clear"}}},
+    )
+    environ = {"MOBILE_CFG__sessionPool__maxUses": "3"}
+
+    settings = load_settings("android", "ci", environ=environ, config_dir=config_dir)
+    assert dict(settings["sessionPool"]) == {"enabled": True, "maxUses": 3, "appId": "com.example.app", "reset": "clear"}
+    assert load_settings("android", "ci", ["sessionPool.enabled=false"], environ, config_dir)["sessionPool"]["enabled"] is False
+
+    assert load_settings("android", "ci", environ=environ, config_dir=config_dir) is settings
+    with pytest.raises(TypeError):
+        settings["sessionPool"]["maxUses"] = 1
+
+
+@pytest.mark.parametrize("overrides, message", [
+    (["sessionPool.maxUse=3"], "unknown key 'maxUse'"),
+    (["sessionPool.maxUses=three"], "sessionPool.maxUses: expected int"),
+    (["devicePool=[{\"name\": \"emu\"}]"], "devicePool[0]: missing required key 'remoteUrl'"),
+    (["sessionPool.appId=null"], "sessionPool.enabled needs sessionPool.appId"),
+])
+def test_mistakes_are_reported_with_their_key(tmp_path, overrides, message):
+    with pytest.raises(ConfigError, match=message.replace("[", r"\[")):
+        load_settings("android", "local", overrides, {}, _config_dir(tmp_path))
+
+
+def test_jsonl_records_are_validated_up_front_and_read_one_at_a_time(tmp_path):
+    path = tmp_path / "users.jsonl"
+    lines = [{"id": f"user{i}", "email": f"user{i}@example.com", "password": "secret"} for i in range(1000)]
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n\n")
+
+    users = JsonlDataset(str(path), required=("email", "password"))
+    assert len(users) == 1000 and users.ids[:2] == ["user0", "user1"]
+    assert users.read(users.offsets[999])["email"] == "user999@example.com"
+    assert sum(1 for _ in users) == 1000
+
+    path.write_text(json.dumps(lines[0]) + "\n" + json.dumps({"id": "broken"}) + "\n")
+    with pytest.raises(ConfigError, match="users.jsonl:2: missing email, password"):
+        JsonlDataset(str(path), required=("email", "password"))
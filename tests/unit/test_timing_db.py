@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+from utils.device_pool import Device, DeviceScheduler, group_into_units
+from utils.timing_db import HistoryPlugin, TimingDB, UnitDurations, expected_duration, recent_failures_first
+
+LOGIN = "tests/test_login.py::TestSignIn"
+TABS = "tests/test_tabs.py::TestTabs"
+
+
+def _record(db, *results, platform="android", env="local"):
+    db.record([(node_id, platform, env, outcome, duration) for node_id, outcome, duration in results])
+
+
+def test_history_is_kept_per_platform_and_env(tmp_path):
+    db = TimingDB(str(tmp_path / "history.sqlite"))
+    for seconds in (10, 12, 30):
+        _record(db, (f"{LOGIN}::test_valid_login", "passed", seconds))
+    _record(db, (f"{LOGIN}::test_valid_login", "failed", 90), platform="ios")
+
+    android = db.load("android", "local")
+    assert expected_duration(android, f"{LOGIN}::test_valid_login") == 12
+    assert not android[f"{LOGIN}::test_valid_login"].recently_failed
+    assert db.load("ios", "local")[f"{LOGIN}::test_valid_login"].recently_failed
+    assert expected_duration(android, f"{LOGIN}::test_new") == 12  # unknown: mean of the known tests
+    assert db.load("android", "browserstack") == {}
+
+
+def test_recent_failures_run_first_without_splitting_classes(tmp_path):
+    db = TimingDB(str(tmp_path / "history.sqlite"))
+    node_ids = [f"{TABS}::test_home", f"{LOGIN}::test_required_email_password_fields", f"{LOGIN}::test_valid_login"]
+    _record(db, (node_ids[0], "passed", 5), (node_ids[1], "passed", 5), (node_ids[2], "failed", 20))
+    _record(db, (node_ids[2], "passed", 20))
+
+    assert recent_failures_first(node_ids, db.load("android", "local")) == [node_ids[2], node_ids[1], node_ids[0]]
+
+
+def test_pool_is_packed_from_per_test_durations(tmp_path):
+    db = TimingDB(str(tmp_path / "history.sqlite"))
+    node_ids = [f"t.py::{name}::test_{i}" for name, count in (("A", 3), ("B", 1), ("C", 2)) for i in range(count)]
+    _record(db, *[(node_id, "passed", 10) for node_id in node_ids])
+    _record(db, ("t.py::B::test_0", "failed", 10))
+    units = group_into_units(node_ids)
+
+    history = UnitDurations(db, units, "android", "local")
+    devices = [Device("d1", "http://unused"), Device("d2", "http://unused")]
+    scheduler = DeviceScheduler(devices, units, lambda device, ids: 0, history)
+    assert scheduler.ordered_units() == ["t.py::A", "t.py::C", "t.py::B"]
+    assert scheduler.estimated_makespan() == 30
+
+    first = [key for key in units if history.recently_failed(key)]
+    assert DeviceScheduler(devices, units, lambda device, ids: 0, history, first).ordered_units()[0] == "t.py::B"
+
+
+def test_estimate_is_printed_only_once_there_is_a_history(tmp_path):
+    db = TimingDB(str(tmp_path / "history.sqlite"))
+    items = [SimpleNamespace(nodeid=f"{LOGIN}::test_valid_login"), SimpleNamespace(nodeid=f"{LOGIN}::test_new")]
+    assert HistoryPlugin(db, "android", "local").pytest_report_collectionfinish(items) is None
+
+    _record(db, (f"{LOGIN}::test_valid_login", "passed", 20))
+    assert HistoryPlugin(db, "android", "local").pytest_report_collectionfinish(items) == (
+        "history: 2 tests, estimated 40s (1 without history)"
+    )
@@ -0,0 +1,47 @@
+import json
+
+from pages.base_page import BasePage
+from pages.login_page import LoginPage
+from utils.mock_appium import MockAppium, in_process_driver, load_scenario
+from utils.tracing import Tracer, instrument_driver, instrument_pages, restore
+
+
+def _spans(tracer):
+    return {(e["cat"], e["name"]): e for e in json.load(open(tracer.path)) if e["ph"] == "X"}
+
+
+def test_page_methods_and_driver_commands_nest_in_a_chrome_trace(tmp_path):
+    tracer = Tracer(str(tmp_path / "trace.json"), flush_every=3)
+    patched = instrument_pages(tracer, [BasePage, LoginPage], skip=("native", "actions")) + instrument_driver(tracer)
+    try:
+        driver = in_process_driver(MockAppium(load_scenario()))
+        with tracer.span("test_signin", "test"):
+            LoginPage(driver).navigate_to_signin_screen()
+        driver.quit()
+    finally:
+        restore(patched)
+    tracer.close()
+
+    spans = _spans(tracer)
+    test, navigate = spans["test", "test_signin"], spans["page", "LoginPage.navigate_to_signin_screen"]
+    click, command = spans["page", "BasePage.click"], spans["command", "clickElement"]
+    for outer, inner in ((test, navigate), (navigate, click), (click, command)):
+        assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert ("page", "BasePage.native") not in spans
+    assert BasePage.click.__name__ == "click" and not hasattr(BasePage.click, "__wrapped_for_trace__")
+
+
+def test_jsonl_spans_record_depth_and_errors(tmp_path):
+    tracer = Tracer(str(tmp_path / "trace.jsonl"))
+    try:
+        with tracer.span("step", "step"):
+            with tracer.span("assert", "step"):
+                raise AssertionError
+    except AssertionError:
+        pass
+    tracer.close()
+
+    lines = [json.loads(line) for line in open(tracer.path)]
+    assert [(s["name"], s["depth"], s.get("args")) for s in lines] == [
+        ("assert", 1, {"error": "AssertionError"}), ("step", 0, {"error": "AssertionError"}),
+    ]
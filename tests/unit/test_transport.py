@@ -0,0 +1,77 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from appium import webdriver
+from appium.options.common import AppiumOptions
+
+from utils.benchmark import large_source
+from utils.mock_appium import MockAppiumServer, Scenario
+from utils.transport import NetworkTimings, Transport, command_name, is_idempotent
+
+
+def test_commands_are_named_without_ids_and_classified():
+    assert command_name("POST", "/wd/hub/session/1a2b/element/3c/click") == "POST /session/{id}/element/{id}/click"
+    assert command_name("GET", "/session/1a2b/element/active") == "GET /session/{id}/element/active"
+    assert is_idempotent("POST", "/session/1a2b/elements") and is_idempotent("POST", "/session/1a2b/timeouts")
+    assert not is_idempotent("POST", "/wd/hub/session")  # a retried create can open a second cloud session
+    assert not is_idempotent("POST", "/session/1a2b/element/3c/click")
+
+
+def test_drivers_share_keep_alive_connections_and_get_compressed_sources():
+    timings = NetworkTimings()
+    transport = Transport(timings=timings)
+    options = AppiumOptions()
+    options.load_capabilities({"platformName": "Android"})
+
+    with MockAppiumServer(Scenario({"screens": {"list": large_source(2000)}})) as server:
+        for _ in range(3):
+            driver = webdriver.Remote(transport.connection(server.url), options=options)
+            source = driver.page_source
+            driver.quit()
+        assert transport.pool.connection_from_url(server.url).num_connections == 1
+
+    [page_source] = [e for e in timings.by_command() if e["command"] == "GET /session/{id}/source"]
+    assert page_source["count"] == 3
+    assert page_source["received_bytes"] < len(source) * 3 / 5
+
+
+class FlakyHub(BaseHTTPRequestHandler):
+    """Answers 503 to the first request of each path."""
+    protocol_version = "HTTP/1.1"
+    seen: dict = {}
+
+    def _answer(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        attempts = self.seen[self.path] = self.seen.get(self.path, 0) + 1
+        status = 503 if attempts == 1 else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    do_GET = do_POST = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+def test_only_idempotent_commands_are_retried():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    timings = NetworkTimings()
+    transport = Transport(backoff=0, timings=timings)
+    transport.connection(url)
+    try:
+        assert transport.request("GET", f"{url}/session/1/source").status == 200
+        assert transport.request("POST", f"{url}/session/1/element/2/click", body="{}").status == 503
+        assert transport.request("POST", f"{url}/session", body="{}").status == 503
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert [(r.command, r.status, r.attempts) for r in timings.by_test["<no test>"]] == [
+        ("GET /session/{id}/source", 200, 2),
+        ("POST /session/{id}/element/{id}/click", 503, 1),
+        ("POST /session", 503, 1),
+    ]
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+from selenium.common import NoSuchElementException, TimeoutException
+
+from pages.login_page import LoginPage
+from utils.wait_engine import WaitRecord, WaitTimings, poll_intervals, timings, wait_until
+
+
+class MissingElementDriver:
+    def __init__(self):
+        self.lookups = 0
+
+    def find_element(self, by, value):
+        self.lookups += 1
+        raise NoSuchElementException(value)
+
+
+def test_poll_interval_grows_up_to_the_cap():
+    intervals = poll_intervals(initial=0.1, maximum=0.5, factor=2)
+    assert [next(intervals) for _ in range(5)] == [0.1, 0.2, 0.4, 0.5, 0.5]
+
+
+def test_is_visible_honors_its_timeout_and_records_the_wait():
+    timings.start_test("test_is_visible_honors_its_timeout")
+    driver = MissingElementDriver()
+
+    started = time.monotonic()
+    assert LoginPage(driver).is_visible(LoginPage.SIGN_IN_BUTTON_ONBOARDING, timeout=0.5) is False
+    assert time.monotonic() - started < 1.5
+
+    record = timings.test_report("test_is_visible_honors_its_timeout")["records"][-1]
+    assert record["timed_out"] is True
+    assert record["locator"] == "Sign in"
+    assert record["attempts"] == driver.lookups > 1
+
+
+def test_slowest_locators_are_aggregated_across_tests():
+    recorder = WaitTimings()
+    for test, seconds, timed_out in (("a", 0.2, False), ("b", 3.0, True)):
+        recorder.start_test(test)
+        recorder.record(WaitRecord(("id", "email"), "visible", 2, seconds, timed_out, 3))
+        recorder.record(WaitRecord(("id", "title"), "visible", 1, 0.1, False, 3))
+
+    slowest = recorder.slowest_locators()
+    assert slowest[0]["locator"] == "email"
+    assert (slowest[0]["waits"], slowest[0]["timeouts"], slowest[0]["max_seconds"]) == (2, 1, 3.0)
+
+
+def test_wait_until_raises_after_the_timeout():
+    with pytest.raises(TimeoutException):
+        wait_until(MissingElementDriver(), lambda d: d.find_element("id", "x"), timeout=0, locator=("id", "x"))
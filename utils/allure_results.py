@@ -0,0 +1,126 @@
+"""Add attachments to Allure results after the test has finished.
+
+Some artifacts (AI analyses, encoded screenshots) are produced in the
+background and are only ready at the end of the run, when the Allure
+result files are already on disk. A test is tagged with a unique
+`result_ref` label while it runs; `ResultIndex` later finds its result
+file by that label and appends the attachment to it.
+
+`update_environment` maintains `environment.properties`, the Environment
+widget of the report. Several processes write to the same results
+directory (the units of a pool worker, then the merge of the workers), so
+keys are merged instead of appended: counters passed as `add` (registered
+in `ENVIRONMENT_COUNTERS`) are summed over the run, every other value
+replaces the one already there. `reset_counters` starts a run's counters
+from zero.
+"""
+import json
+import os
+import uuid
+
+import allure
+
+REF_LABEL = "result_ref"
+ENVIRONMENT_FILE = "environment.properties"
+# Keys of environment.properties summed over the processes and workers of a run
+ENVIRONMENT_COUNTERS = ("AI.analysis.cache.hits", "AI.analysis.cache.misses")
+
+
+def tag_current_result() -> str:
+    """Label the running test's Allure result with a fresh reference and return it."""
+    ref = uuid.uuid4().hex
+    allure.dynamic.label(REF_LABEL, ref)
+    return ref
+
+
+def read_environment(report_dir: str) -> dict[str, str]:
+    """Properties of `environment.properties` in `report_dir`; empty if there is none."""
+    properties: dict[str, str] = {}
+    try:
+        with open(os.path.join(report_dir, ENVIRONMENT_FILE), encoding="utf-8") as f:
+            for line in f:
+                key, sep, value = line.rstrip("\n").partition("=")
+                if sep:
+                    properties[key] = value
+    except FileNotFoundError:
+        pass
+    return properties
+
+
+def update_environment(report_dir: str, properties: dict | None = None, add: dict | None = None):
+    """Merge into `environment.properties`, one line per key.
+
+    :param properties: Values that replace those already there.
+    :param add: Counters added to the values already there.
+    """
+    merged = read_environment(report_dir)
+    merged.update((key, str(value)) for key, value in (properties or {}).items())
+    for key, count in (add or {}).items():
+        previous = merged.get(key, "0")
+        merged[key] = str(int(count) + (int(previous) if previous.isdigit() else 0))
+    _write_environment(report_dir, merged)
+
+
+def reset_counters(report_dir: str):
+    """Drop the `ENVIRONMENT_COUNTERS` an earlier run left in `report_dir`."""
+    properties = read_environment(report_dir)
+    if any(key in properties for key in ENVIRONMENT_COUNTERS):
+        _write_environment(report_dir, {k: v for k, v in properties.items() if k not in ENVIRONMENT_COUNTERS})
+
+
+def _write_environment(report_dir: str, properties: dict):
+    os.makedirs(report_dir, exist_ok=True)
+    tmp_path = os.path.join(report_dir, f"{ENVIRONMENT_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(f"{key}={value}\n" for key, value in properties.items())
+    os.replace(tmp_path, os.path.join(report_dir, ENVIRONMENT_FILE))
+
+
+class ResultIndex:
+    """Maps `result_ref` labels to the result files in an Allure results directory."""
+
+    def __init__(self, report_dir: str):
+        self.report_dir = report_dir
+        self._paths: dict[str, str] = {}
+        if not os.path.isdir(report_dir):
+            return
+        for file_name in os.listdir(report_dir):
+            if not file_name.endswith("-result.json"):
+                continue
+            path = os.path.join(report_dir, file_name)
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+            for label in result.get("labels", []):
+                if label.get("name") == REF_LABEL:
+                    self._paths[label["value"]] = path
+
+    def __contains__(self, ref: str) -> bool:
+        return ref in self._paths
+
+    def write_attachment(self, body: str | bytes, attachment_type) -> str:
+        """Write an attachment file and return its source name (without linking it to any result)."""
+        source = f"{uuid.uuid4()}-attachment.{attachment_type.extension}"
+        mode, encoding = ("wb", None) if isinstance(body, bytes) else ("w", "utf-8")
+        with open(os.path.join(self.report_dir, source), mode, encoding=encoding) as f:
+            f.write(body)
+        return source
+
+    def link(self, ref: str, name: str, source: str, attachment_type) -> bool:
+        """Append an existing attachment file to the result tagged with `ref`."""
+        path = self._paths.get(ref)
+        if path is None:
+            return False
+        with open(path, encoding="utf-8") as f:
+            result = json.load(f)
+        result.setdefault("attachments", []).append(
+            {"name": name, "source": source, "type": attachment_type.mime_type}
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return True
+
+    def attach(self, ref: str, name: str, body: str | bytes, attachment_type) -> bool:
+        """Write the attachment and link it to the result tagged with `ref`."""
+        if ref not in self._paths:
+            return False
+        return self.link(ref, name, self.write_attachment(body, attachment_type), attachment_type)
@@ -0,0 +1,61 @@
+"""On-disk cache of AI failure analyses, keyed by failure signature.
+
+One JSON file per signature, so parallel pytest workers can share the
+cache without locking. Entries expire after `ttl_seconds`, and the oldest
+entries are evicted once the cache holds more than `max_entries`. The
+directory is created with the first stored analysis.
+"""
+import json
+import os
+import time
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".analysis_cache")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+
+
+class AnalysisCache:
+    def __init__(self, path: str = CACHE_DIR, ttl_seconds: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    def get(self, key: str) -> str | None:
+        """Cached analysis for the signature key, or None if missing or expired."""
+        try:
+            with open(self._file(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl_seconds:
+            self._remove(key)
+            return None
+        return entry.get("analysis")
+
+    def put(self, key: str, analysis: str, signature=None):
+        """Store an analysis and evict the oldest entries above `max_entries`."""
+        entry = {"created": time.time(), "analysis": analysis, "signature": repr(signature) if signature else None}
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self._file(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._file(key))
+        self.evict()
+
+    def evict(self):
+        files = [name for name in os.listdir(self.path) if name.endswith(".json")]
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda name: os.path.getmtime(os.path.join(self.path, name)))
+        for name in files[:len(files) - self.max_entries]:
+            self._remove(name[:-len(".json")])
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
@@ -0,0 +1,137 @@
+"""Background AI analysis of test failures.
+
+The report hook only enqueues the failure; a small thread pool sharing one
+analyzer client does the LLM round-trips while the run continues, and the
+results are attached to the Allure results once the session ends.
+
+Failures with the same signature (see `utils.failure_signature`) share one
+analysis: within a run through the in-flight table, across runs through
+the on-disk `AnalysisCache`.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+import allure
+
+from utils.allure_results import ResultIndex, update_environment
+from utils.analysis_cache import AnalysisCache
+from utils.gemini_analyzer import ERROR_PREFIXES, GeminiAnalyzer
+
+MAX_LOG_CHARS = 2000  # token limit
+
+
+class AnalysisJob:
+    """One queued failure and, once done, its analysis."""
+
+    def __init__(self, ref: str, node_id: str, error_log: str, future, signature=None, source: str = "fresh"):
+        self.ref = ref
+        self.node_id = node_id
+        self.error_log = error_log
+        self.future = future
+        self.signature = signature
+        self.source = source  # "fresh", "shared" (same signature earlier in this run) or "cache"
+
+
+class FailureAnalysisPipeline:
+    """Bounded worker pool that analyzes failures off the test thread.
+
+    :param analyzer_factory: Builds the shared analyzer (anything with
+        `analyze(error_log) -> str`); called once, on first use.
+    :param max_workers: Maximum concurrent analyses.
+    :param cache: Persistent cache of analyses by failure signature, or None.
+    """
+
+    def __init__(self, analyzer_factory=GeminiAnalyzer, max_workers: int = 2, cache: AnalysisCache | None = None):
+        self.analyzer_factory = analyzer_factory
+        self.cache = cache
+        self._analyzer = None
+        self._analyzer_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-analysis")
+        self._by_signature: dict[str, Future] = {}
+        self.jobs: list[AnalysisJob] = []
+
+    @property
+    def analyzer(self):
+        with self._analyzer_lock:
+            if self._analyzer is None:
+                self._analyzer = self.analyzer_factory()
+            return self._analyzer
+
+    def submit(self, ref: str, node_id: str, error_log: str, signature=None) -> AnalysisJob:
+        """Queue a failure for analysis and return immediately.
+
+        :param signature: `FailureSignature` of the failure; repeats reuse the earlier analysis.
+        """
+        error_log = error_log[:MAX_LOG_CHARS]
+        key = signature.key if signature is not None else None
+
+        if key in self._by_signature:
+            future, source = self._by_signature[key], "shared"
+        elif key and self.cache and (cached := self.cache.get(key)) is not None:
+            future, source = Future(), "cache"
+            future.set_result(cached)
+        else:
+            future, source = self._executor.submit(self._analyze, error_log, signature), "fresh"
+        if key:
+            self._by_signature[key] = future
+
+        job = AnalysisJob(ref, node_id, error_log, future, signature, source)
+        self.jobs.append(job)
+        return job
+
+    def _analyze(self, error_log: str, signature=None) -> str:
+        analysis = self.analyzer.analyze(error_log)
+        if self.cache and signature is not None and not analysis.startswith(ERROR_PREFIXES):
+            self.cache.put(signature.key, analysis, signature)
+        return analysis
+
+    @property
+    def hits(self) -> int:
+        """Failures that did not need an LLM call of their own."""
+        return sum(job.source != "fresh" for job in self.jobs)
+
+    @property
+    def misses(self) -> int:
+        return sum(job.source == "fresh" for job in self.jobs)
+
+    def cache_summary(self) -> str:
+        shared = sum(job.source == "shared" for job in self.jobs)
+        return f"{self.hits} hits ({self.hits - shared} from cache, {shared} shared in this run), {self.misses} misses"
+
+    def finish(self, report_dir: str | None, timeout: float | None = 120) -> int:
+        """Wait for the queued analyses and attach them to the Allure results.
+
+        :param report_dir: Allure results directory; nothing is attached if None.
+        :param timeout: Seconds to wait for unfinished analyses before giving up on them.
+        :return: Number of analyses attached.
+        """
+        wait([job.future for job in self.jobs], timeout=timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if not report_dir:
+            return 0
+
+        index = ResultIndex(report_dir)
+        attached = 0
+        for job in self.jobs:
+            name, body = self._attachment_for(job)
+            if job.signature is not None:
+                body += f"\n\n---\nFailure signature: {job.signature.key[:12]} ({job.source})"
+            if index.attach(job.ref, name, body, allure.attachment_type.TEXT):
+                attached += 1
+        self._write_environment(report_dir)
+        return attached
+
+    def _write_environment(self, report_dir: str):
+        """Show cache hits/misses in the Environment widget of the Allure report, summed over the run's processes."""
+        update_environment(report_dir, add={"AI.analysis.cache.hits": self.hits, "AI.analysis.cache.misses": self.misses})
+
+    @staticmethod
+    def _attachment_for(job: AnalysisJob) -> tuple[str, str]:
+        if not job.future.done():
+            return "⚠️ AI Analysis Skipped", "Gemini analysis did not finish before the end of the run."
+        exc = job.future.exception()
+        if isinstance(exc, EnvironmentError):
+            return "⚠️ AI Analysis Skipped", f"Gemini analysis skipped: {exc}\nSet GEMINI_API_KEY environment variable."
+        if exc is not None:
+            return "⚠️ AI Analysis Error", f"Gemini analysis failed: {exc}\nOriginal error: {job.error_log}"
+        return "🤖 AI Failure Analysis (Gemini)", job.future.result()
@@ -0,0 +1,587 @@
+"""Benchmarks of the framework's own overhead, without a device.
+
+Every benchmark drives the real page objects, waits, fixtures and hooks
+against the scripted app of `utils.mock_appium`, so what is measured is the
+time and memory the framework adds on top of the device:
+
+    python -m utils.benchmark                      # all benchmarks: p50/p95/p99 and allocations
+    python -m utils.benchmark -k waits --quick     # a subset, a tenth of the iterations
+    python -m utils.benchmark --save-baseline      # store the results in .benchmarks/baseline.json
+    python -m utils.benchmark --compare            # flag regressions against it (exit code 1)
+
+Per-call benchmarks time each call with `perf_counter_ns` after a warm-up,
+then repeat a shorter pass under `tracemalloc`: `peak` is the median memory
+one call had allocated at its high point, `retained` what a call left behind
+on average. Per-item benchmarks (a generated pytest suite) report one sample
+per test; their `peak` covers the whole run. Benchmarks on the scripted app
+also report `cmds`, the Appium commands one call sends.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pytest
+from appium import webdriver
+from appium.options.common import AppiumOptions
+
+from pages.base_page import BasePage
+from pages.bottom_tabs import BottomTabs
+from pages.login_page import LoginPage
+from pages.registry import pages_for
+from utils.common_utilis import assert_equal
+from utils.mock_appium import MockAppium, MockAppiumServer, Network, Scenario, in_process_driver, load_scenario
+from utils.page_source import PageSnapshot
+from utils.session_pool import SessionPool
+from utils.tracing import Tracer, instrument_driver, instrument_pages, restore
+from utils.transport import NetworkTimings, Transport
+from utils.wait_engine import wait_until
+
+BASELINE_DIR = ".benchmarks"
+QUICK_FACTOR = 0.1
+
+
+class Benchmark:
+    """A registered benchmark; see `benchmark`."""
+
+    def __init__(self, name: str, func, iterations: int, size: int | None, per_item: bool):
+        self.name = name
+        self.func = func
+        self.iterations = iterations
+        self.size = size
+        self.per_item = per_item
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, iterations: int = 500, size: int | None = None, per_item: bool = False):
+    """Register a generator function that sets up, yields the operation to measure, then tears down.
+
+    :param size: Problem size passed to the function (scaled down by --quick).
+    :param per_item: The operation returns its own samples, `{suffix: [ns, ...]}`,
+        instead of being timed call by call.
+
+    The function may yield `(op, commands)` instead, where `commands()` is the
+    number of commands the mock server has handled so far.
+    """
+    def register(func):
+        BENCHMARKS[name] = Benchmark(name, func, iterations, size, per_item)
+        return func
+    return register
+
+
+class Result:
+    """Latency samples (ns) and allocations of one benchmark."""
+
+    def __init__(self, name: str, samples: list[int], peak_bytes: int, retained_bytes: int,
+                 commands: float | None = None):
+        self.name = name
+        self.samples = sorted(samples)
+        self.peak_bytes = peak_bytes
+        self.retained_bytes = retained_bytes
+        self.commands = commands
+
+    def stats(self) -> dict:
+        return {
+            "n": len(self.samples),
+            "p50_us": percentile(self.samples, 50) / 1000,
+            "p95_us": percentile(self.samples, 95) / 1000,
+            "p99_us": percentile(self.samples, 99) / 1000,
+            "mean_us": statistics.fmean(self.samples) / 1000 if self.samples else 0.0,
+            "peak_bytes": self.peak_bytes,
+            "retained_bytes": self.retained_bytes,
+            "commands": self.commands,
+        }
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Linearly interpolated percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _allocations(op, calls: int) -> tuple[int, int]:
+    """(median peak of one call, average bytes retained per call), measured under tracemalloc."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        for _ in range(calls):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            op()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return int(statistics.median(peaks)), (end - start) // calls
+
+
+def run(bench: Benchmark, quick: bool = False) -> list[Result]:
+    """Run one benchmark: a single result, or one per sample series of a per-item benchmark."""
+    factor = QUICK_FACTOR if quick else 1.0
+    scenario = bench.func(max(1, int(bench.size * factor))) if bench.size is not None else bench.func()
+    op = next(scenario)
+    op, commands = op if isinstance(op, tuple) else (op, None)
+    try:
+        if bench.per_item:
+            series = op()
+            peak, retained = _allocations(op, 1)
+            items = max(len(samples) for samples in series.values())
+            return [Result(f"{bench.name}.{suffix}", samples, peak, retained // items)
+                    for suffix, samples in series.items()]
+
+        iterations = max(10, int(bench.iterations * factor))
+        for _ in range(max(3, iterations // 10)):
+            op()
+        samples = []
+        sent = commands() if commands else 0
+        for _ in range(iterations):
+            started = time.perf_counter_ns()
+            op()
+            samples.append(time.perf_counter_ns() - started)
+        per_call = (commands() - sent) / iterations if commands else None
+        peak, retained = _allocations(op, min(iterations, 100))
+        return [Result(bench.name, samples, peak, retained, per_call)]
+    finally:
+        scenario.close()
+
+
+# --- Baselines ---
+def save_baseline(results: dict[str, dict], name: str = "baseline", directory: str = BASELINE_DIR) -> str:
+    """Store `{benchmark: stats}` as `<directory>/<name>.json`; returns the path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2)
+    return path
+
+
+def load_baseline(name: str = "baseline", directory: str = BASELINE_DIR) -> dict[str, dict]:
+    path = os.path.join(directory, f"{name}.json")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No baseline '{name}' in {directory}/ (create one with --save-baseline)")
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+# Below these absolute differences a change is noise, whatever the ratio
+NOISE_FLOOR = {"p50_us": 2.0, "p95_us": 5.0, "peak_bytes": 1024, "commands": 0.5}
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float = 0.25) -> list[tuple]:
+    """Regressions as `(benchmark, metric, baseline value, new value)`.
+
+    A metric regresses when it grew by more than `tolerance` (relative) and
+    by more than its noise floor (absolute).
+    """
+    regressions = []
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for metric, floor in NOISE_FLOOR.items():
+            if stats.get(metric) is None or old.get(metric) is None:
+                continue
+            if stats[metric] > old[metric] * (1 + tolerance) and stats[metric] - old[metric] > floor:
+                regressions.append((name, metric, old[metric], stats[metric]))
+    return regressions
+
+
+def _duration(us: float) -> str:
+    if us >= 1000:
+        return f"{us / 1000:.2f}ms"
+    return f"{us:.1f}us"
+
+
+def _size(size: float) -> str:
+    return f"{size / 1024:.1f}K" if abs(size) >= 1024 else f"{int(size)}B"
+
+
+def format_results(results: dict[str, dict], baseline: dict[str, dict] | None = None) -> str:
+    """Text table of the results; with a baseline, the p50 change is shown too."""
+    header = (f"{'benchmark':<40} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'peak':>8} {'retained':>9} "
+              f"{'cmds':>5}")
+    lines = [header + ("   p50 vs baseline" if baseline else ""), "-" * len(header)]
+    for name, stats in results.items():
+        line = (f"{name:<40} {stats['n']:>6} {_duration(stats['p50_us']):>9} {_duration(stats['p95_us']):>9} "
+                f"{_duration(stats['p99_us']):>9} {_size(stats['peak_bytes']):>8} {_size(stats['retained_bytes']):>9} "
+                f"{'-' if stats.get('commands') is None else format(stats['commands'], '.1f'):>5}")
+        old = (baseline or {}).get(name)
+        if old and old["p50_us"]:
+            line += f"   {(stats['p50_us'] / old['p50_us'] - 1) * 100:+.0f}%"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# --- Scenarios ---
+def _driver(scenario: Scenario | None = None, deep_link: str | None = None):
+    driver = in_process_driver(MockAppium(scenario or load_scenario()))
+    if deep_link:
+        driver.execute_script("mobile: deepLink", {"url": deep_link})
+    return driver
+
+
+@benchmark("fixtures.session_open_quit", iterations=300)
+def session_open_quit():
+    """`driver` fixture without the session pool: a new session per test class."""
+    app = MockAppium(load_scenario())
+    yield lambda: in_process_driver(app).quit()
+
+
+@benchmark("fixtures.session_pool_reuse", iterations=300)
+def session_pool_reuse():
+    """`driver` fixture with the session pool: acquire (health check + app relaunch) and release."""
+    app = MockAppium(load_scenario())
+    pool = SessionPool(lambda url, caps: in_process_driver(app, caps), max_uses=10**9, app_id="com.example.mobileapp")
+    caps = {"platformName": "Android"}
+    yield lambda: pool.release(pool.acquire("in-process", caps))
+    pool.close()
+
+
+@benchmark("fixtures.app_pages", iterations=5000)
+def app_pages():
+    """`app` fixture: the cached page objects of the session."""
+    driver = _driver()
+
+    def op():
+        app = pages_for(driver)
+        return app.login, app.bottom
+    yield op
+    driver.quit()
+
+
+@benchmark("waits.wait_until", iterations=5000)
+def raw_wait():
+    """The wait engine around a condition that holds at once."""
+    driver = _driver()
+    yield lambda: wait_until(driver, lambda _driver: True, 1, ("id", "x"), "benchmark")
+    driver.quit()
+
+
+@benchmark("waits.find", iterations=2000)
+def page_find():
+    driver = _driver()
+    login = LoginPage(driver)
+    yield lambda: login.find(login.SIGN_IN_BUTTON_ONBOARDING)
+    driver.quit()
+
+
+@benchmark("waits.is_visible_hit", iterations=2000)
+def is_visible_hit():
+    driver = _driver()
+    login = LoginPage(driver)
+    yield lambda: login.is_visible(login.SIGN_IN_BUTTON_ONBOARDING)
+    driver.quit()
+
+
+@benchmark("waits.is_visible_miss", iterations=2000)
+def is_visible_miss():
+    """A negative check that does not wait (timeout=0)."""
+    driver = _driver()
+    login = LoginPage(driver)
+    yield lambda: login.is_visible(login.EMAIL_INPUT, timeout=0)
+    driver.quit()
+
+
+@benchmark("waits.is_visible_snapshot", iterations=5000)
+def is_visible_snapshot():
+    """--page-snapshots: answered from the cached page source."""
+    driver = _driver()
+    login = LoginPage(driver, use_snapshot=True)
+    yield lambda: login.is_visible(login.SIGN_IN_BUTTON_ONBOARDING)
+    driver.quit()
+
+
+@benchmark("waits.are_visible_tabs", iterations=1000)
+def are_visible_tabs():
+    driver = _driver(deep_link="mobileapp://home")
+    yield BottomTabs(driver).verify_bottom_tabs_visible
+    driver.quit()
+
+
+def _signin(batch: bool = False):
+    app = MockAppium(load_scenario())
+    driver = in_process_driver(app)
+    driver.execute_script("mobile: deepLink", {"url": "mobileapp://signin"})
+    login = LoginPage(driver)
+    login.batch_actions = batch
+    return app, driver, login
+
+
+@benchmark("actions.type_text", iterations=1000)
+def type_text():
+    app, driver, login = _signin()
+    yield lambda: login.type_text(login.EMAIL_INPUT, "user@example.com"), lambda: app.commands
+    driver.quit()
+
+
+@benchmark("actions.login.separate_calls", iterations=500)
+def login_separate_calls():
+    """login() as one wait/find per call and clear + send keys per field (before composite actions)."""
+    app, driver, login = _signin()
+
+    def op():
+        for locator, text in ((login.EMAIL_INPUT, "user@example.com"), (login.PASSWORD_INPUT, "wrong")):
+            login.find(locator).clear()
+            login.find(locator).send_keys(text)
+        login.click(login.LOGIN_BUTTON)
+    yield op, lambda: app.commands
+    driver.quit()
+
+
+@benchmark("actions.login.pipelined", iterations=500)
+def login_pipelined():
+    """login() finding each element once and replacing field values in one command each."""
+    app, driver, login = _signin()
+    yield lambda: login.login("user@example.com", "wrong"), lambda: app.commands
+    driver.quit()
+
+
+@benchmark("actions.login.batched", iterations=500)
+def login_batched():
+    """login() sent as a single execute-driver script."""
+    app, driver, login = _signin(batch=True)
+    yield lambda: login.login("user@example.com", "wrong"), lambda: app.commands
+    driver.quit()
+
+
+@benchmark("actions.click", iterations=1000)
+def click():
+    app, driver, login = _signin()
+    yield lambda: login.click(login.LOGIN_BUTTON), lambda: app.commands
+    driver.quit()
+
+
+@benchmark("tracing.span", iterations=20000)
+def trace_span():
+    """One span recorded and (in batches) written to a Chrome trace file."""
+    directory = tempfile.mkdtemp(prefix="trace-bench-")
+    tracer = Tracer(os.path.join(directory, "trace.json"))
+
+    def op():
+        with tracer.span("LoginPage.login", "page"):
+            pass
+    yield op
+    tracer.close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@benchmark("tracing.find_traced", iterations=2000)
+def find_traced():
+    """`waits.find` with the page object and its driver commands traced."""
+    directory = tempfile.mkdtemp(prefix="trace-bench-")
+    tracer = Tracer(os.path.join(directory, "trace.json"))
+    patched = instrument_pages(tracer, [BasePage], skip=("native", "actions")) + instrument_driver(tracer)
+    driver = _driver()
+    login = LoginPage(driver)
+    yield lambda: login.find(login.SIGN_IN_BUTTON_ONBOARDING)
+    driver.quit()
+    restore(patched)
+    tracer.close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@benchmark("reporting.allure_assert", iterations=5000)
+def allure_assert():
+    """`utils.common_utilis` assertion wrapped in an Allure step."""
+    yield lambda: assert_equal(1, 1)
+
+
+def large_source(rows: int) -> str:
+    """A page source with `rows` list rows above the four bottom tabs."""
+    items = "".join(f'<android.widget.TextView text="Row {i}" resource-id="row_{i}" displayed="true"/>'
+                    for i in range(rows))
+    tabs = "".join(f'<android.widget.TextView text="{tab}" displayed="true"/>'
+                   for tab in ("Home", "Portfolio", "Markets", "More"))
+    return (f'<hierarchy><android.widget.FrameLayout displayed="true"><android.widget.ScrollView displayed="true">'
+            f'{items}</android.widget.ScrollView>{tabs}</android.widget.FrameLayout></hierarchy>')
+
+
+@benchmark("scaling.page_source_parse", iterations=50, size=10000)
+def page_source_parse(rows):
+    """Parsing and indexing a large page source into a `PageSnapshot`."""
+    source = large_source(rows)
+    yield lambda: PageSnapshot(source)
+
+
+@benchmark("scaling.are_visible_large", iterations=50, size=10000)
+def are_visible_large(rows):
+    """Bottom tabs checked on a screen with a large page source."""
+    driver = _driver(Scenario({"screens": {"list": large_source(rows)}}))
+    yield BottomTabs(driver).verify_bottom_tabs_visible
+    driver.quit()
+
+
+# A remote hub as seen from CI: 2ms per command, 20ms to open a connection, 5 MB/s
+REMOTE_NETWORK = {"latency": 0.002, "connect_latency": 0.02, "bandwidth": 5_000_000}
+
+
+def _over_http(pooled: bool, scenario: Scenario | None = None):
+    """(server on an emulated remote link, function opening a driver on the stock or the pooled transport)."""
+    server = MockAppiumServer(scenario or load_scenario(), network=Network(**REMOTE_NETWORK)).start()
+    transport = Transport(timings=NetworkTimings()) if pooled else None
+    options = AppiumOptions()
+    options.load_capabilities({"platformName": "Android"})
+    return server, lambda: webdriver.Remote(transport.connection(server.url) if transport else server.url,
+                                            options=options)
+
+
+def _sessions_over_http(pooled: bool):
+    server, open_driver = _over_http(pooled)
+    yield lambda: open_driver().quit()
+    server.stop()
+
+
+def _page_source_over_http(pooled: bool, rows: int):
+    server, open_driver = _over_http(pooled, Scenario({"screens": {"list": large_source(rows)}}))
+    driver = open_driver()
+    yield lambda: driver.page_source
+    driver.quit()
+    server.stop()
+
+
+@benchmark("transport.stock.session_open_quit", iterations=50)
+def stock_sessions():
+    """New session per driver on the client's own connection pool, over an emulated remote link."""
+    yield from _sessions_over_http(pooled=False)
+
+
+@benchmark("transport.pooled.session_open_quit", iterations=50)
+def pooled_sessions():
+    """New session per driver on the shared keep-alive transport, over an emulated remote link."""
+    yield from _sessions_over_http(pooled=True)
+
+
+@benchmark("transport.stock.page_source", iterations=50, size=10000)
+def stock_page_source(rows):
+    """Large page source, uncompressed, over an emulated remote link."""
+    yield from _page_source_over_http(False, rows)
+
+
+@benchmark("transport.pooled.page_source", iterations=50, size=10000)
+def pooled_page_source(rows):
+    """Large page source, gzip-compressed, over an emulated remote link."""
+    yield from _page_source_over_http(True, rows)
+
+
+SUITE_MODULE = '''import pytest
+
+
+class TestBench{index}:
+    @pytest.mark.parametrize("n", range({tests}))
+    def test_onboarding(self, app, n):
+        assert app.login.is_visible(app.login.SIGN_IN_BUTTON_ONBOARDING, timeout=0)
+'''
+
+
+class _TestTimer:
+    """pytest plugin timing each test's whole protocol and its report hooks (the framework plugins' hooks included)."""
+
+    def __init__(self):
+        self.per_test: list[int] = []
+        self.makereport: dict[str, int] = {}
+
+    @pytest.hookimpl(hookwrapper=True, tryfirst=True)
+    def pytest_runtest_protocol(self, item):
+        started = time.perf_counter_ns()
+        yield
+        self.per_test.append(time.perf_counter_ns() - started)
+
+    @pytest.hookimpl(hookwrapper=True, tryfirst=True)
+    def pytest_runtest_makereport(self, item):
+        started = time.perf_counter_ns()
+        yield
+        self.makereport[item.nodeid] = self.makereport.get(item.nodeid, 0) + time.perf_counter_ns() - started
+
+
+@benchmark("scaling.pytest_suite", size=1000, per_item=True)
+def pytest_suite(tests):
+    """A generated suite run in-process with this repo's conftest on --env=mock, 50 tests per class."""
+    directory = tempfile.mkdtemp(prefix="benchmark_suite_")
+    classes = max(1, tests // 50)
+    with open(os.path.join(directory, "test_benchmark_suite.py"), "w") as f:
+        f.write("\n\n".join(SUITE_MODULE.format(index=index, tests=tests // classes) for index in range(classes)))
+    ini = os.path.join(directory, "pytest.ini")
+    with open(ini, "w") as f:
+        f.write("[pytest]\n")
+
+    def op():
+        timer = _TestTimer()
+        args = [directory, "-c", ini, "--rootdir", directory, "-p", "tests.conftest", "-p", "no:cacheprovider",
+                "--env=mock", f"--alluredir={os.path.join(directory, 'allure')}", "-q", "-W", "ignore"]
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            code = pytest.main(args, plugins=[timer])
+        if code != 0:
+            raise RuntimeError(f"Benchmark suite failed (exit code {code}):\n{output.getvalue()[-2000:]}")
+        return {"per_test": timer.per_test, "makereport": list(timer.makereport.values())}
+    yield op
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the framework's overhead on an in-process stub driver.")
+    parser.add_argument("-k", dest="keyword", default=None, help="Only benchmarks whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="A tenth of the iterations and problem sizes")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    parser.add_argument("--save-baseline", nargs="?", const="baseline", default=None, metavar="NAME",
+                        help=f"Store the results as {BASELINE_DIR}/NAME.json (default name: baseline)")
+    parser.add_argument("--compare", nargs="?", const="baseline", default=None, metavar="NAME",
+                        help="Compare with a stored baseline; exit code 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Relative growth of p50/p95/peak counted as a regression (default: 0.25)")
+    parser.add_argument("--json", default=None, metavar="FILE", help="Also write the results to FILE")
+    args = parser.parse_args(argv)
+
+    selected = [bench for name, bench in BENCHMARKS.items() if not args.keyword or args.keyword in name]
+    if args.list:
+        for bench in selected:
+            summary = (bench.func.__doc__ or "").strip().split("\n")[0]
+            print(f"{bench.name:<40} {summary}")
+        return 0
+    baseline = load_baseline(args.compare) if args.compare else None
+
+    results: dict[str, dict] = {}
+    for bench in selected:
+        print(f"running {bench.name} ...", file=sys.stderr, flush=True)
+        for result in run(bench, quick=args.quick):
+            results[result.name] = result.stats()
+
+    print(format_results(results, baseline))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        print(f"\nBaseline saved to {save_baseline(results, args.save_baseline)}")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old:.1f} -> {new:.1f}")
+        if regressions:
+            return 1
+        print(f"\nNo regressions against baseline '{args.compare}' (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""Data-driven test cases and start-screen reuse between them.
+
+A case table is a JSONL file in `config/` with one case per line:
+
+    {"id": "invalid_email_format", "start": "signin", "page": "login",
+     "inputs": {"EMAIL_INPUT": "$invalid_user.wrongEmailFormat", "PASSWORD_INPUT": ""},
+     "submit": "LOGIN_BUTTON",
+     "visible": ["WRONG_EMAIL_FORMAT_MESSAGE", "REQUIRED_ERROR_MESSAGE"],
+     "texts": {"WRONG_EMAIL_FORMAT_MESSAGE": "INVALID_EMAIL_FORMAT"},
+     "message": "...", "story": "...", "severity": "normal", "description": "..."}
+
+Locator names refer to attributes of the page object, text names to
+`UIConstants`, and `$<user>.<field>` values to `DataProvider` users (resolved
+when the case runs). Cases are ordered by start screen, and `StartScreens`
+only navigates when the screen cannot be reused: after a passing case it
+clears the inputs instead, provided the messages that case produced are gone.
+What the driver shows is remembered per driver object; whoever resets the
+app or renews the session on that object calls `forget_screen`.
+"""
+import weakref
+
+import allure
+
+from pages.registry import discover
+from utils.constants import UIConstants
+from utils.settings import ConfigError, dataset
+
+REQUIRED_KEYS = ("id", "start", "inputs", "visible")
+# Inputs whose value never goes into a step name, matched in the locator name and the `$user.field` reference
+SECRET_WORDS = ("password", "secret", "token", "pin")
+
+
+class Case:
+    """One row of a case table."""
+
+    def __init__(self, record: dict):
+        self.id = record["id"]
+        self.start = record["start"]
+        self.page = record.get("page", "login")
+        self.inputs: dict = record["inputs"]
+        self.submit: str | None = record.get("submit")
+        self.visible: list[str] = record["visible"]
+        self.texts: dict = record.get("texts", {})
+        self.message = record.get("message", f"Expected messages of '{self.id}' are not visible!")
+        self.story = record.get("story")
+        self.severity = record.get("severity")
+        self.description = record.get("description")
+
+    def locator_names(self) -> list[str]:
+        return [*self.inputs, *([self.submit] if self.submit else []), *self.visible, *self.texts]
+
+    def __repr__(self):
+        return f"Case({self.id!r}, start={self.start!r})"
+
+
+def load_cases(path: str) -> list[Case]:
+    """Read and check a case table, grouped by start screen (table order within a group).
+
+    Locator and text names are checked against the page class and
+    `UIConstants`, so a typo fails at collection rather than on a device.
+    """
+    cases = [Case(record) for record in dataset(path, REQUIRED_KEYS)]
+    pages = discover()
+    for case in cases:
+        if case.page not in pages:
+            raise ConfigError(f"{path}: case '{case.id}' uses unknown page '{case.page}'")
+        unknown = [name for name in case.locator_names() if not isinstance(getattr(pages[case.page], name, None), tuple)]
+        unknown += [name for name in case.texts.values() if not hasattr(UIConstants, name)]
+        if unknown:
+            raise ConfigError(f"{path}: case '{case.id}' refers to unknown names: {', '.join(unknown)}")
+
+    first_seen = {}
+    for index, case in enumerate(cases):
+        first_seen.setdefault(case.start, index)
+    return sorted(cases, key=lambda case: first_seen[case.start])
+
+
+def report_case(case: Case):
+    """Give the case the title, story, severity and description the hand-written tests had in Allure."""
+    allure.dynamic.title(f"test_{case.id}")
+    if case.story:
+        allure.dynamic.story(case.story)
+    if case.severity:
+        allure.dynamic.severity(allure.severity_level[case.severity.upper()])
+    if case.description:
+        allure.dynamic.description(case.description)
+
+
+def shown_value(name: str, reference, value) -> str:
+    """How an input value appears in a step name: masked for passwords and other secrets."""
+    if not value:
+        return "(empty)"
+    if any(word in f"{name} {reference}".lower() for word in SECRET_WORDS):
+        return "***"
+    return str(value)
+
+
+def run_case(case: Case, app, data):
+    """Enter the inputs and submit (one composite action, one Allure step per field), then verify the expected messages and texts."""
+    page = getattr(app, case.page)
+    action = page.actions()
+    for name, reference in case.inputs.items():
+        value = data.resolve(reference)
+        step = f"Enter {name}: {shown_value(name, reference, value)}" if value else f"Clear {name}"
+        action.type(getattr(page, name), value, step=step)
+    if case.submit:
+        action.click(getattr(page, case.submit), step=f"Click on {case.submit}")
+    if action.steps:
+        action.perform()
+
+    with allure.step(f"Verify {', '.join(case.visible)}"):
+        page.verify_all_visible([getattr(page, name) for name in case.visible], case.message)
+        for name, text in case.texts.items():
+            page.verify_element_text(getattr(page, name), getattr(UIConstants, text))
+
+
+class StartScreen:
+    """How to reach a start screen from anywhere, and how to reset it in place.
+
+    :param title: Used in the Allure step, e.g. "Sign In screen".
+    :param navigate: Callable `(app)` bringing the app to the screen.
+    :param reset: Callable `(app)` clearing what a previous case left on the screen.
+    """
+
+    def __init__(self, title: str, navigate, reset):
+        self.title = title
+        self.navigate = navigate
+        self.reset = reset
+
+
+class _ScreenState:
+    def __init__(self):
+        self.current: str | None = None
+        self.leftovers: list = []  # locators the last case made visible
+
+
+_states: "weakref.WeakKeyDictionary[object, _ScreenState]" = weakref.WeakKeyDictionary()
+
+
+def forget_screen(driver):
+    """The app behind `driver` was reset or its session renewed: the next case navigates."""
+    _states.pop(driver, None)
+
+
+class StartScreens:
+    """Puts each case on its start screen, reusing the screen the previous case passed on.
+
+    The screen only counts as reusable after `finished` was called, i.e.
+    the previous case passed; a failing case always makes the next one
+    navigate.
+    """
+
+    def __init__(self, app, driver, screens: dict[str, StartScreen]):
+        self.app = app
+        self.screens = screens
+        self.state = _states.setdefault(driver, _ScreenState())
+        self.reused = False
+
+    def enter(self, name: str, page: str = "login"):
+        screen = self.screens[name]
+        with allure.step(f"Navigate to {screen.title}"):
+            self.reused = self.state.current == name and self._reset(screen, page)
+            if not self.reused:
+                screen.navigate(self.app)
+        self.state.current, self.state.leftovers = None, []
+
+    def _reset(self, screen: StartScreen, page: str) -> bool:
+        screen.reset(self.app)
+        if not self.state.leftovers:
+            return True
+        still_visible = getattr(self.app, page).are_visible(self.state.leftovers, timeout=0)
+        return not any(still_visible.values())
+
+    def finished(self, name: str, leftovers=()):
+        """The case passed and left the app on screen `name`, showing `leftovers`."""
+        self.state.current, self.state.leftovers = name, list(leftovers)
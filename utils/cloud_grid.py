@@ -0,0 +1,309 @@
+"""Parallel cloud-grid (BrowserStack) sessions within the account's parallel-session limit.
+
+An account runs a fixed number of sessions at a time. Beyond that, the hub
+queues new sessions for a while and then refuses them
+(`BROWSERSTACK_ALL_PARALLELS_IN_USE`). Workers past the limit therefore
+only turn test time into waiting and setup errors.
+
+`SessionSlots` is a counting semaphore shared by every worker process on
+the machine. It keeps one lock file per slot under `lockDir`, held with an
+OS file lock for as long as the session lives, so a crashed worker frees
+its slot. `CloudGrid.open_session` takes a slot and then creates the
+session, retrying hub refusals with exponential backoff until
+`queueTimeout`.
+
+The time a session waited, for a slot and for the hub, is recorded as the
+queue time of the test that needed it. It is kept apart from the session's
+creation time and from the test's own duration. Through
+`browserstack_executor:` scripts, each session is named after the test
+class it serves, annotated with every test it runs, and marked passed or
+failed when it is quit, or when a retry replaces it (`renew_session`).
+All workers of a run share one build name (`build_name`).
+"""
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import weakref
+
+from selenium.common import SessionNotCreatedException, WebDriverException
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BUILD_ENV = "BROWSERSTACK_BUILD_NAME"
+# How the hub says the account is at its limit
+_QUEUE_FULL = ("all_parallels_in_use", "queue_size_exceeded", "all parallel tests are currently in use")
+
+
+def is_queue_full(exc: WebDriverException) -> bool:
+    """Whether the hub refused a new session because every parallel session is in use."""
+    message = (exc.msg or "").lower()
+    return any(marker in message for marker in _QUEUE_FULL)
+
+
+def build_name(base: str) -> str:
+    """Build name of this run: `$BROWSERSTACK_BUILD_NAME` (set once by `run_tests.py` for all its workers), else `base`."""
+    return os.getenv(BUILD_ENV) or base
+
+
+def browserstack_executor(driver, action: str, **arguments):
+    """Run a BrowserStack session action (setSessionName, setSessionStatus, annotate); a failure is only logged."""
+    try:
+        driver.execute_script("browserstack_executor: " + json.dumps({"action": action, "arguments": arguments}))
+    except WebDriverException as exc:
+        print(f"BrowserStack {action} failed: {exc.msg}")
+
+
+def default_lock_dir(account: str = "") -> str:
+    """Slot directory per account, in the system temp directory so concurrent runs on the machine share it."""
+    digest = hashlib.sha1(account.encode()).hexdigest()[:10]
+    return os.path.join(tempfile.gettempdir(), f"cloud-grid-{digest}")
+
+
+# --- Slots ---
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+class Slot:
+    """One held session slot; the lock is dropped on `release` or when the process dies."""
+
+    def __init__(self, index: int, fd: int):
+        self.index = index
+        self._fd: int | None = fd
+
+    def release(self):
+        if self._fd is None:
+            return
+        if fcntl is None:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = None
+
+
+class SessionSlots:
+    """Counting semaphore over `limit` lock files, shared by every process using the same `lock_dir`.
+
+    :param poll: Seconds between attempts while every slot is taken.
+    """
+
+    def __init__(self, limit: int, lock_dir: str, poll: float = 0.2):
+        if limit < 1:
+            raise ValueError(f"Session slot limit must be at least 1, got {limit}")
+        self.limit = limit
+        self.lock_dir = lock_dir
+        self.poll = poll
+        os.makedirs(lock_dir, exist_ok=True)
+
+    def try_acquire(self) -> Slot | None:
+        # Start at a random slot so waiting workers do not all contend for slot 0
+        start = random.randrange(self.limit)
+        for offset in range(self.limit):
+            index = (start + offset) % self.limit
+            fd = os.open(os.path.join(self.lock_dir, f"slot-{index}.lock"), os.O_RDWR | os.O_CREAT, 0o666)
+            if _try_lock(fd):
+                return Slot(index, fd)
+            os.close(fd)
+        return None
+
+    def acquire(self, timeout: float) -> Slot:
+        """Wait up to `timeout` seconds for a free slot."""
+        deadline = time.monotonic() + timeout
+        while True:
+            slot = self.try_acquire()
+            if slot is not None:
+                return slot
+            if time.monotonic() >= deadline:
+                raise SessionNotCreatedException(
+                    f"All {self.limit} cloud session slots were still in use after {timeout:.0f}s ({self.lock_dir})"
+                )
+            time.sleep(self.poll)
+
+
+# --- Sessions ---
+class GridSession:
+    """How one cloud session was obtained."""
+
+    def __init__(self, test: str | None, slot: int | None, queued: float, created: float, attempts: int):
+        self.test = test
+        self.slot = slot
+        self.queued = queued  # seconds waiting for a slot and for the hub
+        self.created = created  # seconds of the successful session request
+        self.attempts = attempts
+
+    def to_dict(self) -> dict:
+        return {
+            "test": self.test,
+            "slot": self.slot,
+            "queued_s": self.queued,
+            "created_s": self.created,
+            "attempts": self.attempts,
+        }
+
+
+class CloudGrid:
+    """Opens and closes cloud sessions within the account's limit (see module docstring).
+
+    :param factory: Callable `(remote_url, caps) -> driver` that opens a session.
+    :param max_sessions: Parallel sessions of the account; 0 leaves the limiting to the hub.
+    :param lock_dir: Directory of the slot lock files, shared by all workers on the machine.
+    :param queue_timeout: Seconds a session may wait for a slot and the hub before the setup fails.
+    :param backoff: First wait after the hub refused a session; doubled up to `max_backoff`.
+    """
+
+    def __init__(self, factory, max_sessions: int = 0, lock_dir: str | None = None, queue_timeout: float = 600.0,
+                 backoff: float = 5.0, max_backoff: float = 60.0):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.slots = SessionSlots(max_sessions, lock_dir or default_lock_dir()) if max_sessions else None
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.current_test: str | None = None
+        self.sessions: list[GridSession] = []
+        self.queued_by_test: dict[str, float] = {}
+        self.refused = 0
+        self._slots: "weakref.WeakKeyDictionary[object, Slot]" = weakref.WeakKeyDictionary()
+        self._failed: "weakref.WeakKeyDictionary[object, list[str]]" = weakref.WeakKeyDictionary()
+        self._names: "weakref.WeakKeyDictionary[object, str]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, factory, section) -> "CloudGrid":
+        """Build from the `browserstack` section of config.json."""
+        user = os.getenv("BROWSERSTACK_USERNAME", section.get("user", ""))
+        return cls(
+            factory,
+            max_sessions=section.get("maxParallelSessions", 0),
+            lock_dir=section.get("lockDir") or default_lock_dir(user),
+            queue_timeout=section.get("queueTimeout", 600.0),
+            backoff=section.get("backoff", 5.0),
+            max_backoff=section.get("maxBackoff", 60.0),
+        )
+
+    def start_test(self, node_id: str):
+        """The test a session opened from now on is queued for."""
+        self.current_test = node_id
+
+    def open_session(self, remote_url: str, caps: dict):
+        """Take a slot, then open a session, retrying while the hub says all parallel sessions are in use."""
+        started = time.monotonic()
+        slot = self.slots.acquire(self.queue_timeout) if self.slots is not None else None
+        try:
+            driver, requested, attempts = self._request(lambda: self.factory(remote_url, caps), started)
+        except BaseException:
+            if slot is not None:
+                slot.release()
+            raise
+        if slot is not None:
+            self._slots[driver] = slot
+        self._opened(driver, started, requested, attempts)
+        return driver
+
+    def renew_session(self, driver, renew):
+        """Replace the driver's broken session through `renew(driver)`, e.g. `utils.session_pool.renew_session`.
+
+        The old session is marked passed or failed as on `quit`, and the new
+        one keeps the slot and the name and starts with no failed tests. Hub
+        refusals are retried as in `open_session`.
+        """
+        self._set_status(driver)
+        started = time.monotonic()
+        _, requested, attempts = self._request(lambda: renew(driver), started)
+        self._opened(driver, started, requested, attempts)
+        if driver in self._names:
+            self.name_session(driver, self._names[driver])
+
+    def _request(self, create, started: float) -> tuple:
+        """Call `create()` until the hub takes the session; returns its result, when it was sent and the attempts."""
+        deadline = started + self.queue_timeout
+        delay, attempts = self.backoff, 0
+        while True:
+            attempts += 1
+            requested = time.monotonic()
+            try:
+                return create(), requested, attempts
+            except WebDriverException as exc:
+                if not is_queue_full(exc) or time.monotonic() + delay > deadline:
+                    raise
+                with self._lock:
+                    self.refused += 1
+                # Jittered, so workers refused together do not all come back together
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                delay = min(delay * 2, self.max_backoff)
+
+    def _opened(self, driver, started: float, requested: float, attempts: int):
+        slot = self._slots.get(driver)
+        session = GridSession(self.current_test, slot.index if slot is not None else None,
+                              round(requested - started, 3), round(time.monotonic() - requested, 3), attempts)
+        with self._lock:
+            self.sessions.append(session)
+            if session.test is not None:
+                self.queued_by_test[session.test] = self.queued_by_test.get(session.test, 0.0) + session.queued
+        self._failed[driver] = []
+
+    def name_session(self, driver, name: str):
+        """Name the session after the test class it now serves (a pooled session serves several)."""
+        self._names[driver] = name
+        browserstack_executor(driver, "setSessionName", name=name)
+
+    def annotate_test(self, driver, node_id: str):
+        """Mark where a test starts in the session's video and logs."""
+        browserstack_executor(driver, "annotate", data=f"test: {node_id}", level="info")
+
+    def test_failed(self, driver, node_id: str):
+        if driver in self._failed:
+            self._failed[driver].append(node_id)
+
+    def quit(self, driver):
+        """Set the session's status from its tests, quit it and free its slot."""
+        try:
+            self._set_status(driver)
+            driver.quit()
+        finally:
+            self._names.pop(driver, None)
+            slot = self._slots.pop(driver, None)
+            if slot is not None:
+                slot.release()
+
+    def _set_status(self, driver):
+        failed = self._failed.pop(driver, None)
+        if failed is not None:
+            reason = f"failed: {', '.join(failed)}"[:255] if failed else "all tests passed"
+            browserstack_executor(driver, "setSessionStatus", status="failed" if failed else "passed", reason=reason)
+
+    def summary(self) -> str:
+        if not self.sessions:
+            return "no cloud sessions opened"
+        queued = [session.queued for session in self.sessions]
+        created = [session.created for session in self.sessions]
+        limit = f"at most {self.max_sessions} in parallel" if self.max_sessions else "no local limit"
+        return (
+            f"cloud sessions: {len(self.sessions)} ({limit}), "
+            f"queued: {sum(queued):.1f}s total, {max(queued):.1f}s max, "
+            f"creation: {sum(created) / len(created):.1f}s mean, refused by the hub: {self.refused}"
+        )
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump({
+                "sessions": [session.to_dict() for session in self.sessions],
+                "queued_by_test": self.queued_by_test,
+                "refused": self.refused,
+            }, f, indent=2)
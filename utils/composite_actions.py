@@ -0,0 +1,164 @@
+"""Composite page actions: resolve each element once and send as few commands as possible.
+
+`type_text` followed by `click` used to cost a wait/find per call plus two
+commands per typed field (clear, then send keys), so a login was ten
+commands. A `CompositeAction` collects steps and sends them in the cheapest
+way the server supports:
+
+1. batched (`BasePage.batch_actions`, needs the Appium execute-driver plugin
+   and `--allow-insecure=execute_driver_script`): every step in one
+   `execute_driver` script, i.e. a single HTTP command;
+2. pipelined: each element found once, then one `mobile: replaceElementValue`
+   per field on Android, or clear + send keys elsewhere.
+
+A server that lacks a feature is remembered per driver, so falling back
+costs one failed command per session.
+
+    page.actions().type(EMAIL, email).type(PASSWORD, password).click(LOGIN).perform()
+
+A step may carry an Allure step name (`step=`), so a report keeps one step
+per field however the action is sent. Pipelined, each step runs inside its
+Allure step; batched, the steps are recorded once the script has run.
+"""
+import contextlib
+import json
+import weakref
+
+import allure
+from selenium.common import (
+    InvalidArgumentException,
+    StaleElementReferenceException,
+    UnknownMethodException,
+    WebDriverException,
+)
+
+EXECUTE_DRIVER = "execute_driver"
+REPLACE_VALUE = "replaceElementValue"
+
+_unsupported: "weakref.WeakKeyDictionary[object, set]" = weakref.WeakKeyDictionary()
+
+
+def supports(driver, feature: str) -> bool:
+    """False once the driver's server has rejected `feature`."""
+    return feature not in _unsupported.get(driver, ())
+
+
+def _mark_unsupported(driver, feature: str):
+    _unsupported.setdefault(driver, set()).add(feature)
+
+
+def replace_value(driver, element, text: str, platform: str | None):
+    """Set a field's text: one `mobile: replaceElementValue` on Android, else clear + send keys."""
+    if not text:
+        element.clear()
+        return
+    if (platform or "").lower() == "android" and supports(driver, REPLACE_VALUE):
+        try:
+            driver.execute_script("mobile: replaceElementValue", {"elementId": element.id, "text": text})
+            return
+        except (UnknownMethodException, InvalidArgumentException):
+            _mark_unsupported(driver, REPLACE_VALUE)
+    element.clear()
+    element.send_keys(text)
+
+
+# WebdriverIO script run by the execute-driver plugin; `steps` is filled in as a JSON literal
+DRIVER_SCRIPT = """const steps = %s;
+const timeout = %d;
+const ELEMENT = 'element-6066-11e4-a52e-4f735466cecf';
+async function find(using, value) {
+  const deadline = Date.now() + timeout;
+  for (;;) {
+    let found = null;
+    try { found = await driver.findElement(using, value); } catch (e) { found = null; }
+    if (found && found[ELEMENT]) return found[ELEMENT];
+    if (Date.now() > deadline) throw new Error(`No element ${using}=${value}`);
+    await driver.pause(100);
+  }
+}
+for (const [action, using, value, text] of steps) {
+  const id = await find(using, value);
+  if (action === 'type') {
+    await driver.elementClear(id);
+    if (text) await driver.elementSendKeys(id, text);
+  } else {
+    await driver.elementClick(id);
+  }
+}
+return steps.length;"""
+
+
+def driver_script(steps: list[tuple], timeout_ms: int) -> str:
+    """The `execute_driver` script performing `(action, (by, value), text)` steps in order."""
+    return DRIVER_SCRIPT % (json.dumps([[action, by, value, text] for action, (by, value), text in steps]), timeout_ms)
+
+
+def _batch_unsupported(exc: WebDriverException) -> bool:
+    message = (exc.msg or "").lower()
+    return isinstance(exc, UnknownMethodException) or "unknown command" in message or "insecure feature" in message
+
+
+def _allure_step(name: str | None):
+    return allure.step(name) if name else contextlib.nullcontext()
+
+
+class CompositeAction:
+    """Steps on one page, performed together by `perform()`."""
+
+    def __init__(self, page):
+        self.page = page
+        self.steps: list[tuple[str, tuple, str | None]] = []
+        self.step_names: list[str | None] = []  # Allure step per entry of `steps`
+
+    def type(self, locator, text: str, step: str | None = None) -> "CompositeAction":
+        """Replace the field's text (an empty string just clears it)."""
+        self.steps.append(("type", locator, text))
+        self.step_names.append(step)
+        return self
+
+    def click(self, locator, step: str | None = None) -> "CompositeAction":
+        self.steps.append(("click", locator, None))
+        self.step_names.append(step)
+        return self
+
+    def perform(self):
+        self._send()
+
+    def _send(self):
+        page, driver = self.page, self.page.driver
+        page.snapshots.invalidate()
+        if page.batch_actions and supports(driver, EXECUTE_DRIVER):
+            steps = [(action, page.native(locator), text) for action, locator, text in self.steps]
+            try:
+                timeout_ms = int(page.timeout * 1000)
+                driver.execute_driver(driver_script(steps, timeout_ms), timeout_ms=timeout_ms * len(steps))
+                for name in self.step_names:
+                    with _allure_step(name):
+                        pass
+                return
+            except WebDriverException as exc:
+                if not _batch_unsupported(exc):
+                    raise
+                _mark_unsupported(driver, EXECUTE_DRIVER)
+
+        elements: dict = {}
+        for (action, locator, text), name in zip(self.steps, self.step_names):
+            with _allure_step(name):
+                self._send_step(elements, action, locator, text)
+
+    def _send_step(self, elements: dict, action: str, locator, text: str | None):
+        """One pipelined step; `elements` keeps what earlier steps found."""
+        page, driver = self.page, self.page.driver
+        for attempt in (1, 2):
+            if locator not in elements or attempt == 2:
+                elements[locator] = page.find(locator)
+            try:
+                if action == "type":
+                    replace_value(driver, elements[locator], text, page.platform)
+                else:
+                    elements[locator].click()
+                break
+            except StaleElementReferenceException:
+                # The screen re-rendered since the element was found: find it again, once
+                if attempt == 2:
+                    raise
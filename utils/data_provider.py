@@ -1,16 +1,19 @@
-import json
-import os
+from utils.settings import ConfigError, load_test_data
+
 
 class DataProvider:
-    def __init__(self):
-        # Path to your test_data.json
-        self.path = os.path.join(os.path.dirname(__file__), "../config/test_data.json")
-        with open(self.path) as f:
-            self._data = json.load(f)
+    """Read access to `config/test_data.json`.
+
+    The file (plus its optional `test_data.<env>.json` overlay) is parsed and
+    validated once per process; every DataProvider shares that read-only view.
+    """
+
+    def __init__(self, env: str = "local"):
+        self._data = load_test_data(env)
 
     def get_user(self, user_key: str) -> dict:
         """Returns the full dictionary for a specific user (email and password)."""
-        return self._data.get(user_key, {})
+        return dict(self._data.get(user_key, {}))
 
     def get_email(self, user_key: str) -> str:
         """Returns only the email address for a specific user."""
@@ -18,4 +21,14 @@ class DataProvider:
 
     def get_password(self, user_key: str) -> str:
         """Returns only the password for a specific user."""
-        return self._data.get(user_key, {}).get("password", "")
\ No newline at end of file
+        return self._data.get(user_key, {}).get("password", "")
+
+    def resolve(self, value):
+        """`"$<user>.<field>"` -> that field of the user (as in data-driven case tables); other values unchanged."""
+        if not isinstance(value, str) or not value.startswith("$"):
+            return value
+        user, _, field = value[1:].partition(".")
+        try:
+            return self._data[user][field]
+        except KeyError:
+            raise ConfigError(f"test_data.json has no '{user}.{field}' (referenced as {value})") from None
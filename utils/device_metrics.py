@@ -0,0 +1,349 @@
+"""Device-side performance metrics per test: CPU, memory, frame rendering and screen transitions.
+
+With `--device-metrics`, the `driver` fixture starts a `DeviceSampler` that
+polls Appium's performance data (`mobile: getPerformanceData`: cpuinfo,
+memoryinfo) for the app from a background thread. The frame counters of
+`dumpsys gfxinfo` are reset when a test starts and read when it ends (this
+needs `--allow-insecure=adb_shell` on the Appium server). Metrics the
+server or platform cannot provide (iOS, no adb shell) are dropped after
+the first failure.
+
+Screen transitions are timed from the page-object action that starts them
+(`BasePage.click`, a composite action ending in a click) to the first wait
+satisfied afterwards, e.g. `login()` -> `verify_bottom_tabs_visible()`.
+The page objects do not know about any of this: `instrument` patches the
+reporting in while the sampler runs and `utils.tracing.restore` takes it
+out again, so runs without `--device-metrics` pay nothing.
+
+Samples are grouped per test in `metrics`, like the wait and network
+timings; each test's time series and summary go to Allure, and the
+summaries can be compared with a stored baseline (`compare`).
+"""
+import functools
+import json
+import logging
+import os
+import re
+import statistics
+import threading
+import time
+
+from selenium.common import WebDriverException
+
+from utils import wait_engine
+
+logger = logging.getLogger(__name__)
+
+CPU = "cpu"
+MEMORY = "memory"
+FRAMES = "frames"
+KINDS = (CPU, MEMORY, FRAMES)
+
+_GFX_FIELDS = {
+    "frames": re.compile(r"Total frames rendered:\s*(\d+)"),
+    "janky_frames": re.compile(r"Janky frames:\s*(\d+)"),
+    "frame_p50_ms": re.compile(r"50th percentile:\s*(\d+)ms"),
+    "frame_p90_ms": re.compile(r"90th percentile:\s*(\d+)ms"),
+    "frame_p99_ms": re.compile(r"99th percentile:\s*(\d+)ms"),
+}
+
+
+def parse_performance_table(rows: list[list]) -> dict[str, float]:
+    """`[[name, ...], [value, ...]]` from getPerformanceData -> `{name: value}` (missing values dropped)."""
+    if len(rows) < 2:
+        return {}
+    values = {}
+    for name, value in zip(rows[0], rows[-1]):
+        try:
+            values[name] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return values
+
+
+def parse_gfxinfo(output: str) -> dict[str, float]:
+    """Frame counters and percentiles from `dumpsys gfxinfo <package>`."""
+    frames = {}
+    for name, pattern in _GFX_FIELDS.items():
+        match = pattern.search(output)
+        if match:
+            frames[name] = float(match.group(1))
+    if frames.get("frames"):
+        frames["janky_pct"] = round(frames.get("janky_frames", 0.0) / frames["frames"] * 100, 2)
+    return frames
+
+
+def _label(locator) -> str:
+    if isinstance(locator, tuple) and len(locator) == 2:
+        return f"{locator[0]}={locator[1]}"
+    if isinstance(locator, list):
+        return ", ".join(_label(item) for item in locator)
+    return str(locator)
+
+
+class TestMetrics:
+    """What was measured during one test."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.samples: list[dict] = []  # {"t": seconds since start, metric: value, ...}
+        self.transitions: list[dict] = []
+        self.frames: dict[str, float] = {}
+
+    def summary(self) -> dict:
+        summary: dict[str, float] = {}
+        cpu = [s["cpu_pct"] for s in self.samples if "cpu_pct" in s]
+        if cpu:
+            summary["cpu_mean_pct"] = round(statistics.fmean(cpu), 2)
+            summary["cpu_max_pct"] = max(cpu)
+        memory = [s["memory_pss_kb"] for s in self.samples if "memory_pss_kb" in s]
+        if memory:
+            summary["memory_mean_kb"] = round(statistics.fmean(memory))
+            summary["memory_max_kb"] = max(memory)
+        for name in ("frames", "janky_pct", "frame_p90_ms"):
+            if name in self.frames:
+                summary[name] = self.frames[name]
+        if self.transitions:
+            summary["transition_max_ms"] = max(t["ms"] for t in self.transitions)
+        return summary
+
+
+class DeviceMetrics:
+    """Device samples and transition timings grouped by the test that was running."""
+
+    def __init__(self):
+        self.enabled = False
+        self.current_test: str | None = None
+        self.by_test: dict[str, TestMetrics] = {}
+        self._pending_action: tuple[str, float] | None = None
+        self._lock = threading.Lock()
+
+    def start_test(self, node_id: str):
+        with self._lock:
+            self.current_test = node_id
+            self.by_test[node_id] = TestMetrics()
+        self._pending_action = None
+
+    def end_test(self):
+        with self._lock:
+            self.current_test = None
+
+    def record_sample(self, values: dict):
+        """Called from the sampler thread."""
+        with self._lock:
+            test = self.by_test.get(self.current_test)
+            if test is not None:
+                test.samples.append({"t": round(time.monotonic() - test.started, 3), **values})
+
+    def record_frames(self, frames: dict):
+        if self.current_test in self.by_test:
+            self.by_test[self.current_test].frames = frames
+
+    # --- Screen transitions ---
+    def action(self, locator):
+        """A page-object action that may change the screen just finished."""
+        if self.enabled:
+            self._pending_action = (_label(locator), time.monotonic())
+
+    def arrived(self, locator, condition: str):
+        """A wait was satisfied: it ends the transition started by the last action, if any."""
+        if self._pending_action is None:
+            return
+        action, started = self._pending_action
+        self._pending_action = None
+        test = self.by_test.get(self.current_test)
+        if test is not None:
+            test.transitions.append({
+                "action": action,
+                "until": f"{condition} {_label(locator)}".strip(),
+                "ms": round((time.monotonic() - started) * 1000, 1),
+            })
+
+    # --- Reports ---
+    def test_report(self, node_id: str) -> dict:
+        test = self.by_test[node_id]
+        return {
+            "test": node_id,
+            "summary": test.summary(),
+            "frames": test.frames,
+            "transitions": test.transitions,
+            "samples": test.samples,
+        }
+
+    def samples_csv(self, node_id: str) -> str:
+        """The test's time series as CSV, one row per sample."""
+        samples = self.by_test[node_id].samples
+        columns = ["t"] + sorted({key for sample in samples for key in sample} - {"t"})
+        lines = [",".join(columns)]
+        lines += [",".join(str(sample.get(column, "")) for column in columns) for sample in samples]
+        return "\n".join(lines)
+
+    def summaries(self) -> dict[str, dict]:
+        return {node_id: test.summary() for node_id, test in self.by_test.items()}
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump([self.test_report(node_id) for node_id in self.by_test], f, indent=2)
+
+
+metrics = DeviceMetrics()
+
+
+def instrument(metrics: DeviceMetrics, page_class, action_class) -> list:
+    """Report page-object actions and satisfied waits to `metrics`; returns what `utils.tracing.restore` needs.
+
+    :param page_class: Page-object base class; its `click(locator)` starts a transition.
+    :param action_class: Composite action class; a `perform()` whose last click is that locator starts one.
+    """
+    click, perform = page_class.click, action_class.perform
+
+    @functools.wraps(click)
+    def click_and_report(self, locator):
+        result = click(self, locator)
+        metrics.action(locator)
+        return result
+
+    @functools.wraps(perform)
+    def perform_and_report(self):
+        result = perform(self)
+        clicks = [locator for action, locator, _ in self.steps if action == "click"]
+        if clicks:
+            metrics.action(clicks[-1])
+        return result
+
+    page_class.click, action_class.perform = click_and_report, perform_and_report
+    wait_engine.on_satisfied = metrics.arrived
+    return [(page_class, "click", click), (action_class, "perform", perform), (wait_engine, "on_satisfied", None)]
+
+
+class DeviceSampler:
+    """Background sampling of one driver's app (see module docstring).
+
+    :param package: Android package of the app under test.
+    :param interval: Seconds between CPU/memory samples.
+    :param kinds: Metrics to collect, out of `KINDS`.
+    """
+
+    def __init__(self, driver, package: str, interval: float = 1.0, kinds=KINDS, metrics: DeviceMetrics = metrics):
+        self.driver = driver
+        self.package = package
+        self.interval = interval
+        self.kinds = set(kinds)
+        self.metrics = metrics
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_settings(cls, driver, package: str, section) -> "DeviceSampler":
+        """Build from the `deviceMetrics` section of config.json."""
+        return cls(driver, package, interval=section.get("interval", 1.0), kinds=section.get("metrics", KINDS))
+
+    def start(self):
+        self.metrics.enabled = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="device-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.metrics.enabled = False
+
+    def begin_test(self, node_id: str):
+        """Start a test's window: reset the frame counters (the one call on the test thread besides `end_test`)."""
+        self.metrics.start_test(node_id)
+        if FRAMES in self.kinds:
+            self._gfxinfo("reset")
+
+    def end_test(self):
+        if FRAMES in self.kinds:
+            output = self._gfxinfo()
+            if output is not None:
+                self.metrics.record_frames(parse_gfxinfo(output))
+        self.metrics.end_test()
+
+    def sample(self) -> dict:
+        """One CPU/memory sample; the metrics the server cannot provide are dropped."""
+        values = {}
+        if CPU in self.kinds:
+            cpu = self._performance_data("cpuinfo", CPU)
+            if cpu:
+                values["cpu_pct"] = round(cpu.get("user", 0.0) + cpu.get("kernel", 0.0), 2)
+        if MEMORY in self.kinds:
+            memory = self._performance_data("memoryinfo", MEMORY)
+            if "totalPss" in memory:
+                values["memory_pss_kb"] = memory["totalPss"]
+            if "nativeHeapAllocatedSize" in memory:
+                values["native_heap_kb"] = memory["nativeHeapAllocatedSize"]
+        return values
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.metrics.current_test is None:
+                continue
+            values = self.sample()
+            if values:
+                self.metrics.record_sample(values)
+
+    def _performance_data(self, data_type: str, kind: str) -> dict:
+        try:
+            return parse_performance_table(self.driver.get_performance_data(self.package, data_type))
+        except WebDriverException as exc:
+            self._drop(kind, exc)
+            return {}
+
+    def _gfxinfo(self, *args) -> str | None:
+        try:
+            return self.driver.execute_script(
+                "mobile: shell", {"command": "dumpsys", "args": ["gfxinfo", self.package, *args]})
+        except WebDriverException as exc:
+            self._drop(FRAMES, exc)
+            return None
+
+    def _drop(self, kind: str, exc: WebDriverException):
+        if kind in self.kinds:
+            self.kinds.discard(kind)
+            logger.warning("Device metrics: %s not available, no longer collected (%s)", kind, exc.msg)
+
+
+# --- Baselines ---
+# Below these absolute differences a change is noise, whatever the ratio
+NOISE_FLOOR = {
+    "cpu_mean_pct": 5.0,
+    "memory_max_kb": 10240,
+    "janky_pct": 2.0,
+    "frame_p90_ms": 4.0,
+    "transition_max_ms": 150.0,
+}
+
+
+def save_baseline(summaries: dict[str, dict], path: str):
+    """Merge `{test: summary}` into the baseline file (tests not in this run keep their entry)."""
+    baseline = load_baseline(path) if os.path.exists(path) else {}
+    baseline.update(summaries)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> dict[str, dict]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(summaries: dict[str, dict], baseline: dict[str, dict], tolerance: float = 0.25) -> list[tuple]:
+    """Regressions as `(test, metric, baseline value, new value)`.
+
+    A metric regresses when it grew by more than `tolerance` (relative) and
+    by more than its noise floor (absolute).
+    """
+    regressions = []
+    for node_id, summary in summaries.items():
+        old = baseline.get(node_id, {})
+        for metric, floor in NOISE_FLOOR.items():
+            if metric not in summary or metric not in old:
+                continue
+            if summary[metric] > old[metric] * (1 + tolerance) and summary[metric] - old[metric] > floor:
+                regressions.append((node_id, metric, old[metric], summary[metric]))
+    return regressions
@@ -0,0 +1,183 @@
+"""Device-pool scheduling for running the suite on several Appium endpoints.
+
+`config.json` may define a `devicePool` list. Each entry names one device,
+the Appium server that drives it and the capabilities that pin the session
+to it (udid, systemPort, ...). `run_tests.py --pool` hands test classes to
+whichever device is free, longest expected duration first.
+"""
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import Protocol
+
+
+class Device:
+    """One entry of the `devicePool` section in config.json."""
+
+    def __init__(self, name: str, remote_url: str, capabilities: dict | None = None):
+        self.name = name
+        self.remote_url = remote_url
+        self.capabilities = dict(capabilities or {})
+
+    def __repr__(self):
+        return f"Device({self.name!r}, {self.remote_url!r})"
+
+
+def load_devices(config: dict) -> list[Device]:
+    """Build the device list from the `devicePool` section of the config."""
+    devices = []
+    for index, entry in enumerate(config.get("devicePool", [])):
+        if "remoteUrl" not in entry:
+            raise ValueError(f"devicePool[{index}] is missing 'remoteUrl'")
+        name = entry.get("name", f"device-{index}")
+        devices.append(Device(name, entry["remoteUrl"], entry.get("capabilities")))
+    return devices
+
+
+def get_device(config: dict, name: str) -> Device:
+    """Return the pool device with the given name (or index)."""
+    devices = load_devices(config)
+    for device in devices:
+        if device.name == name:
+            return device
+    if name.isdigit() and int(name) < len(devices):
+        return devices[int(name)]
+    raise ValueError(f"Device '{name}' is not defined in devicePool!")
+
+
+def unit_key(node_id: str) -> str:
+    """Scheduling unit of a test: its class, or the test itself if it has none.
+
+    The `driver` fixture is class-scoped, so splitting a class across
+    devices would only pay for extra Appium sessions.
+    """
+    parts = node_id.split("::")
+    if len(parts) > 2:
+        return "::".join(parts[:2])
+    return node_id
+
+
+def group_into_units(node_ids: list[str]) -> dict[str, list[str]]:
+    """Group collected node ids by scheduling unit, keeping collection order."""
+    units: dict[str, list[str]] = {}
+    for node_id in node_ids:
+        units.setdefault(unit_key(node_id), []).append(node_id)
+    return units
+
+
+class UnitHistory(Protocol):
+    """What `DeviceScheduler` needs from a duration history, e.g. `utils.timing_db.UnitDurations`."""
+
+    def expected(self, key: str) -> float:
+        """Expected wall-clock seconds of a unit."""
+
+    def record(self, key: str, seconds: float):
+        """Called with the measured duration after each unit."""
+
+    def save(self):
+        """Called once after the last unit."""
+
+
+class DeviceScheduler:
+    """Runs scheduling units on a pool of devices, one worker thread per device.
+
+    Units are queued longest-expected-first and each worker pulls the next
+    unit as soon as its device is free, so the pool stays balanced even when
+    the recorded durations are off.
+
+    :param devices: Devices to run on.
+    :param units: Mapping of unit key -> node ids, see `group_into_units`.
+    :param runner: Callable `(device, node_ids) -> int` returning an exit code.
+    :param history: Duration history used for ordering and updated after each unit, see `UnitHistory`.
+    :param first: Unit keys to hand out before all others (e.g. units with recent failures).
+    """
+
+    def __init__(self, devices: list[Device], units: dict[str, list[str]], runner, history: UnitHistory, first=()):
+        if not devices:
+            raise ValueError("Device pool is empty!")
+        self.devices = devices
+        self.units = units
+        self.runner = runner
+        self.history = history
+        self.first = set(first)
+        self.results: list[tuple[str, str, int, float]] = []  # (unit, device, exit code, seconds)
+        self._lock = threading.Lock()
+
+    def ordered_units(self) -> list[str]:
+        return sorted(self.units, key=lambda key: (key not in self.first, -self.history.expected(key)))
+
+    def estimated_makespan(self) -> float:
+        """Greedy estimate of the total wall-clock time for the pool."""
+        loads = [0.0] * len(self.devices)
+        for key in self.ordered_units():
+            loads[loads.index(min(loads))] += self.history.expected(key)
+        return max(loads) if loads else 0.0
+
+    def _work(self, device: Device, pending: queue.Queue):
+        while True:
+            try:
+                key = pending.get_nowait()
+            except queue.Empty:
+                return
+            started = time.monotonic()
+            code = self.runner(device, self.units[key])
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self.history.record(key, elapsed)
+                self.results.append((key, device.name, code, elapsed))
+
+    def run(self) -> int:
+        """Run every unit and return the exit code of the pool.
+
+        1 (tests failed) if any unit had failing tests, otherwise the first
+        non-zero code (interrupted, internal error, no tests collected, ...).
+        """
+        pending: queue.Queue = queue.Queue()
+        for key in self.ordered_units():
+            pending.put(key)
+
+        workers = [
+            threading.Thread(target=self._work, args=(device, pending), name=f"pool-{device.name}")
+            for device in self.devices
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.history.save()
+        codes = [code for _, _, code, _ in self.results]
+        if 1 in codes:
+            return 1
+        return next((code for code in codes if code), 0)
+
+
+def collect_node_ids(python_exe: str, pytest_args: list[str]) -> list[str]:
+    """Ask pytest which tests would run with the given arguments."""
+    # Reset addopts so the ini `-q` does not turn this into the per-file summary
+    cmd = [python_exe, "-m", "pytest", "--collect-only", "-q", "-o", "addopts=", *pytest_args]
+    output = subprocess.run(cmd, capture_output=True, text=True).stdout
+    return [line.strip() for line in output.splitlines() if "::" in line and not line.startswith(" ")]
+
+
+def pytest_runner(python_exe: str, pytest_args: list[str], report_dir: str | None = None, pin_device: bool = True):
+    """Return a scheduler runner that starts one pytest process per unit on the device.
+
+    With `report_dir`, each device gets its own Allure directory under
+    `<report_dir>/workers/<device>` so parallel workers never share one.
+    Without `pin_device`, workers are not tied to a `devicePool` entry
+    (cloud workers: the grid picks the device).
+    """
+
+    def run(device: Device, node_ids: list[str]) -> int:
+        cmd = [python_exe, "-m", "pytest", *node_ids, *pytest_args, f"--worker-id={device.name}"]
+        if pin_device:
+            cmd.append(f"--device={device.name}")
+        if report_dir:
+            cmd.append(f"--alluredir={os.path.join(report_dir, 'workers', device.name)}")
+        print(f"--- [{device.name}] Running {len(node_ids)} test(s): {node_ids[0].split('::')[0]} ---")
+        return subprocess.run(cmd).returncode
+
+    return run
@@ -0,0 +1,70 @@
+"""Normalized signature of a test failure, used to deduplicate AI analyses.
+
+Two failures get the same signature when they raise the same exception
+type from the same page-object method on the same locator with the same
+message once volatile parts (timestamps, ids, addresses, numbers) are
+masked. Seven tests failing on one broken login screen thus share one
+signature and one analysis.
+"""
+import hashlib
+import os
+import re
+
+PAGES_DIR = "pages"
+
+_VOLATILE = [
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<timestamp>"),
+    (re.compile(r"\b0x[0-9a-f]+\b", re.I), "<addr>"),
+    (re.compile(r"\b[0-9a-f]{16,}\b", re.I), "<id>"),
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+"), "<email>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+]
+
+
+def normalize_message(message: str) -> str:
+    """First line of the message with volatile parts masked and whitespace collapsed."""
+    first_line = message.strip().splitlines()[0] if message.strip() else ""
+    for pattern, replacement in _VOLATILE:
+        first_line = pattern.sub(replacement, first_line)
+    return " ".join(first_line.split())
+
+
+class FailureSignature:
+    """Stable identity of a failure; `key` is what the analysis cache is keyed by."""
+
+    def __init__(self, exception_type: str, page_method: str | None, locator: str | None, message: str):
+        self.exception_type = exception_type
+        self.page_method = page_method
+        self.locator = locator
+        self.message = message
+
+    @property
+    def key(self) -> str:
+        raw = "|".join([self.exception_type, self.page_method or "", self.locator or "", self.message])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def __repr__(self):
+        return f"FailureSignature({self.exception_type}, {self.page_method}, {self.locator}, {self.message!r})"
+
+
+def failure_signature(excinfo) -> FailureSignature:
+    """Build the signature from a pytest `ExceptionInfo` (e.g. `call.excinfo` in the report hook)."""
+    page_method = None
+    base_method = None
+    locator = None
+    for entry in excinfo.traceback:
+        path = str(entry.path)
+        if f"{os.sep}{PAGES_DIR}{os.sep}" in path:
+            module = os.path.splitext(os.path.basename(path))[0]
+            # Prefer the concrete page-object method over the BasePage helper it called
+            if module == "base_page":
+                base_method = f"{module}.{entry.name}"
+            else:
+                page_method = f"{module}.{entry.name}"
+        # BasePage helpers all take the locator tuple as `locator`
+        value = entry.locals.get("locator") if entry.locals else None
+        if isinstance(value, tuple):
+            locator = f"{value[0]}={value[1]}"
+
+    return FailureSignature(excinfo.typename, page_method or base_method, locator, normalize_message(str(excinfo.value)))
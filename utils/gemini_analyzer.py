@@ -1,10 +1,21 @@
 import os
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
+
+# analyze() reports problems as text; these prefixes mark such non-analyses
+ERROR_PREFIXES = (
+    "Gemini API Key is missing",
+    "Error: ",
+    "An unexpected error occurred during Gemini analysis",
+)
 
 
 class GeminiAnalyzer:
-    def __init__(self):
+    def __init__(self, model=None):
+        # Errors meaning the model name is wrong; only the real client raises them
+        self._model_not_found: tuple = ()
+        # Any object with generate_content(prompt) works, e.g. a local stub model
+        if model is not None:
+            self.model = model
+            return
 
         api_key = os.getenv("GEMINI_API_KEY")
 
@@ -13,6 +24,11 @@ class GeminiAnalyzer:
             self.model = None
             return
 
+        # Imported here: google.generativeai (gRPC, protobuf) takes ~0.5s to import
+        import google.generativeai as genai
+        from google.api_core import exceptions as google_exceptions
+
+        self._model_not_found = (google_exceptions.NotFound,)
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel("models/gemini-2.5-flash")
 
@@ -35,7 +51,7 @@ class GeminiAnalyzer:
             response = self.model.generate_content(prompt)
             return response.text.strip()
 
-        except google_exceptions.NotFound:
+        except self._model_not_found:
             return "Error: The specified model was not found. Check the model name (e.g., models/gemini-2.5-flash)."
         except Exception as e:
             return f"An unexpected error occurred during Gemini analysis: {str(e)}"
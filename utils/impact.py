@@ -0,0 +1,432 @@
+"""Change-impact analysis: which tests touch what changed.
+
+Tests reach page objects through the `app` fixture (`app.login.click(
+app.login.LOGIN_BUTTON)`, aliases as in `pages.registry`). The index maps
+every test to the page-object members it uses, directly or through
+autouse/requested fixtures, and every page-object member to the
+`self.<member>` it uses in turn. A change to one
+locator thus selects only the tests whose closure contains it.
+
+Files are compared member by member on their AST (formatting and comments
+do not count). Analyses are stored per file content hash in
+`.impact_index.json`, so a rebuild only re-parses files that changed, and
+the base version of a file (from git) is analyzed the same way.
+
+Anything the index cannot reason about (conftest, utils, config, ...)
+selects the whole suite. The framework self-tests in `tests/unit` are not
+part of the device suite, so changes to them select nothing.
+
+    python -m utils.impact --since origin/main    # impacted node ids
+    python -m utils.impact pages/login_page.py
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+
+from pages.registry import default_alias
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_FILE = os.path.join(ROOT, ".impact_index.json")
+INDEX_VERSION = 2  # bump when the analysis format changes; older indexes are rebuilt
+PAGES_DIR = "pages"
+TESTS_DIR = "tests"
+UNIT_TESTS_DIR = "tests/unit"  # framework self-tests, never collected by a device run
+APP_FIXTURE = "app"
+BASE_PAGE = "BasePage"
+IGNORED_SUFFIXES = (".md",)
+EVERYTHING = "*"
+
+
+def _hash(nodes) -> str:
+    dumped = "|".join(ast.dump(node, include_attributes=False) for node in nodes)
+    return hashlib.sha1(dumped.encode("utf-8")).hexdigest()
+
+
+def _self_uses(node) -> list[str]:
+    """Names `X` of every `self.X` inside the node."""
+    return sorted({
+        child.attr for child in ast.walk(node)
+        if isinstance(child, ast.Attribute) and isinstance(child.value, ast.Name) and child.value.id == "self"
+    })
+
+
+def _app_uses(node) -> list[list[str]]:
+    """`[alias, member]` pairs for every `app.<alias>.<member>` inside the node.
+
+    `app.<alias>` used as a whole gives `[alias, "*"]` and `app` handed
+    around as a whole gives `["*", "*"]`.
+    """
+    attribute_values = {id(child.value) for child in ast.walk(node) if isinstance(child, ast.Attribute)}
+    uses = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Attribute) and isinstance(child.value, ast.Attribute):
+            inner = child.value
+            if isinstance(inner.value, ast.Name) and inner.value.id == APP_FIXTURE:
+                uses.add((inner.attr, child.attr))
+        elif isinstance(child, ast.Attribute) and isinstance(child.value, ast.Name):
+            if child.value.id == APP_FIXTURE and id(child) not in attribute_values:
+                uses.add((child.attr, EVERYTHING))
+        elif isinstance(child, ast.Name) and child.id == APP_FIXTURE and id(child) not in attribute_values:
+            uses.add((EVERYTHING, EVERYTHING))
+    return [list(use) for use in sorted(uses)]
+
+
+def _name_uses(node, names: set[str]) -> list[list[str]]:
+    """`[ClassName, "*"]` for every page class imported by the test module and referenced in the node."""
+    return [[name, EVERYTHING] for name in sorted({
+        child.id for child in ast.walk(node) if isinstance(child, ast.Name) and child.id in names
+    })]
+
+
+def _digest(rel_path: str, source: str) -> str:
+    return hashlib.sha1(f"{rel_path}\0{source}".encode("utf-8")).hexdigest()
+
+
+def _names(node) -> list[str]:
+    return [ast.unparse(child) for child in node]
+
+
+def _class_header(node: ast.ClassDef) -> list:
+    return [ast.Name(node.name), *node.bases, *node.keywords, *node.decorator_list]
+
+
+def analyze_pages(source: str) -> dict:
+    """Classes of a page-object module with a hash and the `self.*` uses of each member."""
+    tree = ast.parse(source)
+    classes, residue = {}, []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            residue.append(node)
+            continue
+        members, header = {}, _class_header(node)
+        for statement in node.body:
+            if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                names = [statement.name]
+            elif isinstance(statement, (ast.Assign, ast.AnnAssign)):
+                targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+                names = [target.id for target in targets if isinstance(target, ast.Name)]
+            else:
+                header.append(statement)  # docstring and other class-level code
+                continue
+            for name in names:
+                members[name] = {"hash": _hash([statement]), "uses": _self_uses(statement)}
+        alias = next((
+            statement.value.value for statement in node.body
+            if isinstance(statement, ast.Assign) and isinstance(statement.value, ast.Constant)
+            and any(isinstance(target, ast.Name) and target.id == "alias" for target in statement.targets)
+        ), None)
+        classes[node.name] = {
+            "bases": _names(node.bases), "alias": alias, "header": _hash(header), "members": members,
+        }
+    return {"kind": "pages", "module": _hash(residue), "classes": classes}
+
+
+def _fixture(node) -> tuple[bool, bool]:
+    """(is a fixture, is autouse) for a function definition."""
+    for decorator in node.decorator_list:
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if ast.unparse(target).split(".")[-1] == "fixture":
+            autouse = isinstance(decorator, ast.Call) and any(
+                keyword.arg == "autouse" and isinstance(keyword.value, ast.Constant) and keyword.value.value
+                for keyword in decorator.keywords
+            )
+            return True, autouse
+    return False, False
+
+
+def _params(node) -> list[str]:
+    return [arg.arg for arg in node.args.args + node.args.kwonlyargs if arg.arg != "self"]
+
+
+def analyze_tests(source: str, rel_path: str) -> dict:
+    """Tests of a test module with the `app` uses of the test and of the fixtures it depends on.
+
+    Page classes imported directly (`from pages.login_page import LoginPage`)
+    count as used as a whole by the tests that reference them, and by every
+    test when module-level helpers do.
+    """
+    tree = ast.parse(source)
+    tests = {}
+    residue = []
+    page_names = {
+        alias.asname or alias.name for node in tree.body
+        if isinstance(node, ast.ImportFrom) and (node.module or "").split(".")[0] == PAGES_DIR
+        for alias in node.names
+    }
+
+    def scan(body, prefix, outer_fixtures):
+        fixtures = dict(outer_fixtures)
+        functions = []
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                is_fixture, autouse = _fixture(node)
+                if is_fixture:
+                    fixtures[node.name] = (node, autouse)
+                elif node.name.startswith("test"):
+                    functions.append(node)
+                else:
+                    residue.append(node)
+            elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+                residue.extend(_class_header(node))
+                continue
+            else:
+                residue.append(node)
+
+        for function in functions:
+            requested = [name for name, (_, autouse) in fixtures.items() if autouse] + _params(function)
+            nodes, seen = [function], set()
+            while requested:
+                name = requested.pop()
+                if name in seen or name not in fixtures:
+                    continue
+                seen.add(name)
+                fixture_node = fixtures[name][0]
+                nodes.append(fixture_node)
+                requested.extend(_params(fixture_node))
+            uses = {tuple(use) for node in nodes for use in _app_uses(node) + _name_uses(node, page_names)}
+            tests[f"{prefix}::{function.name}"] = {"hash": _hash(nodes), "uses": sorted(uses)}
+
+        for node in body:
+            if isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+                scan(node.body, f"{prefix}::{node.name}", fixtures)
+
+    scan(tree.body, rel_path, {})
+    shared = [tuple(use) for node in residue if not isinstance(node, ast.ImportFrom) for use in _name_uses(node, page_names)]
+    for test in tests.values():
+        test["uses"] = [list(use) for use in sorted(set(test["uses"]) | set(shared))]
+    return {"kind": "tests", "module": _hash(residue), "tests": tests}
+
+
+def kind_of(rel_path: str) -> str | None:
+    """Kind of file for the index: "pages", "tests" or None when it is not modelled."""
+    directory, file_name = os.path.split(rel_path)
+    if not file_name.endswith(".py") or file_name == "__init__.py":
+        return None
+    if directory == PAGES_DIR:
+        return "pages"
+    if directory == TESTS_DIR and file_name.startswith("test_"):
+        return "tests"
+    return None
+
+
+def _changed_members(old: dict | None, new: dict | None) -> set[tuple[str, str]]:
+    if old is None or new is None or old["module"] != new["module"]:
+        return {(name, EVERYTHING) for analysis in (old, new) if analysis for name in analysis["classes"]}
+    changed = set()
+    for name in set(old["classes"]) | set(new["classes"]):
+        before, after = old["classes"].get(name), new["classes"].get(name)
+        if before is None or after is None or before["header"] != after["header"] or before["bases"] != after["bases"]:
+            changed.add((name, EVERYTHING))
+            continue
+        for member in set(before["members"]) | set(after["members"]):
+            if before["members"].get(member, {}).get("hash") != after["members"].get(member, {}).get("hash"):
+                changed.add((name, member))
+    return changed
+
+
+def _changed_tests(old: dict | None, new: dict | None) -> set[str] | None:
+    """Changed node ids, or None when every test of the module counts as changed."""
+    if old is None or new is None or old["module"] != new["module"]:
+        return None
+    return {
+        node_id for node_id, test in new["tests"].items()
+        if old["tests"].get(node_id, {}).get("hash") != test["hash"]
+    }
+
+
+class ImpactIndex:
+    """Persistent, incrementally rebuilt map of tests to the page-object members they use."""
+
+    def __init__(self, root: str = ROOT, path: str = INDEX_FILE):
+        self.root = root
+        self.path = path
+        self.analyses: dict[str, dict] = {}  # content hash -> analysis
+        self.files: dict[str, str] = {}  # relative path -> content hash
+        self.analyzed = 0  # files parsed (not served from the index) since creation
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("version") == INDEX_VERSION:
+                self.analyses, self.files = stored["analyses"], stored["files"]
+
+    def analyze(self, rel_path: str, source: str | None) -> dict | None:
+        """Analysis of `source` as the file at `rel_path`; cached by content hash."""
+        if source is None:
+            return None
+        digest = _digest(rel_path, source)
+        if digest not in self.analyses:
+            kind = kind_of(rel_path)
+            self.analyses[digest] = analyze_pages(source) if kind == "pages" else analyze_tests(source, rel_path)
+            self.analyzed += 1
+        return self.analyses[digest]
+
+    def _read(self, rel_path: str) -> str | None:
+        path = os.path.join(self.root, rel_path)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def refresh(self):
+        """Analyze the page and test modules that changed since the index was built."""
+        files = {}
+        for directory in (PAGES_DIR, TESTS_DIR):
+            for file_name in sorted(os.listdir(os.path.join(self.root, directory))):
+                rel_path = f"{directory}/{file_name}"
+                if kind_of(rel_path):
+                    source = self._read(rel_path)
+                    self.analyze(rel_path, source)
+                    files[rel_path] = _digest(rel_path, source)
+        self.files = files
+
+    def save(self, keep=()):
+        """Write the index, dropping analyses of versions no longer on disk (except `keep`)."""
+        live = set(self.files.values()) | set(keep)
+        self.analyses = {digest: analysis for digest, analysis in self.analyses.items() if digest in live}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files, "analyses": self.analyses}, f)
+
+    def current(self, kind: str) -> dict[str, dict]:
+        return {rel: self.analyses[digest] for rel, digest in self.files.items() if kind_of(rel) == kind}
+
+    # --- Impact ---
+    def _classes(self) -> dict[str, dict]:
+        return {name: cls for analysis in self.current("pages").values() for name, cls in analysis["classes"].items()}
+
+    def aliases(self) -> dict[str, str]:
+        """`app.<alias>` -> page class, following the naming rule of `pages.registry`."""
+        classes = self._classes()
+        aliases = {}
+        for name, cls in classes.items():
+            if name != BASE_PAGE and BASE_PAGE in self._mro(name, classes):
+                aliases[cls["alias"] or default_alias(name)] = name
+        return aliases
+
+    def _mro(self, name: str, classes: dict) -> list[str]:
+        order, pending = [], [name]
+        while pending:
+            current = pending.pop(0)
+            if current in classes and current not in order:
+                order.append(current)
+                pending.extend(classes[current]["bases"])
+        return order or [name]
+
+    def closure(self, alias_or_class: str, member: str, classes: dict | None = None) -> set[tuple[str, str]]:
+        """Every `(defining class, member)` reached from `member` of the class, following `self.*` uses."""
+        classes = classes if classes is not None else self._classes()
+        mro = self._mro(alias_or_class, classes)
+        if member == EVERYTHING:
+            members = {name for owner in mro if owner in classes for name in classes[owner]["members"]}
+        else:
+            members = {member}
+        reached: set[tuple[str, str]] = set()
+        pending = list(members)
+        while pending:
+            name = pending.pop()
+            owner = next((cls for cls in mro if cls in classes and name in classes[cls]["members"]), None)
+            if owner is None:
+                reached.add((mro[0], name))  # unknown member (e.g. removed): keep it matchable
+                continue
+            if (owner, name) in reached:
+                continue
+            reached.add((owner, name))
+            pending.extend(classes[owner]["members"][name]["uses"])
+        return reached
+
+    def test_members(self) -> dict[str, set[tuple[str, str]] | None]:
+        """Node id -> page-object members the test reaches (None: the whole app)."""
+        classes, aliases = self._classes(), self.aliases()
+        reached = {}
+        for analysis in self.current("tests").values():
+            for node_id, test in analysis["tests"].items():
+                members: set[tuple[str, str]] | None = set()
+                for alias, member in test["uses"]:
+                    # `app.<alias>` or a page class imported by the test module
+                    page_class = aliases.get(alias) or (alias if alias in classes else None)
+                    if page_class is None:
+                        members = None
+                        break
+                    members |= self.closure(page_class, member, classes)
+                reached[node_id] = members
+        return reached
+
+    def impacted(self, changed_files: list[str], base_source=None) -> set[str] | None:
+        """Node ids of the tests affected by `changed_files`, or None if the whole suite is.
+
+        :param changed_files: Paths relative to the repository root.
+        :param base_source: Callable `rel_path -> source or None` returning the
+            version the files changed from; without it a changed file counts
+            as changed in every member.
+        """
+        changed_members: set[tuple[str, str]] = set()
+        changed_tests: set[str] = set()
+        base_digests = set()
+        self.refresh()
+
+        for rel_path in changed_files:
+            rel_path = rel_path.replace(os.sep, "/")
+            if rel_path.endswith(IGNORED_SUFFIXES) or rel_path.startswith(f"{UNIT_TESTS_DIR}/"):
+                continue
+            kind = kind_of(rel_path)
+            if kind is None:
+                self.save(base_digests)
+                return None
+            new = self.analyze(rel_path, self._read(rel_path))
+            old_source = base_source(rel_path) if base_source else None
+            old = self.analyze(rel_path, old_source)
+            if old is not None:
+                base_digests.add(_digest(rel_path, old_source))
+            if kind == "pages":
+                changed_members |= _changed_members(old, new)
+            else:
+                tests = _changed_tests(old, new)
+                if tests is None:
+                    tests = {node_id for analysis in (old, new) if analysis for node_id in analysis["tests"]}
+                changed_tests |= tests
+        self.save(base_digests)
+
+        selected = set(changed_tests)
+        for node_id, members in self.test_members().items():
+            if members is None:
+                selected.add(node_id)
+            elif any((owner, name) in changed_members or (owner, EVERYTHING) in changed_members for owner, name in members):
+                selected.add(node_id)
+        return selected
+
+
+def git_changed_files(since: str, root: str = ROOT) -> list[str]:
+    """Files changed in the working tree relative to `since`, untracked files included."""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=root, capture_output=True, text=True, check=True).stdout.splitlines()
+
+    return sorted(set(git("diff", "--name-only", since)) | set(git("ls-files", "--others", "--exclude-standard")))
+
+
+def git_source(since: str, root: str = ROOT):
+    """`base_source` callable reading files as they were at `since`."""
+    def source(rel_path: str) -> str | None:
+        result = subprocess.run(["git", "show", f"{since}:{rel_path}"], cwd=root, capture_output=True, text=True)
+        return result.stdout if result.returncode == 0 else None
+
+    return source
+
+
+def impacted_tests(since: str | None = None, changed_files: list[str] | None = None, root: str = ROOT) -> set[str] | None:
+    """Impacted node ids for a git base (`since`) and/or an explicit list of changed files."""
+    index = ImpactIndex(root, os.path.join(root, os.path.basename(INDEX_FILE)))
+    files = list(changed_files or [])
+    if since:
+        files += git_changed_files(since, root)
+    return index.impacted(files, git_source(since, root) if since else None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the tests affected by a change.")
+    parser.add_argument("files", nargs="*", help="Changed files, relative to the repository root")
+    parser.add_argument("--since", default=None, help="Git revision to diff the working tree against")
+    args = parser.parse_args()
+    selected = impacted_tests(args.since, args.files)
+    print("\n".join(sorted(selected)) if selected is not None else "(whole suite)")
@@ -0,0 +1,137 @@
+"""Import-time budget for pytest startup.
+
+Every pytest run, `--collect-only` included, imports `tests/conftest.py`,
+the plugins it registers (`pytest_plugins`) and everything they import. Heavy optional dependencies are therefore imported
+where a feature first needs them, not at module level: the Gemini SDK alone
+(gRPC, protobuf) takes about half a second, while most runs never analyze a
+failure. This profiles a fresh interpreter with `python -X importtime` and
+checks that startup stays within budget and that no deferred module is
+loaded:
+
+    python -m utils.import_budget                  # import time of tests.conftest, its plugins and the biggest contributors
+    python -m utils.import_budget --budget 0.4     # exit code 1 over budget or when a deferred module is loaded
+    python -m utils.import_budget --collect        # also time `pytest --collect-only`
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET = "tests.conftest"
+BUDGET_S = 0.5
+
+# Imported only when the feature that needs them runs
+DEFERRED = (
+    "google.generativeai",  # utils.gemini_analyzer, when a model is built
+    "google.api_core",
+    "grpc",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+class ImportRecord:
+    """One line of `-X importtime`: a module, its own import time and that including its imports (µs)."""
+
+    __slots__ = ("name", "self_us", "cumulative_us", "depth")
+
+    def __init__(self, name: str, self_us: int, cumulative_us: int, depth: int):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+
+    def __repr__(self):
+        return f"ImportRecord({self.name!r}, {self.self_us}, {self.cumulative_us}, {self.depth})"
+
+
+def parse_importtime(output: str) -> list[ImportRecord]:
+    records = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append(ImportRecord(name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+def profile(target: str = TARGET, cwd: str = ROOT) -> list[ImportRecord]:
+    """Import `target` and its `pytest_plugins` in a fresh interpreter and return what was imported, in import order."""
+    script = f"import {target}\nfor name in getattr({target}, 'pytest_plugins', ()):\n    __import__(name)"
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{process.stderr[-2000:]}")
+    return parse_importtime(process.stderr)
+
+
+def import_time_us(records: list[ImportRecord]) -> int:
+    """Time of the whole profile: the top-level imports, their dependencies included."""
+    return sum(r.cumulative_us for r in records if r.depth == 0)
+
+
+def by_package(records: list[ImportRecord]) -> dict[str, int]:
+    """Own import time summed per top-level package, largest first; every module counted once."""
+    totals: dict[str, int] = {}
+    for record in records:
+        package = record.name.split(".")[0]
+        totals[package] = totals.get(package, 0) + record.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def deferred_loaded(records: list[ImportRecord], deferred=DEFERRED) -> list[str]:
+    """The deferred packages among the imported modules."""
+    names = {record.name for record in records}
+    return [prefix for prefix in deferred if any(name == prefix or name.startswith(prefix + ".") for name in names)]
+
+
+def collect_time(cwd: str = ROOT) -> float:
+    """Wall time of `pytest --collect-only`, interpreter start included."""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider"],
+                   cwd=cwd, capture_output=True)
+    return time.perf_counter() - started
+
+
+def format_report(records: list[ImportRecord], target: str = TARGET, top: int = 10) -> str:
+    lines = [f"import {target} and its plugins: {import_time_us(records) / 1e6:.3f}s", "", "Biggest packages (own time):"]
+    for package, us in list(by_package(records).items())[:top]:
+        lines.append(f"  {us / 1000:8.1f} ms  {package}")
+    lines += ["", "Biggest modules (with their imports):"]
+    for record in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        lines.append(f"  {record.cumulative_us / 1000:8.1f} ms  {record.name}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the import time of the pytest plugins against a budget.")
+    parser.add_argument("--target", default=TARGET, help=f"Module to import with its pytest_plugins (default: {TARGET})")
+    parser.add_argument("--budget", type=float, default=BUDGET_S,
+                        help=f"Maximum import time in seconds (default: {BUDGET_S})")
+    parser.add_argument("--top", type=int, default=10, help="Contributors to list (default: 10)")
+    parser.add_argument("--collect", action="store_true", help="Also time `pytest --collect-only`")
+    args = parser.parse_args(argv)
+
+    records = profile(args.target)
+    print(format_report(records, args.target, args.top))
+    if args.collect:
+        print(f"\npytest --collect-only: {collect_time():.3f}s")
+
+    failed = False
+    seconds = import_time_us(records) / 1e6
+    if seconds > args.budget:
+        print(f"\nOVER BUDGET import {args.target}: {seconds:.3f}s > {args.budget:.3f}s")
+        failed = True
+    for package in deferred_loaded(records):
+        print(f"\nDEFERRED MODULE LOADED {package}: import it where it is used, not at module level")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Rewrite simple XPath locators to faster native strategies, and profile them.
+
+On Android every XPath is evaluated by UiAutomator2 against a full XML dump
+of the screen, while ID / accessibility id / UiSelector lookups go straight
+to the accessibility tree. The page objects mostly use the simple forms
+
+    //android.widget.TextView[@text='Home']
+    (//android.widget.TextView[@text='This field is required'])[2]
+
+which have exact native equivalents. `optimize` returns that equivalent
+(or the locator unchanged when there is none) and `BasePage` applies it
+transparently before talking to the device.
+"""
+import re
+import statistics
+import time
+from functools import lru_cache
+
+from appium.webdriver.common.appiumby import AppiumBy
+
+_XPATH = re.compile(
+    r"""^(?P<open>\()?//(?P<tag>[\w.*]+)\[@(?P<attr>[\w-]+)=(?P<q>['"])(?P<value>[^'"]*)(?P=q)\]"""
+    r"""(?(open)\)\[(?P<index>\d+)\])$"""
+)
+
+_ANDROID_UI_SELECTOR_METHODS = {"text": "text", "resource-id": "resourceId", "content-desc": "description"}
+_IOS_PREDICATE_ATTRS = ("name", "label", "value")
+
+
+def _platform_of(platform: str | None) -> str:
+    # Unknown platform -> no candidates, the locator is left alone
+    return (platform or "").lower()
+
+
+def _ui_selector(tag: str, method: str, value: str, index: int | None) -> str:
+    selector = "new UiSelector()"
+    if tag != "*":
+        selector += f'.className("{tag}")'
+    selector += f'.{method}("{value}")'
+    if index is not None:
+        selector += f".instance({index - 1})"
+    return selector
+
+
+def _android_candidates(tag: str, attr: str, value: str, index: int | None) -> list[tuple[str, str]]:
+    candidates = []
+    if index is None:
+        if attr == "resource-id" and ":id/" in value and tag == "*":
+            candidates.append((AppiumBy.ID, value))
+        if attr == "content-desc" and tag == "*":
+            candidates.append((AppiumBy.ACCESSIBILITY_ID, value))
+    if attr in _ANDROID_UI_SELECTOR_METHODS:
+        candidates.append((AppiumBy.ANDROID_UIAUTOMATOR, _ui_selector(tag, _ANDROID_UI_SELECTOR_METHODS[attr], value, index)))
+    return candidates
+
+
+def _ios_candidates(tag: str, attr: str, value: str, index: int | None) -> list[tuple[str, str]]:
+    if attr not in _IOS_PREDICATE_ATTRS or index is not None:
+        return []
+    candidates = []
+    if attr == "name" and tag == "*":
+        candidates.append((AppiumBy.ACCESSIBILITY_ID, value))
+    predicate = f"{attr} == '{value}'"
+    if tag != "*":
+        predicate = f"type == '{tag}' AND {predicate}"
+    candidates.append((AppiumBy.IOS_PREDICATE, predicate))
+    return candidates
+
+
+@lru_cache(maxsize=1024)
+def equivalents(locator: tuple[str, str], platform: str | None = "android") -> tuple[tuple[str, str], ...]:
+    """Native locators matching exactly what a simple XPath matches, fastest first.
+
+    Returns an empty tuple for non-XPath locators and for XPaths outside the
+    supported `//tag[@attr='value']` / `(//tag[@attr='value'])[n]` forms.
+    """
+    by, value = locator
+    if by != AppiumBy.XPATH:
+        return ()
+    match = _XPATH.match(value.strip())
+    if not match:
+        return ()
+
+    tag, attr, attr_value = match.group("tag"), match.group("attr"), match.group("value")
+    index = int(match.group("index")) if match.group("index") else None
+    platform = _platform_of(platform)
+
+    if platform == "android" and (tag == "*" or tag.startswith(("android.", "androidx."))):
+        return tuple(_android_candidates(tag, attr, attr_value, index))
+    if platform == "ios" and (tag == "*" or tag.startswith("XCUIElementType")):
+        return tuple(_ios_candidates(tag, attr, attr_value, index))
+    return ()
+
+
+def optimize(locator: tuple[str, str], platform: str | None = "android") -> tuple[str, str]:
+    """Return the fastest equivalent of the locator for the platform, or the locator itself."""
+    candidates = equivalents(tuple(locator), platform)
+    return candidates[0] if candidates else locator
+
+
+def page_locators(page_class) -> dict[str, tuple[str, str]]:
+    """Locator class attributes (`NAME = (strategy, value)`) of a page object class."""
+    return {
+        name: value
+        for klass in reversed(page_class.__mro__)
+        for name, value in vars(klass).items()
+        if name.isupper() and isinstance(value, tuple) and len(value) == 2 and all(isinstance(v, str) for v in value)
+    }
+
+
+def _time_lookup(driver, locator, repeat: int) -> tuple[float, int]:
+    samples = []
+    matches = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        matches = len(driver.find_elements(*locator))
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, matches
+
+
+def profile_locators(driver, page_classes, platform: str | None = None, repeat: int = 3) -> list[dict]:
+    """Benchmark every page-object locator against its native equivalents on the current screen.
+
+    Uses non-waiting `find_elements`, so each sample is exactly one lookup.
+    :return: One row per (page, attribute, candidate locator) with the median time in ms.
+    """
+    platform = platform or driver.capabilities.get("platformName")
+    rows = []
+    for page_class in page_classes:
+        for name, locator in page_locators(page_class).items():
+            chosen = optimize(locator, platform)
+            for candidate in (locator, *equivalents(locator, platform)):
+                median_ms, matches = _time_lookup(driver, candidate, repeat)
+                rows.append({
+                    "page": page_class.__name__,
+                    "attribute": name,
+                    "strategy": candidate[0],
+                    "value": candidate[1],
+                    "median_ms": round(median_ms, 2),
+                    "matches": matches,
+                    "chosen": candidate == chosen,
+                })
+    return rows
+
+
+def format_profile(rows: list[dict]) -> str:
+    """Plain-text table of `profile_locators` rows, slowest first within each attribute."""
+    lines = [f"{'locator':<40} {'strategy':<22} {'ms':>8} {'hits':>5}  value"]
+    key = lambda row: (row["page"], row["attribute"], -row["median_ms"])
+    for row in sorted(rows, key=key):
+        marker = "*" if row["chosen"] else " "
+        lines.append(
+            f"{row['page'] + '.' + row['attribute']:<40} {row['strategy']:<22} "
+            f"{row['median_ms']:>8.2f} {row['matches']:>5} {marker}{row['value']}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,651 @@
+"""In-process mock Appium (W3C WebDriver) server for offline runs.
+
+The app is scripted in a scenario file, `config/mock_app.json` by default:
+
+    {"start": "onboarding",
+     "screens": {"onboarding": "<hierarchy>...</hierarchy>",
+                 "signin_required": {"base": "signin", "extra": ["<android.widget.TextView .../>"]}},
+     "transitions": [
+        {"screen": "signin*", "element": ["accessibility id", "Continue"],
+         "when": {"login_email_input": ""}, "to": "signin_required"}],
+     "deepLinks": {"myapp://home": "home"}}
+
+A screen is a page source, or another screen with extra nodes appended to
+its first container. Transitions fire on `click` (default) or `input`
+(typing into or clearing a field) of an element matching their locator on a
+screen matching their `screen` pattern; the first one whose `when`
+conditions hold on the typed field values (exact string, `{"match": regex}`
+or `{"not_match": regex}`) moves the session to screen `to`. Typed values
+are kept per session by resource-id and rendered as the field's `text`.
+`mobile: replaceElementValue` and execute-driver scripts built by
+`utils.composite_actions` are understood too, so batched actions run here,
+as are the performance data and `dumpsys gfxinfo` reads of
+`utils.device_metrics` (made-up numbers: larger screens cost more).
+
+With `max_sessions`, the server plays a cloud hub with a parallel-session
+limit: a session beyond it is refused the way BrowserStack refuses it, and
+`browserstack_executor:` scripts (session name, status, annotations) are
+recorded per session, see `utils.cloud_grid`.
+
+Elements are looked up with `PageSnapshot`, so every locator the page
+objects can answer from a snapshot works here too. Nothing touches a
+device, which makes the suite runnable in seconds as a pre-check and gives
+benchmarks a deterministic server:
+
+    with MockAppiumServer(load_scenario()) as server:
+        driver = webdriver.Remote(server.url, options=options)
+"""
+import base64
+import copy
+import fnmatch
+import functools
+import gzip
+import json
+import os
+import re
+import struct
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from appium import webdriver
+from appium.options.common import AppiumOptions
+from appium.webdriver.appium_connection import AppiumConnection
+from selenium.webdriver.remote.client_config import ClientConfig
+
+from utils.page_source import PageSnapshot, UnsupportedLocator
+from utils.settings import CONFIG_DIR, ConfigError
+
+DEFAULT_SCENARIO = "mock_app.json"
+EVENTS = ("click", "input")
+# Selenium sends By.ID / By.NAME as CSS selectors
+_CSS_ATTRIBUTE = re.compile(r"""^\[(?P<attr>id|name)=["'](?P<value>.*)["']\]$""")
+
+
+class MockError(Exception):
+    """A W3C error response: HTTP status, error code and message."""
+
+    def __init__(self, status: int, error: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.error = error
+
+
+# --- Scenario ---
+class Screen:
+    """One scripted screen: its page source, parsed once and shared by all sessions."""
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self.snapshot = PageSnapshot(source)
+        self.nodes = list(self.snapshot.root.iter())
+        self.positions = {id(node): position for position, node in enumerate(self.nodes)}
+        self.screenshot = _png(36, 64, zlib.crc32(name.encode()).to_bytes(4, "big")[:3])
+        self._found: dict[tuple, list[int]] = {}
+
+    def find(self, locator: tuple[str, str]) -> list[int]:
+        """Positions of the nodes matching the locator, in document order."""
+        if locator not in self._found:
+            self._found[locator] = [self.positions[id(node)] for node in self.snapshot.find_all(locator)]
+        return self._found[locator]
+
+    @functools.lru_cache(maxsize=256)
+    def render(self, fields: tuple) -> str:
+        """Page source with the typed field values shown as the fields' `text`."""
+        values = dict(fields)
+        root = copy.deepcopy(self.snapshot.root)
+        changed = False
+        for node in root.iter():
+            key = node.get("resource-id")
+            if key in values:
+                node.set("text", values[key])
+                changed = True
+        return ET.tostring(root, encoding="unicode") if changed else self.source
+
+
+class Transition:
+    """Moves a session to screen `to` when its event happens on a matching element."""
+
+    def __init__(self, record: dict):
+        self.screen = record.get("screen", "*")
+        self.on = record.get("on", "click")
+        self.element = tuple(record["element"])
+        self.when: dict = record.get("when", {})
+        self.to = record["to"]
+
+    def applies(self, screen: Screen, position: int, event: str, fields: dict) -> bool:
+        return (
+            event == self.on
+            and fnmatch.fnmatchcase(screen.name, self.screen)
+            and position in screen.find(self.element)
+            and all(_matches(fields.get(key, ""), expected) for key, expected in self.when.items())
+        )
+
+
+def _matches(value: str, expected) -> bool:
+    if isinstance(expected, dict):
+        if "match" in expected:
+            return re.fullmatch(expected["match"], value) is not None
+        return re.fullmatch(expected["not_match"], value) is None
+    return value == expected
+
+
+class Scenario:
+    """Screens, transitions and deep links of a scripted app, checked on load."""
+
+    def __init__(self, data: dict, name: str = "scenario"):
+        raw = data.get("screens") or {}
+        self.screens: dict[str, Screen] = {}
+        for screen_name in raw:
+            self._build(screen_name, raw, name, ())
+        self.start = data.get("start", next(iter(raw), None))
+        self.transitions = [Transition(record) for record in data.get("transitions", [])]
+        self.deep_links: dict = data.get("deepLinks", {})
+
+        if self.start not in self.screens:
+            raise ConfigError(f"{name}: start screen '{self.start}' is not defined")
+        for url, target in self.deep_links.items():
+            if target not in self.screens:
+                raise ConfigError(f"{name}: deep link {url} leads to unknown screen '{target}'")
+        for index, transition in enumerate(self.transitions):
+            where = f"{name}: transitions[{index}]"
+            if transition.on not in EVENTS:
+                raise ConfigError(f"{where}: 'on' must be one of {EVENTS}, got {transition.on!r}")
+            if transition.to not in self.screens:
+                raise ConfigError(f"{where}: unknown screen '{transition.to}'")
+            screens = [s for s in self.screens.values() if fnmatch.fnmatchcase(s.name, transition.screen)]
+            try:
+                if not any(screen.find(transition.element) for screen in screens):
+                    raise ConfigError(f"{where}: {list(transition.element)} matches nothing on '{transition.screen}'")
+            except UnsupportedLocator as exc:
+                raise ConfigError(f"{where}: {exc}") from None
+
+    def _build(self, screen_name: str, raw: dict, name: str, chain: tuple) -> Screen:
+        if screen_name in self.screens:
+            return self.screens[screen_name]
+        if screen_name not in raw or screen_name in chain:
+            raise ConfigError(f"{name}: screen '{screen_name}' is undefined or extends itself")
+        spec = raw[screen_name]
+        try:
+            if isinstance(spec, str):
+                source = spec
+            else:
+                root = copy.deepcopy(self._build(spec["base"], raw, name, chain + (screen_name,)).snapshot.root)
+                container = root[0] if len(root) else root
+                for extra in spec.get("extra", []):
+                    container.append(ET.fromstring(extra))
+                source = ET.tostring(root, encoding="unicode")
+            screen = self.screens[screen_name] = Screen(screen_name, source)
+        except ET.ParseError as exc:
+            raise ConfigError(f"{name}: screen '{screen_name}': invalid XML ({exc})") from None
+        return screen
+
+
+def load_scenario(path: str = DEFAULT_SCENARIO) -> Scenario:
+    """Read a scenario file; relative paths are resolved against the config directory."""
+    path = path if os.path.isabs(path) else os.path.join(CONFIG_DIR, path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as exc:
+        raise ConfigError(f"{path}: cannot read scenario ({exc})") from None
+    return Scenario(data, os.path.basename(path))
+
+
+# --- Sessions and commands ---
+class MockSession:
+    """State of one session: the current screen (None while the app is terminated) and typed values."""
+
+    def __init__(self, scenario: Scenario, capabilities: dict):
+        self.id = uuid.uuid4().hex
+        self.scenario = scenario
+        self.capabilities = capabilities
+        self.screen: Screen | None = scenario.screens[scenario.start]
+        self.fields: dict[str, str] = {}
+        self.timeouts = {"implicit": 0, "pageLoad": 300000, "script": 30000}
+        self.frames = self.janky_frames = 0  # since the last `dumpsys gfxinfo ... reset`
+        self.executor: list[dict] = []  # `browserstack_executor:` commands received
+
+    def element_id(self, position: int) -> str:
+        return f"{self.screen.name}:{position}"
+
+    def node(self, element_id: str):
+        """(position, node) of an element on the current screen.
+
+        An element found on a previous screen stays valid if the node at its
+        position is the same widget (screens built on a common base share them).
+        """
+        screen_name, _, position = element_id.rpartition(":")
+        origin = self.scenario.screens.get(screen_name)
+        if self.screen is not None and origin is not None and position.isdigit():
+            position = int(position)
+            if origin is self.screen:
+                return position, self.screen.nodes[position]
+            if position < len(self.screen.nodes) and _same_widget(origin.nodes[position], self.screen.nodes[position]):
+                return position, self.screen.nodes[position]
+        raise MockError(404, "stale element reference", f"Element {element_id} is no longer on the screen")
+
+    def field_key(self, position: int) -> str:
+        return self.screen.nodes[position].get("resource-id") or f"{self.screen.name}:{position}"
+
+    def fire(self, position: int, event: str):
+        self.frames += 4
+        for transition in self.scenario.transitions:
+            if transition.applies(self.screen, position, event, self.fields):
+                self.screen = self.scenario.screens[transition.to]
+                self.frames += 20
+                self.janky_frames += 1
+                return
+
+    def launch(self):
+        """Start the app on its start screen, unless it is already running."""
+        if self.screen is None:
+            self.fields = {}
+            self.screen = self.scenario.screens[self.scenario.start]
+
+
+def _same_widget(a, b) -> bool:
+    return a.tag == b.tag and all(a.get(attr) == b.get(attr) for attr in ("resource-id", "content-desc"))
+
+
+def _png(width: int, height: int, rgb: bytes) -> bytes:
+    """A plain-coloured PNG, so each screen has its own recognisable screenshot."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    raw = b"".join(b"\x00" + rgb * width for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+_SESSION = r"/session/(?P<sid>[^/]+)"
+_ELEMENT = _SESSION + r"/element/(?P<eid>[^/]+)"
+ROUTES = [
+    ("GET", r"/status", "status"),
+    ("POST", r"/session", "new_session"),
+    ("GET", _SESSION, "get_session"),
+    ("DELETE", _SESSION, "delete_session"),
+    ("GET", _SESSION + r"/timeouts", "get_timeouts"),
+    ("POST", _SESSION + r"/timeouts", "set_timeouts"),
+    ("GET", _SESSION + r"/source", "source"),
+    ("GET", _SESSION + r"/screenshot", "screenshot"),
+    ("POST", _SESSION + r"/execute/sync", "execute"),
+    ("POST", _SESSION + r"/appium/execute_driver", "execute_driver"),
+    ("POST", _SESSION + r"/element", "find_element"),
+    ("POST", _SESSION + r"/elements", "find_elements"),
+    ("POST", _ELEMENT + r"/click", "click"),
+    ("POST", _ELEMENT + r"/value", "send_keys"),
+    ("POST", _ELEMENT + r"/clear", "clear"),
+    ("GET", _ELEMENT + r"/text", "text"),
+    ("GET", _ELEMENT + r"/displayed", "displayed"),
+    ("GET", _ELEMENT + r"/enabled", "enabled"),
+    ("GET", _ELEMENT + r"/selected", "selected"),
+    ("GET", _ELEMENT + r"/name", "tag_name"),
+    ("GET", _ELEMENT + r"/rect", "rect"),
+    ("GET", _ELEMENT + r"/attribute/(?P<name>[^/]+)", "attribute"),
+]
+_ROUTES = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in ROUTES]
+_GFXINFO = """Graphics info for pid 4242 [com.example.mobileapp]
+Total frames rendered: {frames}
+Janky frames: {janky} ({percent:.2f}%)
+50th percentile: 7ms
+90th percentile: 13ms
+95th percentile: 18ms
+99th percentile: 32ms
+"""
+_DRIVER_STEPS = re.compile(r"^const steps = (.*);$", re.MULTILINE)
+_BOUNDS = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+# What BrowserStack answers to a new session beyond the account's parallel sessions
+ALL_PARALLELS_IN_USE = ("[BROWSERSTACK_ALL_PARALLELS_IN_USE] All parallel tests are currently in use, including the "
+                        "queued tests. Please wait to finish or upgrade your plan to add more sessions.")
+
+
+class MockAppium:
+    """The W3C command handlers of the mock server, independent of HTTP."""
+
+    def __init__(self, scenario: Scenario, max_sessions: int = 0):
+        self.scenario = scenario
+        self.max_sessions = max_sessions  # 0: unlimited
+        self.sessions: dict[str, MockSession] = {}
+        self.sessions_created = 0
+        self.sessions_refused = 0
+        self.peak_sessions = 0
+        self.commands = 0
+        self._lock = threading.Lock()
+
+    def handle(self, method: str, path: str, body: dict) -> tuple[int, object]:
+        """(HTTP status, `value`) of one command; errors are W3C error values."""
+        self.commands += 1
+        path = path.split("?", 1)[0].rstrip("/")
+        path = path[path.find("/session"):] if "/session" in path else path[path.rfind("/"):]
+        try:
+            for route_method, pattern, handler in _ROUTES:
+                match = pattern.match(path)
+                if match and route_method == method:
+                    params = match.groupdict()
+                    session = self._session(params.pop("sid")) if "sid" in params else None
+                    args = (session,) if session is not None else ()
+                    return 200, getattr(self, handler)(*args, body, **params)
+            raise MockError(404, "unknown command", f"{method} {path} is not supported by the mock server")
+        except MockError as exc:
+            return exc.status, {"error": exc.error, "message": str(exc), "stacktrace": ""}
+
+    def _session(self, session_id: str) -> MockSession:
+        try:
+            return self.sessions[session_id]
+        except KeyError:
+            raise MockError(404, "invalid session id", f"No active session {session_id}") from None
+
+    # --- Sessions ---
+    def status(self, body):
+        return {"ready": True, "message": "mock Appium server"}
+
+    def new_session(self, body):
+        requested = body.get("capabilities", {})
+        capabilities = {**requested.get("alwaysMatch", {}), **(requested.get("firstMatch") or [{}])[0]}
+        capabilities = {key.removeprefix("appium:"): value for key, value in capabilities.items()}
+        session = MockSession(self.scenario, capabilities)
+        with self._lock:
+            if self.max_sessions and len(self.sessions) >= self.max_sessions:
+                self.sessions_refused += 1
+                raise MockError(500, "session not created", ALL_PARALLELS_IN_USE)
+            self.sessions[session.id] = session
+            self.sessions_created += 1
+            self.peak_sessions = max(self.peak_sessions, len(self.sessions))
+        return {"sessionId": session.id, "capabilities": dict(capabilities)}
+
+    def get_session(self, session, body):
+        return dict(session.capabilities)
+
+    def delete_session(self, session, body):
+        with self._lock:
+            self.sessions.pop(session.id, None)
+
+    def get_timeouts(self, session, body):
+        return dict(session.timeouts)
+
+    def set_timeouts(self, session, body):
+        session.timeouts.update({key: value for key, value in body.items() if key in session.timeouts})
+
+    # --- Screen ---
+    def source(self, session, body):
+        if session.screen is None:
+            return "<hierarchy/>"
+        return session.screen.render(tuple(sorted(session.fields.items())))
+
+    def screenshot(self, session, body):
+        data = session.screen.screenshot if session.screen is not None else _png(36, 64, b"\x00\x00\x00")
+        return base64.b64encode(data).decode("ascii")
+
+    def execute(self, session, body):
+        """The `mobile:` extensions the session pool uses to reset the app."""
+        script, args = body.get("script", ""), (body.get("args") or [{}])[0]
+        if script == "mobile: terminateApp":
+            running, session.screen = session.screen is not None, None
+            return running
+        if script == "mobile: activateApp":
+            session.launch()
+            return None
+        if script == "mobile: clearApp":
+            session.fields.clear()
+            return True
+        if script == "mobile: queryAppState":
+            return 4 if session.screen is not None else 1
+        if script == "mobile: deepLink":
+            target = self.scenario.deep_links.get(args.get("url"))
+            if target is None:
+                raise MockError(400, "invalid argument", f"No screen for deep link {args.get('url')!r}")
+            session.launch()
+            session.screen = self.scenario.screens[target]
+            return None
+        if script == "mobile: getPerformanceData":
+            return self._performance_data(session, args.get("dataType"))
+        if script == "mobile: getPerformanceDataTypes":
+            return ["cpuinfo", "memoryinfo"]
+        if script == "mobile: shell" and args.get("command") == "dumpsys" and args.get("args", [""])[0] == "gfxinfo":
+            if "reset" in args["args"]:
+                session.frames = session.janky_frames = 0
+            return _GFXINFO.format(frames=session.frames, janky=session.janky_frames,
+                                   percent=session.janky_frames / session.frames * 100 if session.frames else 0)
+        if script.startswith("browserstack_executor:"):
+            session.executor.append(json.loads(script.partition(":")[2]))
+            return None
+        if script == "mobile: replaceElementValue":
+            position, _ = session.node(args.get("elementId", ""))
+            session.fields[session.field_key(position)] = args.get("text", "")
+            session.fire(position, "input")
+            return None
+        raise MockError(405, "unknown method", f"Script {script!r} is not supported by the mock server")
+
+    @staticmethod
+    def _performance_data(session, data_type):
+        nodes = len(session.screen.nodes) if session.screen is not None else 0
+        if data_type == "cpuinfo":
+            return [["user", "kernel"], [str(4 + nodes % 7), "1.5"]]
+        if data_type == "memoryinfo":
+            return [["totalPss", "nativeHeapAllocatedSize"], [str(52000 + 40 * nodes), str(18000 + 10 * nodes)]]
+        raise MockError(400, "invalid argument", f"Unknown performance data type {data_type!r}")
+
+    def execute_driver(self, session, body):
+        """Runs the steps of a `utils.composite_actions` script; other scripts are rejected."""
+        match = _DRIVER_STEPS.search(body.get("script", ""))
+        if match is None:
+            raise MockError(500, "unknown error", "Only composite action scripts run on the mock server")
+        steps = json.loads(match.group(1))
+        for action, using, value, text in steps:
+            eid = self.find_element(session, {"using": using, "value": value})[_ELEMENT_KEY]
+            if action == "type":
+                self.clear(session, {}, eid)
+                if text:
+                    self.send_keys(session, {"text": text}, eid)
+            else:
+                self.click(session, {}, eid)
+        return {"result": len(steps), "logs": {"log": [], "warn": [], "error": []}}
+
+    # --- Elements ---
+    def _find(self, session, body) -> list[int]:
+        using, value = body.get("using"), body.get("value")
+        css = _CSS_ATTRIBUTE.match(value or "") if using == "css selector" else None
+        if css:
+            using, value = ("id" if css.group("attr") == "id" else "accessibility id"), css.group("value")
+        if session.screen is None:
+            return []
+        try:
+            return session.screen.find((using, value))
+        except UnsupportedLocator as exc:
+            raise MockError(400, "invalid selector", str(exc)) from None
+
+    def find_element(self, session, body):
+        positions = self._find(session, body)
+        if not positions:
+            raise MockError(404, "no such element", f"No element matches {body.get('using')}={body.get('value')!r}")
+        return _reference(session.element_id(positions[0]))
+
+    def find_elements(self, session, body):
+        return [_reference(session.element_id(position)) for position in self._find(session, body)]
+
+    def click(self, session, body, eid):
+        position, node = session.node(eid)
+        if not PageSnapshot.node_visible(node):
+            raise MockError(400, "element not interactable", f"Element {eid} is not displayed")
+        session.fire(position, "click")
+
+    def send_keys(self, session, body, eid):
+        position, _ = session.node(eid)
+        key = session.field_key(position)
+        session.fields[key] = session.fields.get(key, "") + body.get("text", "")
+        session.fire(position, "input")
+
+    def clear(self, session, body, eid):
+        position, _ = session.node(eid)
+        session.fields[session.field_key(position)] = ""
+        session.fire(position, "input")
+
+    def text(self, session, body, eid):
+        position, node = session.node(eid)
+        return session.fields.get(session.field_key(position), PageSnapshot.node_text(node))
+
+    def displayed(self, session, body, eid):
+        return PageSnapshot.node_visible(session.node(eid)[1])
+
+    def enabled(self, session, body, eid):
+        return session.node(eid)[1].get("enabled", "true").lower() == "true"
+
+    def selected(self, session, body, eid):
+        return session.node(eid)[1].get("selected", "false").lower() == "true"
+
+    def tag_name(self, session, body, eid):
+        return session.node(eid)[1].tag
+
+    def rect(self, session, body, eid):
+        bounds = _BOUNDS.match(session.node(eid)[1].get("bounds", ""))
+        x1, y1, x2, y2 = (int(value) for value in bounds.groups()) if bounds else (0, 0, 0, 0)
+        return {"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1}
+
+    def attribute(self, session, body, eid, name):
+        if name == "text":
+            return self.text(session, body, eid)
+        return session.node(eid)[1].get(name)
+
+
+_ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+
+def _reference(element_id: str) -> dict:
+    return {_ELEMENT_KEY: element_id, "ELEMENT": element_id}
+
+
+class InProcessConnection(AppiumConnection):
+    """Command executor handing every command straight to a `MockAppium` (no sockets)."""
+
+    def __init__(self, app: MockAppium):
+        super().__init__(client_config=ClientConfig(remote_server_addr="http://mock-appium.invalid"))
+        self.app = app
+
+    def _request(self, method, url, body=None):
+        status, value = self.app.handle(method, urlparse(url).path, json.loads(body) if body and method == "POST" else {})
+        if status >= 400:
+            # The client parses error responses from their JSON text
+            return {"status": status, "value": json.dumps({"value": value})}
+        return {"status": 0, "value": value}
+
+
+def in_process_driver(app: MockAppium, capabilities: dict | None = None):
+    """A real `webdriver.Remote` session on `app`, without an HTTP server."""
+    options = AppiumOptions()
+    options.load_capabilities(capabilities or {"platformName": "Android", "automationName": "UiAutomator2"})
+    return webdriver.Remote(command_executor=InProcessConnection(app), options=options)
+
+
+# --- HTTP ---
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: the client reuses its connection
+    disable_nagle_algorithm = True  # headers and body go out without waiting for an ACK
+
+    def setup(self):
+        super().setup()
+        if self.server.network.connect_latency:
+            time.sleep(self.server.network.connect_latency)  # TCP + TLS handshake of a remote hub
+
+    def _dispatch(self):
+        network = self.server.network
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                raw = gzip.decompress(raw)
+            body = json.loads(raw) if raw else {}
+        except (OSError, ValueError):
+            body = None
+        if not isinstance(body, dict):
+            status, value = 400, {"error": "invalid argument", "message": "Body must be a JSON object", "stacktrace": ""}
+        else:
+            status, value = self.server.app.handle(self.command, self.path, body)
+        payload = json.dumps({"value": value}).encode()
+        compressed = "gzip" in self.headers.get("Accept-Encoding", "") and len(payload) >= 1024
+        if compressed:
+            payload = gzip.compress(payload, compresslevel=5)
+        if network.latency or network.bandwidth:
+            time.sleep(network.latency + (length + len(payload)) / (network.bandwidth or float("inf")))
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if compressed:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_DELETE = _dispatch
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class Network:
+    """Emulated link to the server, to make transport changes measurable on localhost.
+
+    :param latency: Seconds added to every command (round trip).
+    :param connect_latency: Seconds added once per new connection (handshakes).
+    :param bandwidth: Bytes per second for request and response bodies (0 = unlimited).
+    """
+
+    def __init__(self, latency: float = 0.0, connect_latency: float = 0.0, bandwidth: int = 0):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.bandwidth = bandwidth
+
+
+class MockAppiumServer:
+    """Serves a scenario over HTTP on a background thread (port 0 picks a free port).
+
+    Responses of 1 KB or more are gzipped for clients that accept it, and
+    gzipped request bodies are understood. Usable as a context manager;
+    `app` gives access to the live sessions.
+    """
+
+    def __init__(self, scenario: Scenario, host: str = "127.0.0.1", port: int = 0, network: Network | None = None,
+                 max_sessions: int = 0):
+        self.app = MockAppium(scenario, max_sessions)
+        self._server = _Server((host, port), _Handler)
+        self._server.app = self.app
+        self._server.network = network or Network()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockAppiumServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, name="mock-appium", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def summary(self) -> str:
+        return f"{self.app.sessions_created} sessions served at {self.url}"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
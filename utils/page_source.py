@@ -0,0 +1,226 @@
+"""Resolve locators locally against one `page_source` snapshot.
+
+A single `driver.page_source` round-trip returns the whole UI hierarchy.
+Resolving several locators against that XML is much cheaper than one
+`find_element` per locator, especially for XPath on UiAutomator2.
+"""
+import re
+import weakref
+import xml.etree.ElementTree as ET
+
+from appium.webdriver.common.appiumby import AppiumBy
+
+
+class UnsupportedLocator(Exception):
+    """The locator cannot be evaluated against a page-source snapshot."""
+
+
+# (//android.widget.TextView[@text='x'])[2]
+_INDEXED_XPATH = re.compile(r"^\((?P<path>.+)\)\[(?P<index>\d+)\]$")
+# //android.widget.TextView[@text='x'] -- answered straight from the indexes
+_SIMPLE_XPATH = re.compile(r"""^//(?P<tag>[\w.*]+)\[@(?P<attr>[\w-]+)=(?P<q>['"])(?P<value>.*?)(?P=q)\]$""")
+# new UiSelector().text("x").instance(1)
+_UI_SELECTOR_CALL = re.compile(r'\.(\w+)\(\s*(?:"((?:[^"\\]|\\.)*)"|(\d+))\s*\)')
+_UI_SELECTOR_ATTRS = {
+    "text": "text",
+    "resourceId": "resource-id",
+    "description": "content-desc",
+    "className": None,  # matched against the tag
+}
+
+
+def _to_element_path(xpath: str) -> str:
+    """Translate the absolute XPath subset ElementTree understands into its syntax."""
+    if xpath.startswith("//"):
+        return "." + xpath
+    if xpath.startswith("/"):
+        raise UnsupportedLocator(f"Absolute XPath from the root is not supported: {xpath}")
+    return xpath
+
+
+def parse_ui_selector(selector: str) -> tuple[dict, int | None]:
+    """Parse a simple `new UiSelector()...` chain into (attributes, instance or None).
+
+    Only text/resourceId/description/className/instance calls are understood.
+    """
+    selector = selector.strip()
+    if not selector.startswith("new UiSelector()"):
+        raise UnsupportedLocator(f"Not a UiSelector: {selector}")
+    rest = selector[len("new UiSelector()"):]
+
+    attrs: dict = {}
+    instance = None
+    position = 0
+    for match in _UI_SELECTOR_CALL.finditer(rest):
+        if match.start() != position:
+            break
+        position = match.end()
+        name, text, number = match.groups()
+        if name == "instance" and number is not None:
+            instance = int(number)
+        elif name in _UI_SELECTOR_ATTRS and text is not None:
+            attrs[name] = text.replace('\\"', '"')
+        else:
+            raise UnsupportedLocator(f"UiSelector method '{name}' is not supported")
+    if position != len(rest.rstrip(";")):
+        raise UnsupportedLocator(f"Cannot parse UiSelector: {selector}")
+    return attrs, instance
+
+
+INDEXED_ATTRIBUTES = ("resource-id", "text", "content-desc", "name")
+
+
+class PageSnapshot:
+    """Parsed `page_source` of one moment of the screen.
+
+    Nodes are indexed by resource-id, text, content-desc, name (iOS) and
+    class, so ID/accessibility-id lookups and simple XPaths are dict hits.
+    """
+
+    def __init__(self, source: str):
+        self.root = ET.fromstring(source)
+        self._by_attr: dict[str, dict[str, list[ET.Element]]] = {attr: {} for attr in INDEXED_ATTRIBUTES}
+        self._by_short_id: dict[str, list[ET.Element]] = {}
+        self._by_class: dict[str, list[ET.Element]] = {}
+        self._order: dict[int, int] = {}
+
+        for position, node in enumerate(self.root.iter()):
+            self._order[id(node)] = position
+            self._by_class.setdefault(node.tag, []).append(node)
+            for attr in INDEXED_ATTRIBUTES:
+                value = node.get(attr)
+                if value is not None:
+                    self._by_attr[attr].setdefault(value, []).append(node)
+            resource_id = node.get("resource-id")
+            if resource_id and ":id/" in resource_id:
+                self._by_short_id.setdefault(resource_id.split(":id/", 1)[1], []).append(node)
+
+    def _lookup(self, attr: str, value: str) -> list[ET.Element]:
+        return self._by_attr[attr].get(value, [])
+
+    def _in_document_order(self, nodes: list[ET.Element]) -> list[ET.Element]:
+        return sorted(nodes, key=lambda node: self._order[id(node)])
+
+    def find_all(self, locator: tuple[str, str]) -> list[ET.Element]:
+        """Return all nodes matching the locator, in document order.
+
+        :raises UnsupportedLocator: if the strategy/expression needs the device.
+        """
+        by, value = locator
+        if by == AppiumBy.XPATH:
+            return self._find_xpath(value)
+        if by == AppiumBy.ID:
+            return self._find_id(value)
+        if by == AppiumBy.ACCESSIBILITY_ID:
+            return self._in_document_order(self._lookup("content-desc", value) + self._lookup("name", value))
+        if by == AppiumBy.CLASS_NAME:
+            return list(self._by_class.get(value, []))
+        if by == AppiumBy.ANDROID_UIAUTOMATOR:
+            return self._find_ui_selector(value)
+        raise UnsupportedLocator(f"Strategy '{by}' is not supported on snapshots")
+
+    def is_visible(self, locator: tuple[str, str]) -> bool:
+        """True if at least one matching node is displayed."""
+        return any(self.node_visible(node) for node in self.find_all(locator))
+
+    @staticmethod
+    def node_visible(node: ET.Element) -> bool:
+        # UiAutomator2 reports `displayed`, XCUITest `visible`; missing means shown
+        flag = node.get("displayed", node.get("visible", "true"))
+        return flag.lower() == "true"
+
+    @staticmethod
+    def node_text(node: ET.Element) -> str:
+        """Text of a node: `text` on Android, `label`/`value` on iOS."""
+        if node.get("text") is not None:
+            return node.get("text")
+        return node.get("label") or node.get("value") or ""
+
+    def _find_id(self, value: str) -> list[ET.Element]:
+        nodes = self._lookup("resource-id", value) + self._by_short_id.get(value, [])
+        if not nodes:
+            # iOS exposes ids as `name`, but only on nodes without a resource-id
+            nodes = [node for node in self._lookup("name", value) if node.get("resource-id") is None]
+        return self._in_document_order(nodes)
+
+    @staticmethod
+    def _matches_id(node: ET.Element, value: str) -> bool:
+        resource_id = node.get("resource-id")
+        if resource_id is not None:
+            return resource_id == value or resource_id.endswith(f":id/{value}")
+        return node.get("name") == value
+
+    def _find_xpath(self, xpath: str) -> list[ET.Element]:
+        index = None
+        indexed = _INDEXED_XPATH.match(xpath.strip())
+        if indexed:
+            xpath, index = indexed.group("path"), int(indexed.group("index"))
+
+        simple = _SIMPLE_XPATH.match(xpath.strip())
+        if simple and simple.group("attr") in INDEXED_ATTRIBUTES:
+            tag = simple.group("tag")
+            nodes = [
+                node for node in self._lookup(simple.group("attr"), simple.group("value"))
+                if tag == "*" or node.tag == tag
+            ]
+            return nodes if index is None else nodes[index - 1:index]
+
+        try:
+            nodes = self.root.findall(_to_element_path(xpath.strip()))
+        except SyntaxError as exc:
+            raise UnsupportedLocator(f"XPath is too complex for a snapshot: {xpath}") from exc
+        if index is None:
+            return nodes
+        return nodes[index - 1:index]
+
+    def _find_ui_selector(self, selector: str) -> list[ET.Element]:
+        attrs, instance = parse_ui_selector(selector)
+        nodes = []
+        for node in self.root.iter():
+            if "className" in attrs and node.tag != attrs["className"]:
+                continue
+            # resourceId is compared exactly, as UiAutomator does (unlike the ID strategy)
+            if all(node.get(_UI_SELECTOR_ATTRS[name]) == value for name, value in attrs.items() if name != "className"):
+                nodes.append(node)
+        if instance is None:
+            return nodes
+        return nodes[instance:instance + 1]
+
+
+class SnapshotCache:
+    """The latest snapshot of one driver, shared by every page object using it.
+
+    Read-only lookups reuse the cached snapshot; anything that may change the
+    screen must call `invalidate()`.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.fetches = 0
+        self._snapshot: PageSnapshot | None = None
+
+    def get(self) -> PageSnapshot:
+        """Cached snapshot, fetched on first use after an invalidation."""
+        if self._snapshot is None:
+            return self.refresh()
+        return self._snapshot
+
+    def refresh(self) -> PageSnapshot:
+        """Fetch `page_source` again and replace the cached snapshot."""
+        self._snapshot = PageSnapshot(self.driver.page_source)
+        self.fetches += 1
+        return self._snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+
+_caches: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def snapshot_cache_for(driver) -> SnapshotCache:
+    """Return the snapshot cache of a driver, creating it on first use."""
+    cache = _caches.get(driver)
+    if cache is None:
+        cache = _caches[driver] = SnapshotCache(driver)
+    return cache
@@ -0,0 +1,40 @@
+"""pytest plugins of the framework, one module per feature.
+
+`tests/conftest.py` registers them through `pytest_plugins`; each module
+declares its own command-line options and hooks. The helpers below are
+shared by the plugins that attach to the Allure results: a failure about
+to be retried gets nothing, the final attempt gets everything.
+"""
+import os
+
+import pytest
+
+from utils.allure_results import tag_current_result
+from utils.results_stream import artifact_path
+from utils.retry import RetryPlugin
+
+result_ref_key = pytest.StashKey[str]()
+retry_key = pytest.StashKey[RetryPlugin]()
+
+
+def will_retry(item) -> bool:
+    """Whether the call-phase failure just reported for `item` is going to be rerun.
+
+    Call from a tryfirst hookwrapper, see `RetryPlugin.will_retry`.
+    """
+    retry = item.config.stash.get(retry_key, None)
+    return retry is not None and retry.will_retry(item)
+
+
+def result_ref(item) -> str:
+    """`result_ref` of the test's Allure result; tagged on first use."""
+    if result_ref_key not in item.stash:
+        item.stash[result_ref_key] = tag_current_result()
+    return item.stash[result_ref_key]
+
+
+def artifact_path_for(config, file_name: str) -> str:
+    """Path of a JSON artifact next to the Allure results, unique per process for pool workers."""
+    report_dir = config.getoption("allure_report_dir", None) or "reports"
+    os.makedirs(report_dir, exist_ok=True)
+    return artifact_path(report_dir, file_name, config.getoption("--worker-id"))
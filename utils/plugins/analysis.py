@@ -0,0 +1,57 @@
+"""pytest plugin: Gemini analysis of test failures in the background (see `utils.analysis_pipeline`)."""
+import pytest
+
+from utils.allure_results import reset_counters
+from utils.analysis_cache import AnalysisCache
+from utils.analysis_pipeline import FailureAnalysisPipeline
+from utils.failure_signature import failure_signature
+from utils.plugins import result_ref, will_retry
+
+analysis_pipeline_key = pytest.StashKey[FailureAnalysisPipeline]()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--analysis-workers",
+        action="store",
+        type=int,
+        default=2,
+        help="Number of background workers for Gemini failure analysis",
+    )
+    parser.addoption(
+        "--no-analysis-cache",
+        action="store_true",
+        default=False,
+        help="Do not reuse cached Gemini analyses of failures with the same signature",
+    )
+
+
+def pytest_configure(config):
+    config.stash[analysis_pipeline_key] = FailureAnalysisPipeline(
+        max_workers=config.getoption("--analysis-workers"),
+        cache=None if config.getoption("--no-analysis-cache") else AnalysisCache(),
+    )
+    report_dir = config.getoption("allure_report_dir", None)
+    if report_dir and config.getoption("--worker-id") is None:
+        # The units of a pool worker add to their worker's cache counters; any other run starts them from zero
+        reset_counters(report_dir)
+
+
+@pytest.hookimpl(tryfirst=True, hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Queue the analysis of a test failure; it runs in the background and is attached at session end."""
+    outcome = yield
+    rep = outcome.get_result()
+    if rep.when != "call" or not rep.failed or will_retry(item) or "driver" not in item.fixturenames:
+        return
+    error_msg = str(rep.longrepr) if rep.longrepr else "Unknown error"
+    signature = failure_signature(call.excinfo) if call.excinfo else None
+    item.config.stash[analysis_pipeline_key].submit(result_ref(item), item.nodeid, error_msg, signature)
+
+
+def pytest_sessionfinish(session):
+    pipeline = session.config.stash.get(analysis_pipeline_key, None)
+    if pipeline is not None and pipeline.jobs:
+        attached = pipeline.finish(session.config.getoption("allure_report_dir", None))
+        print(f"\nAI failure analysis: {attached}/{len(pipeline.jobs)} attached to Allure results, "
+              f"cache: {pipeline.cache_summary()}")
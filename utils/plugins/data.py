@@ -0,0 +1,51 @@
+"""pytest plugin: test data, and data-driven tests from JSONL data sets and case tables in config/."""
+import pytest
+
+from utils.case_matrix import StartScreen, StartScreens, load_cases
+from utils.data_provider import DataProvider
+from utils.settings import dataset
+
+# Screens data-driven cases start from: how to get there, and how to reset it for the next case
+START_SCREENS = {
+    "signin": StartScreen(
+        "Sign In screen",
+        navigate=lambda app: app.login.navigate_to_signin_screen(),
+        reset=lambda app: app.login.clear_signin_form(),
+    ),
+}
+
+
+@pytest.fixture(scope="session")
+def data(request):
+    """Returns the DataProvider instance to access test data easily."""
+    return DataProvider(request.config.getoption("--env").lower())
+
+
+@pytest.fixture
+def record(request):
+    """One record of the JSONL data set named by the test's `dataset` marker, read on demand."""
+    marker = request.node.get_closest_marker("dataset")
+    return _dataset_of(marker).read(request.param)
+
+
+def _dataset_of(marker):
+    return dataset(marker.args[0], tuple(marker.kwargs.get("required", ())), marker.kwargs.get("id_key", "id"))
+
+
+@pytest.fixture
+def screens(app, driver):
+    """Brings data-driven cases to their start screen, reusing it between cases where possible."""
+    return StartScreens(app, driver, START_SCREENS)
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize `record` from a `dataset` marker (offsets only) and `case` from a `cases` marker."""
+    marker = metafunc.definition.get_closest_marker("dataset")
+    if marker is not None and "record" in metafunc.fixturenames:
+        records = _dataset_of(marker)
+        metafunc.parametrize("record", records.offsets, ids=records.ids, indirect=True)
+
+    marker = metafunc.definition.get_closest_marker("cases")
+    if marker is not None and "case" in metafunc.fixturenames:
+        cases = load_cases(marker.args[0])
+        metafunc.parametrize("case", cases, ids=[case.id for case in cases])
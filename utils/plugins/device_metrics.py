@@ -0,0 +1,116 @@
+"""pytest plugin: the app's CPU, memory and frame rendering per test, checked against a baseline (see `utils.device_metrics`)."""
+import contextlib
+import json
+import os
+
+import allure
+import pytest
+
+from pages.base_page import BasePage
+from utils.composite_actions import CompositeAction
+from utils.device_metrics import DeviceSampler, compare, instrument, load_baseline, metrics, save_baseline
+from utils.plugins import artifact_path_for, will_retry
+from utils.plugins.settings import load_config
+from utils.settings import CONFIG_DIR
+from utils.tracing import restore
+
+device_sampler_key = pytest.StashKey[DeviceSampler]()
+device_regressions_key = pytest.StashKey[list]()
+
+
+@contextlib.contextmanager
+def device_metrics_on(request, driver, caps: dict):
+    """With --device-metrics, sample the app's CPU and memory in the background and time screen transitions while the class runs."""
+    if not request.config.getoption("--device-metrics"):
+        yield
+        return
+    config = load_config(request.config)
+    section = config.get("deviceMetrics", {})
+    package = section.get("packageName") or config.get("sessionPool", {}).get("appId") or caps.get("appPackage")
+    sampler = DeviceSampler.from_settings(driver, package, section)
+    request.config.stash[device_sampler_key] = sampler
+    patched = instrument(metrics, BasePage, CompositeAction)
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        restore(patched)
+        del request.config.stash[device_sampler_key]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--device-metrics",
+        action="store_true",
+        default=False,
+        help="Sample the app's CPU, memory and frame rendering during each test and compare with the baseline",
+    )
+    parser.addoption(
+        "--save-device-metrics-baseline",
+        action="store_true",
+        default=False,
+        help="Store this run's device metrics as the baseline (deviceMetrics.baseline in config.json)",
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """The device-metrics window of the test body."""
+    sampler = item.config.stash.get(device_sampler_key, None) if "driver" in item.fixturenames else None
+    if sampler is not None:
+        sampler.begin_test(item.nodeid)
+    try:
+        yield
+    finally:
+        if sampler is not None:
+            sampler.end_test()
+
+
+@pytest.hookimpl(tryfirst=True, hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    rep = outcome.get_result()
+    if rep.when != "call" or item.nodeid not in metrics.by_test or (rep.failed and will_retry(item)):
+        return
+    allure.attach(
+        json.dumps(metrics.test_report(item.nodeid), indent=2),
+        name="device_metrics",
+        attachment_type=allure.attachment_type.JSON,
+    )
+    allure.attach(metrics.samples_csv(item.nodeid), name="device_metrics_samples",
+                  attachment_type=allure.attachment_type.CSV)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if config.getoption("--device-metrics") and metrics.by_test:
+        regressions = config.stash.get(device_regressions_key, [])
+        terminalreporter.write_sep("-", f"Device metrics: {len(regressions)} regression(s) against the baseline")
+        for node_id, metric, old, new in regressions:
+            terminalreporter.write_line(f"REGRESSION {node_id} {metric}: {old:g} -> {new:g}")
+
+
+def pytest_sessionfinish(session):
+    """Check device metrics against their baseline, then dump them next to the Allure results."""
+    if not session.config.getoption("--device-metrics") or not metrics.by_test:
+        return
+    _check_device_metrics(session)
+    if session.config.getoption("allure_report_dir", None):
+        metrics.dump(artifact_path_for(session.config, "device_metrics.json"))
+
+
+def _check_device_metrics(session):
+    """Store the run's device metrics as the baseline, or fail the run on regressions against it."""
+    section = load_config(session.config).get("deviceMetrics", {})
+    path = os.path.join(CONFIG_DIR, section.get("baseline", "device_metrics_baseline.json"))
+    summaries = {node_id: summary for node_id, summary in metrics.summaries().items() if summary}
+    if session.config.getoption("--save-device-metrics-baseline"):
+        save_baseline(summaries, path)
+        print(f"\nDevice metrics baseline saved to {path}")
+        return
+    if not os.path.exists(path):
+        return
+    regressions = compare(summaries, load_baseline(path), section.get("tolerance", 0.25))
+    session.config.stash[device_regressions_key] = regressions
+    if regressions and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
@@ -0,0 +1,37 @@
+"""pytest plugin: per-test timing and outcome history, and failing tests first (see `utils.timing_db`)."""
+import pytest
+
+from utils.timing_db import HistoryPlugin, TimingDB
+
+history_key = pytest.StashKey[HistoryPlugin]()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--recent-failures-first",
+        action="store_true",
+        default=False,
+        help="Run tests that failed in one of their last runs first (test classes are kept together)",
+    )
+    parser.addoption(
+        "--history",
+        action="store_true",
+        default=False,
+        help="Read and record per-test timings and outcomes in .test_history.sqlite (run_tests.py always does)",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """Before the retry plugin, which quarantines flaky tests from the history."""
+    if not config.getoption("--history") and not config.getoption("--recent-failures-first"):
+        return
+    # Registered as a plugin: records every test and orders the run from the history
+    history = HistoryPlugin(
+        TimingDB(),
+        config.getoption("--platform").lower(),
+        config.getoption("--env").lower(),
+        failed_first=config.getoption("--recent-failures-first"),
+    )
+    config.stash[history_key] = history
+    config.pluginmanager.register(history, "test_history")
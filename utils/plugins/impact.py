@@ -0,0 +1,34 @@
+"""pytest plugin: run only the tests a change can affect (see `utils.impact`)."""
+from utils.impact import impacted_tests, kind_of
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--impacted-since",
+        action="store",
+        default=None,
+        help="Only run tests affected by changes in the working tree since this git revision",
+    )
+    parser.addoption(
+        "--changed-files",
+        action="store",
+        default=None,
+        help="Only run tests affected by these comma-separated files (relative to the repository root)",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """With --impacted-since/--changed-files, deselect tests the change-impact index rules out."""
+    since, changed = config.getoption("--impacted-since"), config.getoption("--changed-files")
+    if not since and not changed:
+        return
+    selected = impacted_tests(since, changed.split(",") if changed else None)
+    if selected is None:
+        return
+    keep, deselected = [], []
+    for item in items:
+        # Parametrized tests are indexed by their function; modules the index does not model are kept
+        node_id = item.nodeid.split("[")[0]
+        (keep if node_id in selected or kind_of(node_id.split("::")[0]) is None else deselected).append(item)
+    config.hook.pytest_deselected(items=deselected)
+    items[:] = keep
@@ -0,0 +1,25 @@
+"""pytest plugin: finished tests streamed to a live directory while the run goes on (see `utils.results_stream`)."""
+from utils.results_stream import ResultStream
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--live-dir",
+        action="store",
+        default=None,
+        help="Stream per-test results and live summaries to this directory (run_tests.py uses reports/live)",
+    )
+    parser.addoption(
+        "--worker-id",
+        action="store",
+        default=None,
+        help="Name of this worker in streamed results (default: --device or 'main')",
+    )
+
+
+def pytest_configure(config):
+    live_dir = config.getoption("--live-dir")
+    if live_dir:
+        worker_id = config.getoption("--worker-id") or config.getoption("--device") or "main"
+        # Registered as a plugin: it receives every pytest_runtest_logreport
+        config.pluginmanager.register(ResultStream(live_dir, worker_id), "result_stream")
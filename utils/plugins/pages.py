@@ -0,0 +1,75 @@
+"""pytest plugin: the `app` fixture, how page objects talk to the device, and the locator profile."""
+import json
+
+import pytest
+
+from pages.base_page import BasePage
+from pages.registry import discover, pages_for
+from utils.locator_optimizer import format_profile, profile_locators
+from utils.plugins import artifact_path_for
+
+locator_profile_key = pytest.StashKey[list]()
+
+
+@pytest.fixture(scope="function")
+def app(driver, request):
+    """Provides all Page Objects as a single object (`app.login`, `app.bottom`, ...).
+
+    Page objects are built on first access and cached with the driver session.
+    """
+    return pages_for(driver, use_snapshot=request.config.getoption("--page-snapshots"))
+
+
+def profile_locators_on(request, driver):
+    """With --profile-locators, benchmark page-object locators on the screen the class ended on."""
+    if not request.config.getoption("--profile-locators"):
+        return
+    rows = profile_locators(driver, list(discover().values()))
+    request.config.stash.setdefault(locator_profile_key, []).extend(rows)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--page-snapshots",
+        action="store_true",
+        default=False,
+        help="Answer read-only page-object checks from a cached page_source snapshot",
+    )
+    parser.addoption(
+        "--profile-locators",
+        action="store_true",
+        default=False,
+        help="Benchmark page-object locators against their native equivalents after each test class",
+    )
+    parser.addoption(
+        "--locator-rewrite",
+        action="store_true",
+        default=False,
+        help="Send simple page-object XPaths to the device as their native ID / accessibility id / UiSelector equivalent",
+    )
+    parser.addoption(
+        "--batch-actions",
+        action="store_true",
+        default=False,
+        help="Send composite page actions as one execute-driver script (needs the Appium execute-driver plugin)",
+    )
+
+
+def pytest_configure(config):
+    BasePage.optimize_locators = config.getoption("--locator-rewrite")
+    BasePage.batch_actions = config.getoption("--batch-actions")
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    profile = config.stash.get(locator_profile_key, None)
+    if profile:
+        terminalreporter.write_sep("-", "Locator profile (* = used by BasePage)")
+        terminalreporter.write_line(format_profile(profile))
+
+
+def pytest_sessionfinish(session):
+    """Dump the locator profile next to the Allure results."""
+    profile = session.config.stash.get(locator_profile_key, None)
+    if profile and session.config.getoption("allure_report_dir", None):
+        with open(artifact_path_for(session.config, "locator_profile.json"), "w") as f:
+            json.dump(profile, f, indent=2)
@@ -0,0 +1,48 @@
+"""pytest plugin: in-place retries of infrastructure/timing failures and flake quarantine (see `utils.retry`)."""
+import functools
+
+from utils.plugins import retry_key
+from utils.plugins.history import history_key
+from utils.plugins.sessions import recover_for_retry
+from utils.plugins.settings import load_config
+from utils.retry import RetryPlugin
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--retries",
+        action="store",
+        type=int,
+        default=None,
+        help="Reruns of a test after an infrastructure or timing failure (default: retry.maxRetries in config.json)",
+    )
+    parser.addoption(
+        "--no-quarantine",
+        action="store_true",
+        default=False,
+        help="Run flaky tests normally instead of as xfail",
+    )
+
+
+def pytest_configure(config):
+    history = config.stash.get(history_key, None)
+    # Registered as a plugin: retries infrastructure/timing failures and quarantines flaky tests
+    retry = RetryPlugin.from_settings(
+        load_config(config).get("retry", {}),
+        recover=functools.partial(recover_for_retry, config),
+        history=history.history if history is not None else None,
+    )
+    if config.getoption("--retries") is not None:
+        retry.max_retries = config.getoption("--retries")
+    if config.getoption("--no-quarantine"):
+        retry.quarantine_threshold = 0
+    config.stash[retry_key] = retry
+    config.pluginmanager.register(retry, "retry")
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """List retried and quarantined tests."""
+    retry = config.stash.get(retry_key, None)
+    if retry is not None and (retry.retried or retry.quarantined):
+        terminalreporter.write_sep("-", "Retries and quarantine")
+        terminalreporter.write_line(retry.summary())
@@ -0,0 +1,112 @@
+"""pytest plugin: failure and step screenshots, encoded and deduplicated in the background (see `utils.screenshots`)."""
+import allure_commons
+import pytest
+
+from utils.plugins import result_ref, will_retry
+from utils.screenshots import ScreenshotPipeline
+
+screenshot_pipeline_key = pytest.StashKey[ScreenshotPipeline]()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--screenshot-format",
+        action="store",
+        default="jpeg",
+        choices=("jpeg", "webp", "png"),
+        help="Format screenshots are re-encoded to before they are stored (needs Pillow)",
+    )
+    parser.addoption(
+        "--screenshot-quality",
+        action="store",
+        type=int,
+        default=70,
+        help="JPEG/WebP quality of stored screenshots",
+    )
+    parser.addoption(
+        "--screenshot-max-width",
+        action="store",
+        type=int,
+        default=720,
+        help="Downscale wider screenshots to this width (0 keeps the device resolution)",
+    )
+    parser.addoption(
+        "--step-screenshots",
+        action="store_true",
+        default=False,
+        help="Also capture a screenshot at the end of every Allure step",
+    )
+    parser.addoption(
+        "--screenshot-near-duplicates",
+        action="store",
+        type=int,
+        default=0,
+        metavar="BITS",
+        help="Let a step screenshot reuse a stored one within this perceptual-hash distance "
+             "(default: 0, byte-identical only; failure screenshots never do)",
+    )
+    parser.addoption(
+        "--step-screenshot-budget",
+        action="store",
+        type=int,
+        default=2048,
+        help="KB of step screenshots stored per test before step capture stops",
+    )
+
+
+def pytest_configure(config):
+    report_dir = config.getoption("allure_report_dir", None)
+    if not report_dir:
+        return
+    screenshots = ScreenshotPipeline(
+        report_dir,
+        image_format=config.getoption("--screenshot-format"),
+        quality=config.getoption("--screenshot-quality"),
+        max_width=config.getoption("--screenshot-max-width"),
+        near_duplicate_distance=config.getoption("--screenshot-near-duplicates"),
+        step_budget=config.getoption("--step-screenshot-budget") * 1024,
+    )
+    config.stash[screenshot_pipeline_key] = screenshots
+    if config.getoption("--step-screenshots"):
+        allure_commons.plugin_manager.register(screenshots, "step_screenshots")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """With --step-screenshots, a capture at the end of each Allure step of the test body."""
+    screenshots = item.config.stash.get(screenshot_pipeline_key, None)
+    driver = item.funcargs.get("driver") if "driver" in item.fixturenames else None
+    if driver is None or not item.config.getoption("--step-screenshots"):
+        screenshots = None
+    if screenshots is not None:
+        screenshots.begin_test(driver, result_ref(item))
+    try:
+        yield
+    finally:
+        if screenshots is not None:
+            screenshots.end_test()
+
+
+@pytest.hookimpl(tryfirst=True, hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Screenshot on test failure; encoding and dedup happen in the background, it is linked at session end."""
+    outcome = yield
+    rep = outcome.get_result()
+    if rep.when != "call" or not rep.failed or will_retry(item) or "driver" not in item.fixturenames:
+        return
+    driver = item.funcargs.get("driver")
+    screenshots = item.config.stash.get(screenshot_pipeline_key, None)
+    if driver and screenshots is not None:
+        try:
+            screenshots.capture(driver, result_ref(item), "error_screenshot")
+        except Exception as exc:
+            print(f"Failed to capture screenshot for Allure: {exc}")
+
+
+def pytest_sessionfinish(session):
+    screenshots = session.config.stash.get(screenshot_pipeline_key, None)
+    if screenshots is not None and screenshots.captured:
+        if allure_commons.plugin_manager.is_registered(screenshots):
+            allure_commons.plugin_manager.unregister(screenshots)
+        linked = screenshots.finish()
+        print(f"\nScreenshots: {linked} linked to Allure results, {screenshots.summary()}")
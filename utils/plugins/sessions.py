@@ -0,0 +1,269 @@
+"""pytest plugin: how Appium sessions are opened, pooled and queued.
+
+The `driver` fixture gives each test class a session for `--platform`,
+`--env` and `--device`. Sessions go through the shared HTTP transport when
+`transport.enabled` is set, are reused across test classes with
+`sessionPool.enabled`, and on BrowserStack wait for a free slot of the
+account (`utils.cloud_grid`).
+"""
+import functools
+import os
+
+import pytest
+from appium import webdriver
+from appium.options.common import AppiumOptions
+
+from utils.case_matrix import forget_screen
+from utils.cloud_grid import CloudGrid, build_name
+from utils.device_pool import get_device
+from utils.mock_appium import MockAppiumServer, load_scenario
+from utils.plugins import artifact_path_for, will_retry
+from utils.plugins.device_metrics import device_metrics_on
+from utils.plugins.pages import profile_locators_on
+from utils.plugins.settings import load_config
+from utils.retry import INFRASTRUCTURE
+from utils.session_pool import SessionPool, renew_session, requested_capabilities, reset_app_state
+from utils.transport import Transport
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+session_pool_key = pytest.StashKey[SessionPool]()
+transport_key = pytest.StashKey[Transport]()
+cloud_grid_key = pytest.StashKey[CloudGrid]()
+
+
+def _build_local_capabilities(platform: str, config: dict, base_dir: str) -> dict:
+    """Return capabilities for local Android/iOS execution."""
+    if platform == "android":
+        caps = dict(config["android"])  # copy to avoid mutating loaded config
+        caps["app"] = os.path.join(base_dir, caps["app"])
+        return caps
+    if platform == "ios":
+        return dict(config["ios"])
+    raise ValueError(f"Platform {platform} is not supported for local run!")
+
+
+def _build_browserstack_capabilities(config: dict, platform: str) -> tuple[dict, str]:
+    """Return (capabilities, remote_url) for BrowserStack execution.
+
+    Uses values under the `browserstack` key in config.json.
+    Secrets (user/key) are intentionally placeholders and should be
+    overridden via environment variables in real pipelines.
+    """
+    bs_conf = config.get("browserstack", {})
+
+    user = os.getenv("BROWSERSTACK_USERNAME", bs_conf.get("user", "YOUR_USERNAME"))
+    key = os.getenv("BROWSERSTACK_ACCESS_KEY", bs_conf.get("key", "YOUR_ACCESS_KEY"))
+
+    # Generic capabilities for BrowserStack App Automate (Appium)
+    bstack_options = {
+        "userName": user,
+        "accessKey": key,
+        "projectName": bs_conf.get("projectName", "Mobile Automation Project"),
+        "buildName": build_name(bs_conf.get("buildName", "Local Build")),
+        "sessionName": bs_conf.get("sessionName", "Sample Test Session"),
+        "deviceName": bs_conf.get("deviceName", "Google Pixel 9"),
+        "osVersion": bs_conf.get("osVersion", "16.0"),
+    }
+
+    caps: dict = {
+        "platformName": platform.capitalize(),
+        "app": bs_conf.get("app", "bs://YOUR_UPLOADED_APP_ID"),
+        "bstack:options": bstack_options,
+    }
+
+    remote_url = bs_conf.get("remoteUrl", "http://hub.browserstack.com/wd/hub")
+    return caps, remote_url
+
+
+def open_session(remote_url: str, caps: dict, transport: Transport | None = None):
+    """Start a brand-new Appium session, on the shared transport when one is configured."""
+    options = AppiumOptions()
+    options.load_capabilities(caps)
+    driver = webdriver.Remote(transport.connection(remote_url) if transport else remote_url, options=options)
+    requested_capabilities[driver] = caps
+    return driver
+
+
+def recover_for_retry(config, driver, kind: str):
+    """Before a retry: a new session after an infrastructure failure (through the cloud grid if any), otherwise an app reset."""
+    forget_screen(driver)
+    if kind == INFRASTRUCTURE:
+        grid = config.stash.get(cloud_grid_key, None)
+        if grid is not None:
+            grid.renew_session(driver, renew_session)
+        else:
+            renew_session(driver)
+        return
+    pool_conf = load_config(config).get("sessionPool", {})
+    reset_app_state(driver, pool_conf.get("appId"), pool_conf.get("reset", "relaunch"), pool_conf.get("deepLink"))
+
+
+@pytest.fixture(scope="session")
+def session_pool(request):
+    """Appium sessions shared across test classes and modules.
+
+    Configured by the `sessionPool` section of config.json; sessions are
+    reset between classes and quit once at the end of the run.
+    """
+    pool_conf = load_config(request.config).get("sessionPool", {})
+    grid = request.config.stash.get(cloud_grid_key, None)
+    pool = SessionPool(
+        grid.open_session if grid is not None else functools.partial(
+            open_session, transport=request.config.stash.get(transport_key, None)),
+        max_uses=pool_conf.get("maxUses", 10),
+        app_id=pool_conf.get("appId"),
+        reset=pool_conf.get("reset", "relaunch"),
+        deep_link=pool_conf.get("deepLink"),
+        quit=grid.quit if grid is not None else None,
+    )
+    request.config.stash[session_pool_key] = pool
+
+    yield pool
+
+    pool.close()
+
+
+@pytest.fixture(scope="session")
+def mock_server(request):
+    """In-process mock Appium server playing the scripted app of `mock.scenario` (for --env=mock)."""
+    mock_conf = load_config(request.config).get("mock", {})
+    scenario = load_scenario(mock_conf.get("scenario", "mock_app.json"))
+    with MockAppiumServer(scenario, port=mock_conf.get("port", 0)) as server:
+        yield server
+
+
+@pytest.fixture(scope="class")
+def driver(request):
+    """Setup and teardown for the Appium driver based on platform and environment.
+
+    Examples:
+        pytest --platform=android --env=local
+        pytest --platform=android --env=local --device=emulator-5554
+        pytest --platform=android --env=browserstack
+        pytest --platform=android --env=mock
+    """
+    platform = request.config.getoption("--platform").lower()
+    env = request.config.getoption("--env").lower()
+    device_name = request.config.getoption("--device")
+
+    config = load_config(request.config)
+
+    if env == "browserstack":
+        caps, remote_url = _build_browserstack_capabilities(config, platform)
+    elif env == "mock":
+        caps = _build_local_capabilities(platform, config, ROOT)
+        remote_url = request.getfixturevalue("mock_server").url
+    else:
+        caps = _build_local_capabilities(platform, config, ROOT)
+        remote_url = "http://127.0.0.1:4723"
+        if device_name:
+            # Pool device: its own Appium server and device-pinning capabilities
+            device = get_device(config, device_name)
+            caps.update(device.capabilities)
+            remote_url = device.remote_url
+
+    # BrowserStack: sessions wait for a free slot of the account, see utils/cloud_grid.py
+    grid = request.config.stash.get(cloud_grid_key, None)
+
+    if not config.get("sessionPool", {}).get("enabled", False):
+        if grid is not None:
+            driver = grid.open_session(remote_url, caps)
+            grid.name_session(driver, request.node.nodeid)
+        else:
+            driver = open_session(remote_url, caps, request.config.stash.get(transport_key, None))
+        with device_metrics_on(request, driver, caps):
+            yield driver
+        profile_locators_on(request, driver)
+        # Teardown: Close the app after test
+        if grid is not None:
+            grid.quit(driver)
+        else:
+            driver.quit()
+        return
+
+    # Reuse a pooled session; it is reset on the next acquire, not quit
+    pool = request.getfixturevalue("session_pool")
+    driver = pool.acquire(remote_url, caps)
+    forget_screen(driver)  # a reused session was reset to the app's start screen
+    if grid is not None:
+        grid.name_session(driver, request.node.nodeid)
+
+    with device_metrics_on(request, driver, caps):
+        yield driver
+
+    profile_locators_on(request, driver)
+    pool.release(driver)
+
+
+def pytest_configure(config):
+    """Open sessions through the shared transport if enabled, and on BrowserStack through the cloud grid."""
+    settings = load_config(config)
+    if settings.get("transport", {}).get("enabled", False):
+        config.stash[transport_key] = Transport.from_settings(settings.get("transport", {}))
+    if config.getoption("--env").lower() == "browserstack":
+        # Sessions within the account's parallel-session limit, shared by every worker on the machine
+        config.stash[cloud_grid_key] = CloudGrid.from_settings(
+            functools.partial(open_session, transport=config.stash.get(transport_key, None)),
+            settings.get("browserstack", {}),
+        )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Start collecting cloud session queue time for this test (setup fixtures included)."""
+    grid = item.config.stash.get(cloud_grid_key, None)
+    if grid is not None:
+        grid.start_test(item.nodeid)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """Annotate the cloud session with the test it runs."""
+    grid = item.config.stash.get(cloud_grid_key, None)
+    driver = item.funcargs.get("driver") if "driver" in item.fixturenames else None
+    if grid is not None and driver is not None:
+        grid.annotate_test(driver, item.nodeid)
+    yield
+
+
+@pytest.hookimpl(tryfirst=True, hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Report cloud session queue time apart from the test, and mark the session of a failed test."""
+    outcome = yield
+    rep = outcome.get_result()
+
+    grid = item.config.stash.get(cloud_grid_key, None)
+    if grid is None:
+        return
+    if rep.when == "setup" and item.nodeid in grid.queued_by_test:
+        # Reported apart from the test: the test history leaves it out of the test's duration
+        rep.user_properties.append(("queue_seconds", grid.queued_by_test[item.nodeid]))
+    if rep.when == "call" and rep.failed and not will_retry(item) and "driver" in item.fixturenames:
+        driver = item.funcargs.get("driver")
+        if driver:
+            grid.test_failed(driver, item.nodeid)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Report session pool savings and cloud session queueing."""
+    pool = config.stash.get(session_pool_key, None)
+    if pool is not None:
+        terminalreporter.write_sep("-", "Appium session pool")
+        terminalreporter.write_line(pool.summary())
+
+    grid = config.stash.get(cloud_grid_key, None)
+    if grid is not None and grid.sessions:
+        terminalreporter.write_sep("-", "Cloud grid sessions")
+        terminalreporter.write_line(grid.summary())
+
+
+def pytest_sessionfinish(session):
+    """Close the shared transport and dump the cloud sessions next to the Allure results."""
+    transport = session.config.stash.get(transport_key, None)
+    if transport is not None:
+        transport.close()
+
+    grid = session.config.stash.get(cloud_grid_key, None)
+    if grid is not None and grid.sessions and session.config.getoption("allure_report_dir", None):
+        grid.dump(artifact_path_for(session.config, "cloud_grid.json"))
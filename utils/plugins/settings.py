@@ -0,0 +1,58 @@
+"""pytest plugin: the target of the run and its merged, validated configuration (see `utils.settings`)."""
+import os
+
+import pytest
+
+from utils.device_pool import get_device
+from utils.settings import CONFIG_DIR, load_settings, load_test_data
+
+settings_key = pytest.StashKey[dict]()
+
+
+def load_config(pytest_config) -> dict:
+    """The merged, validated configuration of this run."""
+    return pytest_config.stash[settings_key]
+
+
+def pytest_addoption(parser):
+    """Custom command line arguments to select platform and execution environment."""
+    parser.addoption(
+        "--platform",
+        action="store",
+        default="android",
+        help="Platform to run tests: android or ios",
+    )
+    parser.addoption(
+        "--env",
+        action="store",
+        default="local",
+        help="Execution environment: local, browserstack or mock (in-process scripted app, no device)",
+    )
+    parser.addoption(
+        "--device",
+        action="store",
+        default=None,
+        help="Name (or index) of a devicePool entry in config.json to run on",
+    )
+    parser.addoption(
+        "--config-override",
+        action="append",
+        default=[],
+        metavar="SECTION.KEY=VALUE",
+        help="Override a config.json value for this run (repeatable), e.g. sessionPool.maxUses=3",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """Fail on configuration mistakes before collection, let alone the first Appium session."""
+    env = config.getoption("--env").lower()
+    try:
+        settings = load_settings(config.getoption("--platform"), env, config.getoption("--config-override") or ())
+        if config.getoption("--device"):
+            get_device(settings, config.getoption("--device"))
+        if any(os.path.exists(os.path.join(CONFIG_DIR, name)) for name in ("test_data.json", f"test_data.{env}.json")):
+            load_test_data(env)
+    except ValueError as exc:
+        raise pytest.UsageError(f"Invalid configuration: {exc}") from None
+    config.stash[settings_key] = settings
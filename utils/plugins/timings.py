@@ -0,0 +1,52 @@
+"""pytest plugin: explicit-wait and network timings per test, attached to Allure and dumped as JSON."""
+import json
+
+import allure
+import pytest
+
+from utils.plugins import artifact_path_for, will_retry
+from utils.transport import timings as network_timings
+from utils.wait_engine import timings as wait_timings
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Start collecting explicit-wait and network timings for this test (setup fixtures included)."""
+    wait_timings.start_test(item.nodeid)
+    network_timings.start_test(item.nodeid)
+
+
+@pytest.hookimpl(tryfirst=True, hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    rep = outcome.get_result()
+    if rep.when != "call" or (rep.failed and will_retry(item)):
+        return
+
+    if wait_timings.by_test.get(item.nodeid):
+        allure.attach(
+            json.dumps(wait_timings.test_report(item.nodeid), indent=2),
+            name="wait_timings",
+            attachment_type=allure.attachment_type.JSON,
+        )
+    if network_timings.by_test.get(item.nodeid):
+        allure.attach(
+            json.dumps(network_timings.test_report(item.nodeid), indent=2),
+            name="network_timings",
+            attachment_type=allure.attachment_type.JSON,
+        )
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if any(network_timings.by_test.values()):
+        terminalreporter.write_sep("-", "Appium commands by total network time")
+        terminalreporter.write_line(network_timings.summary())
+
+
+def pytest_sessionfinish(session):
+    if not session.config.getoption("allure_report_dir", None):
+        return
+    if wait_timings.by_test:
+        wait_timings.dump(artifact_path_for(session.config, "wait_timings.json"))
+    if any(network_timings.by_test.values()):
+        network_timings.dump(artifact_path_for(session.config, "network_timings.json"))
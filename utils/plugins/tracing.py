@@ -0,0 +1,49 @@
+"""pytest plugin: nested timing spans of tests, Allure steps, page-object methods and driver commands (see `utils.tracing`)."""
+import allure_commons
+import pytest
+
+from pages.base_page import BasePage
+from pages.registry import discover
+from utils.composite_actions import CompositeAction
+from utils.plugins import artifact_path_for
+from utils.tracing import TracePlugin, Tracer, instrument_driver, instrument_pages
+
+trace_key = pytest.StashKey[TracePlugin]()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--trace-spans",
+        action="store",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="Write spans of tests, Allure steps, page-object methods and driver commands to PATH "
+             "(Chrome trace JSON, or one span per line for .jsonl; default: trace.json in the --alluredir)",
+    )
+
+
+def pytest_configure(config):
+    trace_path = config.getoption("--trace-spans")
+    if trace_path is None:
+        return
+    # Registered with pytest and allure_commons: spans for tests, phases and Allure steps
+    tracer = Tracer(trace_path or artifact_path_for(config, "trace.json"))
+    patched = (instrument_pages(tracer, [BasePage, *discover().values()], skip=("native", "actions"))
+               + instrument_pages(tracer, [CompositeAction], skip=("type", "click"))
+               + instrument_driver(tracer))
+    trace = TracePlugin(tracer, patched)
+    config.stash[trace_key] = trace
+    config.pluginmanager.register(trace, "trace_spans")
+    allure_commons.plugin_manager.register(trace, "trace_spans")
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session):
+    """After the other plugins' session-end work, which is traced too."""
+    trace = session.config.stash.get(trace_key, None)
+    if trace is not None:
+        allure_commons.plugin_manager.unregister(trace)
+        trace.close()
+        print(f"\nTrace: {trace.tracer.spans} spans written to {trace.tracer.path}")
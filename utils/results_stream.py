@@ -0,0 +1,167 @@
+"""Streaming test results and a live run summary, safe for parallel workers.
+
+Every worker process appends one JSON line per finished test to
+`<live_dir>/<worker>.jsonl` and rewrites its own running totals in
+`<live_dir>/<worker>-<pid>.summary.json` (atomic replace). Nothing is
+shared between processes, so there is nothing to collide on;
+`merged_summary` adds the totals up at any moment, and
+`merge_worker_results` folds the per-worker Allure directories into one
+once the run is over.
+
+The JSON artifacts a run dumps next to its Allure results (wait timings,
+locator profile, ...) are registered in `WORKER_ARTIFACTS` and written to
+`artifact_path`: a pool worker runs one pytest process per unit into the
+same directory, so each process writes its own `<name>-<pid>.json`, and
+the merge prefixes them with the worker name.
+
+    python -m utils.results_stream reports/live    # current totals
+"""
+import json
+import os
+import shutil
+import sys
+import time
+
+from utils.allure_results import ENVIRONMENT_COUNTERS, ENVIRONMENT_FILE, read_environment, update_environment
+
+WORKERS_DIR = "workers"
+# JSON artifacts dumped next to the Allure results; every dump goes through `artifact_path`
+WORKER_ARTIFACTS = (
+    "wait_timings.json",
+    "locator_profile.json",
+    "network_timings.json",
+    "device_metrics.json",
+    "cloud_grid.json",
+    "trace.json",
+)
+
+
+def artifact_path(report_dir: str, file_name: str, worker_id: str | None = None) -> str:
+    """Where this process dumps the artifact `file_name`: as is, or `<name>-<pid>.json` for a pool worker."""
+    if file_name not in WORKER_ARTIFACTS:
+        raise ValueError(f"{file_name} is not registered in WORKER_ARTIFACTS, worker merges would overwrite it")
+    if worker_id is None:
+        return os.path.join(report_dir, file_name)
+    stem, extension = os.path.splitext(file_name)
+    return os.path.join(report_dir, f"{stem}-{os.getpid()}{extension}")
+
+
+def is_artifact(file_name: str) -> bool:
+    """Whether `file_name` is a registered artifact, with or without a process suffix."""
+    for name in WORKER_ARTIFACTS:
+        stem, extension = os.path.splitext(name)
+        if file_name == name or (file_name.startswith(stem + "-") and file_name.endswith(extension)):
+            return True
+    return False
+
+
+class ResultStream:
+    """Appends finished tests of one worker process and keeps its totals current."""
+
+    def __init__(self, live_dir: str, worker_id: str = "main"):
+        self.live_dir = live_dir
+        self.worker_id = worker_id
+        self.results_path = os.path.join(live_dir, f"{worker_id}.jsonl")
+        self.summary_path = os.path.join(live_dir, f"{worker_id}-{os.getpid()}.summary.json")
+        self.totals = {"passed": 0, "failed": 0, "skipped": 0, "duration": 0.0}
+        self._phases: dict[str, dict] = {}
+
+    def pytest_runtest_logreport(self, report):
+        """pytest hook, active once the stream is registered as a plugin."""
+        self.add_report(report)
+
+    def add_report(self, report):
+        """Feed every `pytest_runtest_logreport` report; a test is written once its teardown is in."""
+        test = self._phases.setdefault(report.nodeid, {"outcome": "passed", "duration": 0.0, "longrepr": None})
+        test["duration"] += report.duration
+        if report.failed:
+            test["outcome"] = "failed"
+            test["longrepr"] = str(report.longrepr)[:500]
+        elif report.skipped and test["outcome"] == "passed":
+            test["outcome"] = "skipped"
+
+        if report.when == "teardown":
+            self._write(report.nodeid, self._phases.pop(report.nodeid))
+
+    def _write(self, node_id: str, test: dict):
+        line = {
+            "test": node_id,
+            "worker": self.worker_id,
+            "outcome": test["outcome"],
+            "duration": round(test["duration"], 3),
+            "finished": time.time(),
+            "error": test["longrepr"],
+        }
+        os.makedirs(self.live_dir, exist_ok=True)
+        with open(self.results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line) + "\n")
+
+        self.totals[test["outcome"]] += 1
+        self.totals["duration"] = round(self.totals["duration"] + test["duration"], 3)
+        tmp_path = f"{self.summary_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"worker": self.worker_id, "updated": time.time(), **self.totals}, f)
+        os.replace(tmp_path, self.summary_path)
+
+
+def merged_summary(live_dir: str) -> dict:
+    """Totals over every worker summary currently in `live_dir`."""
+    merged = {"passed": 0, "failed": 0, "skipped": 0, "duration": 0.0, "workers": 0}
+    if not os.path.isdir(live_dir):
+        return merged
+    for file_name in os.listdir(live_dir):
+        if not file_name.endswith(".summary.json"):
+            continue
+        try:
+            with open(os.path.join(live_dir, file_name), encoding="utf-8") as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue  # being replaced right now; picked up next time
+        for key in ("passed", "failed", "skipped", "duration"):
+            merged[key] += summary.get(key, 0)
+        merged["workers"] += 1
+    merged["duration"] = round(merged["duration"], 3)
+    return merged
+
+
+def format_summary(summary: dict) -> str:
+    return (
+        f"passed: {summary['passed']}  failed: {summary['failed']}  skipped: {summary['skipped']}  "
+        f"test time: {summary['duration']:.1f}s  worker processes: {summary['workers']}"
+    )
+
+
+def merge_worker_results(report_dir: str) -> int:
+    """Move `<report_dir>/workers/<worker>/*` into `report_dir` and return the number of files moved.
+
+    Allure result and attachment files have unique names and are moved as is;
+    `environment.properties` is merged key by key and JSON artifacts (`WORKER_ARTIFACTS`)
+    get the worker name as prefix.
+    """
+    workers_dir = os.path.join(report_dir, WORKERS_DIR)
+    if not os.path.isdir(workers_dir):
+        return 0
+
+    moved = 0
+    for worker in sorted(os.listdir(workers_dir)):
+        worker_dir = os.path.join(workers_dir, worker)
+        for file_name in os.listdir(worker_dir):
+            source = os.path.join(worker_dir, file_name)
+            if file_name == ENVIRONMENT_FILE:
+                properties = read_environment(worker_dir)
+                update_environment(
+                    report_dir,
+                    {key: value for key, value in properties.items() if key not in ENVIRONMENT_COUNTERS},
+                    add={key: value for key, value in properties.items() if key in ENVIRONMENT_COUNTERS},
+                )
+                continue
+            target_name = f"{worker}-{file_name}" if is_artifact(file_name) else file_name
+            shutil.move(source, os.path.join(report_dir, target_name))
+            moved += 1
+
+    shutil.rmtree(workers_dir)
+    return moved
+
+
+if __name__ == "__main__":
+    print(format_summary(merged_summary(sys.argv[1] if len(sys.argv) > 1 else os.path.join("reports", "live"))))
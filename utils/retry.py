@@ -0,0 +1,240 @@
+"""Failure classification, in-place retries and flake quarantine.
+
+A dead session, an Appium server error or a slow emulator fail a test just
+like a product bug does. Every call-phase failure is classified from its
+exception chain:
+
+* infrastructure: the session or the server broke (`InvalidSessionIdException`,
+  connection errors, a bare server-side `WebDriverException`);
+* timing: the app was slower than the wait (`TimeoutException`,
+  `StaleElementReferenceException`);
+* assertion: everything else, i.e. what the test is there to catch. This
+  includes a wait for an element that was never found at all
+  (`ElementNotFoundTimeout`): a wrong locator or a missing screen does not
+  pass on a rerun.
+
+`RetryPlugin` reruns infrastructure and timing failures right away, inside
+the same test protocol, after recovering the driver: a new session on the
+same driver object for infrastructure, an app reset for timing. Class
+fixtures are kept, so a retry costs one test, not a rerun of the suite.
+Setup errors are not retried, since pytest caches a failed class fixture.
+Report hooks can ask `will_retry` to leave a failure that is about to be
+retried alone (no screenshot, no AI analysis).
+
+The retry loop drives `_pytest.runner.runtestprotocol`, which is not public
+pytest API; requirements.txt pins the pytest release it was checked
+against (8.4). Retries are off unless `retry.maxRetries` or `--retries`
+asks for them.
+
+A test that only passed after a retry is recorded as `flaky` in the test
+history (`utils.timing_db`). Tests flaky in at least `quarantine_threshold`
+of their recent runs are quarantined: they still run, as non-strict xfail,
+so they neither fail the build nor drop out of the history.
+"""
+import http.client
+
+import pytest
+from _pytest.runner import runtestprotocol
+from pytest import CallInfo
+from selenium.common import (
+    InvalidSessionIdException,
+    NoSuchDriverException,
+    SessionNotCreatedException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from urllib3.exceptions import HTTPError
+
+from utils.timing_db import HistoryEntry
+from utils.wait_engine import ElementNotFoundTimeout
+
+INFRASTRUCTURE = "infrastructure"
+TIMING = "timing"
+ASSERTION = "assertion"
+KINDS = (INFRASTRUCTURE, TIMING, ASSERTION)
+
+INFRASTRUCTURE_ERRORS = (
+    InvalidSessionIdException,
+    NoSuchDriverException,
+    SessionNotCreatedException,
+    ConnectionError,
+    http.client.HTTPException,
+    HTTPError,
+)
+TIMING_ERRORS = (TimeoutException, StaleElementReferenceException)
+# Server-side failures Appium reports as a plain "unknown error"
+_INFRASTRUCTURE_MESSAGES = (
+    "instrumentation process is not running",
+    "session is either terminated or not started",
+    "socket hang up",
+    "could not proxy command",
+    "econnreset",
+    "econnrefused",
+)
+
+# (kind, driver) of the test's call-phase failure, set by the report hook
+failure_key = pytest.StashKey[tuple | None]()
+# Retries of the running test so far
+retries_key = pytest.StashKey[int]()
+
+
+def _kind(exc: BaseException) -> str | None:
+    if isinstance(exc, ElementNotFoundTimeout):
+        return ASSERTION
+    if isinstance(exc, INFRASTRUCTURE_ERRORS):
+        return INFRASTRUCTURE
+    if isinstance(exc, TIMING_ERRORS):
+        return TIMING
+    if isinstance(exc, WebDriverException):
+        message = (exc.msg or "").lower()
+        if type(exc) is WebDriverException or any(text in message for text in _INFRASTRUCTURE_MESSAGES):
+            return INFRASTRUCTURE
+    return None
+
+
+def classify(exc: BaseException) -> str:
+    """Kind of a test failure: the first classified error in its exception chain, else assertion."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        kind = _kind(exc)
+        if kind is not None:
+            return kind
+        exc = exc.__cause__ or exc.__context__
+    return ASSERTION
+
+
+def flake_rate(entry: HistoryEntry, window: int) -> float:
+    """Share of the last `window` runs that only passed after a retry."""
+    recent = entry.outcomes[:window]
+    return recent.count("flaky") / len(recent) if recent else 0.0
+
+
+class RetryPlugin:
+    """pytest plugin retrying infrastructure and timing failures, and quarantining flaky tests.
+
+    :param recover: Callable `(driver, kind)` that makes the test's driver
+        usable again before a retry; if it raises, the failure stands.
+    :param max_retries: Reruns per test.
+    :param retry_on: Failure kinds that are retried.
+    :param history: Test history (`HistoryPlugin.history`); without it nothing is quarantined.
+    :param quarantine_threshold: Flake rate from which a test is quarantined; 0 disables quarantine.
+    :param quarantine_min_runs: Runs a test needs in its history before it can be quarantined.
+    :param window: Recent runs the flake rate is computed over.
+    """
+
+    def __init__(self, recover=None, max_retries: int = 0, retry_on=(INFRASTRUCTURE, TIMING),
+                 history: dict[str, HistoryEntry] | None = None, quarantine_threshold: float = 0.3,
+                 quarantine_min_runs: int = 5, window: int = 20):
+        self.recover = recover
+        self.max_retries = max_retries
+        self.retry_on = tuple(retry_on)
+        self.history = history or {}
+        self.quarantine_threshold = quarantine_threshold
+        self.quarantine_min_runs = quarantine_min_runs
+        self.window = window
+
+        self.retried: list[tuple[str, str, bool]] = []  # (node id, kind, passed in the end)
+        self.quarantined: dict[str, float] = {}  # node id -> flake rate
+
+    @classmethod
+    def from_settings(cls, section, recover=None, history=None) -> "RetryPlugin":
+        """Build from the `retry` section of config.json."""
+        return cls(
+            recover=recover,
+            max_retries=section.get("maxRetries", 0),
+            retry_on=section.get("retryOn", (INFRASTRUCTURE, TIMING)),
+            history=history,
+            quarantine_threshold=section.get("quarantineThreshold", 0.3),
+            quarantine_min_runs=section.get("quarantineMinRuns", 5),
+            window=section.get("window", 20),
+        )
+
+    # --- Quarantine ---
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, items):
+        if not self.quarantine_threshold:
+            return
+        for item in items:
+            entry = self.history.get(item.nodeid)
+            if entry is None or len(entry.outcomes[:self.window]) < self.quarantine_min_runs:
+                continue
+            rate = flake_rate(entry, self.window)
+            if rate >= self.quarantine_threshold:
+                self.quarantined[item.nodeid] = rate
+                item.add_marker(pytest.mark.xfail(
+                    reason=f"quarantined: flaky in {rate:.0%} of its last {self.window} runs", strict=False,
+                ))
+
+    # --- Retries ---
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        if call.when == "call" and report.failed and call.excinfo is not None:
+            item.stash[failure_key] = (classify(call.excinfo.value), item.funcargs.get("driver"))
+
+    def will_retry(self, item) -> bool:
+        """Whether the call-phase failure just reported for `item` is going to be retried.
+
+        Set once this plugin's report hook has run, so callers use an
+        enclosing (tryfirst) hookwrapper. If recovering the driver fails, the
+        retry is dropped and the failure stands as reported.
+        """
+        kind, _ = item.stash.get(failure_key, None) or (None, None)
+        return kind in self.retry_on and item.stash.get(retries_key, 0) < self.max_retries
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        if not self.max_retries:
+            return None
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        kinds = []
+        while True:
+            item.stash[failure_key] = None
+            item.stash[retries_key] = len(kinds)
+            # Keep the class's fixtures (its driver) for a possible retry
+            reports = runtestprotocol(item, nextitem=item.parent, log=False)
+            kind, driver = item.stash[failure_key] or (None, None)
+            if not self.will_retry(item) or not self._recovered(driver, kind):
+                break
+            kinds.append(kind)
+            item.user_properties.append(("retry", kind))
+
+        reports[-1] = self._teardown(item, nextitem, reports[-1])
+        if kinds:
+            passed = all(not report.failed for report in reports)
+            self.retried.append((item.nodeid, kinds[-1], passed))
+        for report in reports:
+            item.ihook.pytest_runtest_logreport(report=report)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
+
+    def _recovered(self, driver, kind: str) -> bool:
+        if driver is None or self.recover is None:
+            return True
+        try:
+            self.recover(driver, kind)
+            return True
+        except Exception as exc:
+            print(f"Could not recover the session for a retry: {exc}")
+            return False
+
+    @staticmethod
+    def _teardown(item, nextitem, report):
+        """Tear down what the next test does not share (the class's fixtures after its last test)."""
+        call = CallInfo.from_call(lambda: item.session._setupstate.teardown_exact(nextitem), when="teardown",
+                                  reraise=(pytest.exit.Exception, KeyboardInterrupt))
+        if call.excinfo is None or report.failed:
+            return report
+        return item.ihook.pytest_runtest_makereport(item=item, call=call)
+
+    def summary(self) -> str:
+        lines = []
+        for node_id, kind, passed in self.retried:
+            lines.append(f"{'flaky ' if passed else 'FAILED'} {node_id} (retried after a {kind} failure)")
+        for node_id, rate in self.quarantined.items():
+            lines.append(f"quarantined {node_id} (flaky in {rate:.0%} of recent runs)")
+        return "\n".join(lines)
+
@@ -0,0 +1,194 @@
+"""Screenshot capture with off-thread encoding, deduplication and a size budget.
+
+Only `get_screenshot_as_png()` runs on the test thread. Downscaling,
+re-encoding (JPEG/WebP via Pillow), hashing and writing the file into the
+Allure results directory happen on a background worker. Identical images
+(same bytes) are stored once and linked from every test that captured
+them; the links are added at session end via `ResultIndex`.
+
+Near-identical step screenshots (perceptual hash within
+`near_duplicate_distance` bits) can share a stored image too. This is off
+by default: two screens that differ only in a validation message are a
+bit or two apart. Failure screenshots are never matched this way.
+
+Pillow is optional: without it screenshots stay PNG and only byte-identical
+duplicates are merged.
+"""
+import hashlib
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from types import SimpleNamespace
+
+import allure
+from allure_commons import hookimpl
+
+from utils.allure_results import ResultIndex
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency
+    Image = None
+
+FORMATS = {
+    "png": ("PNG", allure.attachment_type.PNG),
+    "jpeg": ("JPEG", allure.attachment_type.JPG),
+    "webp": ("WEBP", SimpleNamespace(mime_type="image/webp", extension="webp")),
+}
+
+
+def perceptual_hash(image) -> int:
+    """64-bit difference hash: robust to re-encoding, sensitive to layout changes."""
+    small = image.convert("L").resize((9, 8))
+    pixels = small.tobytes()  # one byte per pixel in mode "L"
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+class StoredImage:
+    """One image written to the results directory, possibly shared by many tests."""
+
+    def __init__(self, source: str, size: int, attachment_type, phash: int | None):
+        self.source = source
+        self.size = size
+        self.attachment_type = attachment_type
+        self.phash = phash
+
+
+class ScreenshotPipeline:
+    """Encodes and stores screenshots in the background.
+
+    :param report_dir: Allure results directory the images are written to.
+    :param image_format: "jpeg", "webp" or "png".
+    :param quality: Encoder quality for JPEG/WebP (1-95).
+    :param max_width: Downscale wider screenshots to this width; 0 keeps the original size.
+    :param near_duplicate_distance: Max perceptual-hash distance (bits) to treat two step screenshots as
+        the same; 0 only merges byte-identical images.
+    :param step_budget: Bytes of step screenshots allowed per test.
+    """
+
+    def __init__(self, report_dir: str, image_format: str = "jpeg", quality: int = 70, max_width: int = 720,
+                 near_duplicate_distance: int = 0, step_budget: int = 2 * 1024 * 1024):
+        if Image is None and image_format != "png":
+            print(f"Pillow is not installed, storing screenshots as PNG instead of {image_format}.")
+            image_format = "png"
+        self.report_dir = report_dir
+        self.pil_format, self.attachment_type = FORMATS[image_format]
+        self.quality = quality
+        self.max_width = max_width
+        self.near_duplicate_distance = near_duplicate_distance
+        self.step_budget = step_budget
+
+        self._index = ResultIndex(report_dir)  # only used to write files until `finish`
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshots")
+        self._lock = threading.Lock()
+        self._by_digest: dict[str, StoredImage] = {}
+        self._stored: list[StoredImage] = []
+        self._links: list[tuple[str, str, object]] = []  # (ref, name, future -> StoredImage)
+        self._step_bytes: dict[str, int] = {}
+
+        # Step capture state, see `begin_test`
+        self.driver = None
+        self.ref: str | None = None
+
+        self.captured = 0
+        self.raw_bytes = 0
+
+    def capture(self, driver, ref: str, name: str, near_duplicates: bool = False):
+        """Grab a screenshot now and queue it for encoding; returns the future of its StoredImage.
+
+        :param near_duplicates: May reuse a stored image within `near_duplicate_distance` bits (step screenshots).
+        """
+        png = driver.get_screenshot_as_png()
+        self.captured += 1
+        self.raw_bytes += len(png)
+        future = self._executor.submit(self._store, png, near_duplicates)
+        self._links.append((ref, name, future))
+        return future
+
+    # --- Step screenshots (allure_commons hooks) ---
+    def begin_test(self, driver, ref: str):
+        """Capture a screenshot at the end of every Allure step of this test."""
+        self.driver, self.ref = driver, ref
+        self._step_bytes.setdefault(ref, 0)
+
+    def end_test(self):
+        self.driver, self.ref = None, None
+
+    @hookimpl
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        """allure_commons hook, active once the pipeline is registered with `allure_commons.plugin_manager`."""
+        if self.driver is None or self._step_bytes.get(self.ref, 0) >= self.step_budget:
+            return
+        try:
+            future = self.capture(self.driver, self.ref, "step_screenshot", near_duplicates=True)
+        except Exception as exc:
+            print(f"Failed to capture step screenshot: {exc}")
+            return
+        ref = self.ref
+        future.add_done_callback(lambda done: self._count_step_bytes(ref, done))
+
+    def _count_step_bytes(self, ref: str, future):
+        if future.exception() is None:
+            with self._lock:
+                self._step_bytes[ref] = self._step_bytes.get(ref, 0) + future.result().size
+
+    # --- Background work ---
+    def _store(self, png: bytes, near_duplicates: bool = False) -> StoredImage:
+        digest = hashlib.sha256(png).hexdigest()
+        with self._lock:
+            if digest in self._by_digest:
+                return self._by_digest[digest]
+
+        body, phash = png, None
+        if Image is not None:
+            image = Image.open(io.BytesIO(png))
+            phash = perceptual_hash(image)
+            if near_duplicates and self.near_duplicate_distance:
+                with self._lock:
+                    for stored in self._stored:
+                        if stored.phash is not None and bin(stored.phash ^ phash).count("1") <= self.near_duplicate_distance:
+                            return stored
+            body = self._encode(image)
+
+        stored = StoredImage(self._index.write_attachment(body, self.attachment_type), len(body),
+                             self.attachment_type, phash)
+        with self._lock:
+            self._by_digest[digest] = stored
+            self._stored.append(stored)
+        return stored
+
+    def _encode(self, image) -> bytes:
+        if self.max_width and image.width > self.max_width:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height), Image.LANCZOS)
+        if self.pil_format == "JPEG":
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        options = {"optimize": True} if self.pil_format == "PNG" else {"quality": self.quality}
+        image.save(out, self.pil_format, **options)
+        return out.getvalue()
+
+    def finish(self, timeout: float | None = 60) -> int:
+        """Wait for pending encodings, link every screenshot to its test and return the link count."""
+        wait([future for _, _, future in self._links], timeout=timeout)
+        self._executor.shutdown(wait=True)
+        index = ResultIndex(self.report_dir)
+        linked = 0
+        for ref, name, future in self._links:
+            if future.done() and future.exception() is None:
+                stored = future.result()
+                linked += index.link(ref, name, stored.source, stored.attachment_type)
+            elif future.done():
+                print(f"Failed to encode screenshot: {future.exception()}")
+        return linked
+
+    def summary(self) -> str:
+        stored_bytes = sum(image.size for image in self._stored)
+        return (
+            f"{self.captured} captured, {len(self._stored)} stored after dedup, "
+            f"{self.raw_bytes / 1024:.0f} KB raw -> {stored_bytes / 1024:.0f} KB on disk"
+        )
@@ -0,0 +1,187 @@
+"""Keeps Appium sessions alive across test classes instead of quitting them.
+
+Creating a session installs/launches the app and costs 10-30s on a real
+device. The pool hands an idle session with the same capabilities back to
+the next class after a cheap app reset, and only recycles it after
+`max_uses` hand-outs or when it stops answering.
+"""
+import json
+import time
+import weakref
+
+from selenium.common import WebDriverException
+
+from utils.page_source import snapshot_cache_for
+
+RESET_STRATEGIES = ("relaunch", "clear", "none")
+
+# Capabilities each driver's session was requested with, for `renew_session`
+requested_capabilities: "weakref.WeakKeyDictionary[object, dict]" = weakref.WeakKeyDictionary()
+
+
+def reset_app_state(driver, app_id: str | None, strategy: str = "relaunch", deep_link: str | None = None):
+    """Bring the app back to its start screen without a new session.
+
+    :param app_id: Android package / iOS bundle id of the app under test.
+    :param strategy: "relaunch" (terminate + activate), "clear" (also wipe app
+        data, Android only) or "none".
+    :param deep_link: Optional URL opened afterwards to land on the start screen.
+    """
+    if strategy not in RESET_STRATEGIES:
+        raise ValueError(f"Unknown reset strategy '{strategy}', expected one of {RESET_STRATEGIES}")
+
+    if app_id and strategy != "none":
+        driver.terminate_app(app_id)
+        if strategy == "clear":
+            driver.execute_script("mobile: clearApp", {"appId": app_id})
+        driver.activate_app(app_id)
+
+    if deep_link:
+        driver.execute_script("mobile: deepLink", {"url": deep_link, "package": app_id})
+    # The driver object is reused: its cached page source shows the screen before the reset
+    snapshot_cache_for(driver).invalidate()
+
+
+def renew_session(driver):
+    """Replace a broken session by a new one on the same driver object.
+
+    Fixtures, page objects and caches keep their reference to the driver, so
+    the test can be retried without tearing down its class.
+    """
+    try:
+        driver.quit()
+    except Exception:
+        pass  # the old session is usually gone already
+    driver.start_session(requested_capabilities[driver])
+    snapshot_cache_for(driver).invalidate()
+
+
+def is_healthy(driver) -> bool:
+    """Cheap liveness probe: GET /timeouts is answered by the server without touching the device."""
+    try:
+        driver.timeouts
+        return True
+    except WebDriverException:
+        return False
+
+
+class PooledSession:
+    """A live driver plus the bookkeeping the pool needs to recycle it."""
+
+    def __init__(self, key: str, driver, setup_seconds: float):
+        self.key = key
+        self.driver = driver
+        self.setup_seconds = setup_seconds
+        self.uses = 0
+
+
+class SessionPool:
+    """Pool of Appium sessions keyed by (remote_url, capabilities).
+
+    :param factory: Callable `(remote_url, caps) -> driver` that opens a new session.
+    :param max_uses: Recycle a session after it has been handed out this many times.
+    :param app_id: App to reset between users, see `reset_app_state`.
+    :param reset: Reset strategy applied before a session is reused.
+    :param deep_link: Optional deep link opened after the reset.
+    :param quit: Callable `(driver)` that ends a session; `driver.quit()` by default.
+    """
+
+    def __init__(self, factory, max_uses: int = 10, app_id: str | None = None, reset: str = "relaunch",
+                 deep_link: str | None = None, quit=None):
+        self.factory = factory
+        self.quit = quit or (lambda driver: driver.quit())
+        self.max_uses = max_uses
+        self.app_id = app_id
+        self.reset = reset
+        self.deep_link = deep_link
+
+        self._idle: dict[str, list[PooledSession]] = {}
+        self._busy: dict[int, PooledSession] = {}
+
+        # Stats for the end-of-run summary
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self.setup_seconds = 0.0
+        self.reset_seconds = 0.0
+
+    @staticmethod
+    def make_key(remote_url: str, caps: dict) -> str:
+        return f"{remote_url}|{json.dumps(caps, sort_keys=True, default=str)}"
+
+    def acquire(self, remote_url: str, caps: dict):
+        """Return a ready driver, reusing an idle session when one is healthy."""
+        key = self.make_key(remote_url, caps)
+        idle = self._idle.get(key, [])
+
+        while idle:
+            session = idle.pop()
+            if not is_healthy(session.driver):
+                self._discard(session)
+                continue
+            started = time.monotonic()
+            try:
+                reset_app_state(session.driver, self.app_id, self.reset, self.deep_link)
+            except WebDriverException as exc:
+                print(f"Session reset failed, opening a new one: {exc}")
+                self._discard(session)
+                continue
+            self.reset_seconds += time.monotonic() - started
+            self.reused += 1
+            return self._hand_out(session)
+
+        started = time.monotonic()
+        driver = self.factory(remote_url, caps)
+        elapsed = time.monotonic() - started
+        self.created += 1
+        self.setup_seconds += elapsed
+        return self._hand_out(PooledSession(key, driver, elapsed))
+
+    def release(self, driver, healthy: bool = True):
+        """Give a driver back; it is quit instead if it is worn out or unhealthy."""
+        session = self._busy.pop(id(driver), None)
+        if session is None:
+            return
+        if not healthy or session.uses >= self.max_uses or not is_healthy(driver):
+            self._discard(session)
+            return
+        self._idle.setdefault(session.key, []).append(session)
+
+    def close(self):
+        """Quit every session the pool still holds."""
+        for sessions in self._idle.values():
+            for session in sessions:
+                self._quit(session.driver)
+        for session in self._busy.values():
+            self._quit(session.driver)
+        self._idle.clear()
+        self._busy.clear()
+
+    @property
+    def saved_seconds(self) -> float:
+        """Setup time avoided by reuse: mean creation time per reuse, minus the resets."""
+        if not self.created:
+            return 0.0
+        return self.reused * (self.setup_seconds / self.created) - self.reset_seconds
+
+    def summary(self) -> str:
+        return (
+            f"sessions created: {self.created}, reused: {self.reused}, recycled: {self.recycled}, "
+            f"setup: {self.setup_seconds:.1f}s, resets: {self.reset_seconds:.1f}s, "
+            f"saved: ~{max(self.saved_seconds, 0.0):.1f}s"
+        )
+
+    def _hand_out(self, session: PooledSession):
+        session.uses += 1
+        self._busy[id(session.driver)] = session
+        return session.driver
+
+    def _discard(self, session: PooledSession):
+        self.recycled += 1
+        self._quit(session.driver)
+
+    def _quit(self, driver):
+        try:
+            self.quit(driver)
+        except WebDriverException as exc:
+            print(f"Failed to quit pooled session: {exc}")
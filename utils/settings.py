@@ -0,0 +1,327 @@
+"""Layered, validated and cached configuration and test data.
+
+Configuration is merged from, in order of precedence (last wins):
+
+1. `config/config.json`
+2. `config/config.<platform>.json` (optional)
+3. `config/config.<env>.json` (optional)
+4. environment variables `MOBILE_CFG__<section>__<key>=<json or string>`
+5. command-line overrides `--config-override <section>.<key>=<json or string>`
+
+The result is validated against `CONFIG_SCHEMA` and returned as a read-only
+view, cached per process, so a typo fails the run in `pytest_configure`
+before any Appium session is opened. Test data (`config/test_data.json`
+plus an optional `config/test_data.<env>.json`) is loaded the same way, and
+large data sets are read from JSONL lazily, one record at a time.
+"""
+import functools
+import json
+import os
+from types import MappingProxyType
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config")
+ENV_PREFIX = "MOBILE_CFG__"
+PLATFORMS = ("android", "ios")
+
+
+class ConfigError(ValueError):
+    """Invalid configuration or test data; the message names the offending key."""
+
+
+# --- Schema ---
+# A schema is a type, a tuple of allowed types/values, a dict of key -> (schema, required)
+# for objects, or a one-element list for arrays of that schema.
+OPTIONAL_STR = (str, type(None))
+
+CAPABILITIES = {
+    "platformName": (str, True),
+    "automationName": (str, False),
+    "deviceName": (str, False),
+    "platformVersion": (str, False),
+    "app": (str, False),
+    "*": (object, False),  # any further Appium capability
+}
+
+CONFIG_SCHEMA = {
+    "android": (CAPABILITIES, False),
+    "ios": (CAPABILITIES, False),
+    "browserstack": ({
+        "user": (str, False),
+        "key": (str, False),
+        "remoteUrl": (str, False),
+        "app": (str, False),
+        "deviceName": (str, False),
+        "osVersion": (str, False),
+        "projectName": (str, False),
+        "buildName": (str, False),
+        "sessionName": (str, False),
+        "maxParallelSessions": (int, False),
+        "queueTimeout": ((int, float), False),
+        "backoff": ((int, float), False),
+        "maxBackoff": ((int, float), False),
+        "lockDir": (OPTIONAL_STR, False),
+    }, False),
+    "sessionPool": ({
+        "enabled": (bool, False),
+        "maxUses": (int, False),
+        "appId": (OPTIONAL_STR, False),
+        "reset": (("relaunch", "clear", "none"), False),
+        "deepLink": (OPTIONAL_STR, False),
+    }, False),
+    "devicePool": ([{
+        "name": (str, False),
+        "remoteUrl": (str, True),
+        "capabilities": ({"*": (object, False)}, False),
+    }], False),
+    "transport": ({
+        "enabled": (bool, False),
+        "poolSize": (int, False),
+        "connectTimeout": ((int, float), False),
+        "readTimeout": ((int, float), False),
+        "retries": (int, False),
+        "backoff": ((int, float), False),
+        "compress": (bool, False),
+        "compressRequests": (bool, False),
+        "compressMinBytes": (int, False),
+    }, False),
+    "mock": ({
+        "scenario": (str, False),
+        "port": (int, False),
+    }, False),
+    "deviceMetrics": ({
+        "interval": ((int, float), False),
+        "packageName": (OPTIONAL_STR, False),
+        "metrics": ([("cpu", "memory", "frames")], False),
+        "baseline": (str, False),
+        "tolerance": ((int, float), False),
+    }, False),
+    "retry": ({
+        "maxRetries": (int, False),
+        "retryOn": ([("infrastructure", "timing", "assertion")], False),
+        "quarantineThreshold": ((int, float), False),
+        "quarantineMinRuns": (int, False),
+        "window": (int, False),
+    }, False),
+}
+
+TEST_DATA_SCHEMA = {"*": ({"*": (str, False)}, False)}  # user key -> {field: string}
+
+
+def _type_name(schema) -> str:
+    if isinstance(schema, tuple):
+        return " or ".join(repr(s) if not isinstance(s, type) else s.__name__ for s in schema)
+    return schema.__name__
+
+
+def validate(value, schema, path: str = "", partial: bool = False) -> None:
+    """Raise ConfigError if `value` does not match `schema`.
+
+    :param partial: Do not require required keys (for a single overlay layer).
+    """
+    where = path or "<root>"
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            raise ConfigError(f"{where}: expected an object, got {type(value).__name__}")
+        for key, item in value.items():
+            if key not in schema and "*" not in schema:
+                raise ConfigError(f"{where}: unknown key '{key}' (expected one of: {', '.join(sorted(schema))})")
+            validate(item, schema.get(key, schema.get("*"))[0], f"{path}.{key}" if path else key, partial)
+        for key, (_, required) in schema.items():
+            if required and not partial and key not in value:
+                raise ConfigError(f"{where}: missing required key '{key}'")
+    elif isinstance(schema, list):
+        if not isinstance(value, list):
+            raise ConfigError(f"{where}: expected a list, got {type(value).__name__}")
+        for index, item in enumerate(value):
+            validate(item, schema[0], f"{path}[{index}]", partial)
+    elif schema is object:
+        return
+    elif isinstance(schema, tuple):
+        types = tuple(s for s in schema if isinstance(s, type))
+        values = [s for s in schema if not isinstance(s, type)]
+        if not (types and isinstance(value, types)) and value not in values:
+            raise ConfigError(f"{where}: expected {_type_name(schema)}, got {value!r}")
+    elif not isinstance(value, schema) or (schema is int and isinstance(value, bool)):
+        raise ConfigError(f"{where}: expected {_type_name(schema)}, got {type(value).__name__} {value!r}")
+
+
+# --- Layering ---
+def deep_merge(base: dict, overlay: dict) -> dict:
+    """Copy of `base` with `overlay` merged in; nested objects merge, everything else is replaced."""
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _parse_value(raw: str):
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def _nested(path: list[str], value) -> dict:
+    for key in reversed(path):
+        value = {key: value}
+    return value
+
+
+def parse_overrides(overrides) -> dict:
+    """`["sessionPool.maxUses=5", ...]` -> `{"sessionPool": {"maxUses": 5}}`."""
+    merged: dict = {}
+    for override in overrides:
+        key, sep, raw = override.partition("=")
+        if not sep or not key:
+            raise ConfigError(f"Config override '{override}' must look like section.key=value")
+        merged = deep_merge(merged, _nested(key.split("."), _parse_value(raw)))
+    return merged
+
+
+def environment_overrides(environ) -> dict:
+    """`MOBILE_CFG__sessionPool__maxUses=5` -> `{"sessionPool": {"maxUses": 5}}`."""
+    merged: dict = {}
+    for name, raw in sorted(environ.items()):
+        if name.startswith(ENV_PREFIX):
+            merged = deep_merge(merged, _nested(name[len(ENV_PREFIX):].split("__"), _parse_value(raw)))
+    return merged
+
+
+def _read_json(path: str, required: bool = True) -> dict:
+    if not os.path.exists(path):
+        if required:
+            raise ConfigError(f"{path} does not exist")
+        return {}
+    with open(path, encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except ValueError as exc:
+            raise ConfigError(f"{path}: invalid JSON ({exc})") from None
+
+
+def freeze(value):
+    """Read-only view: objects become mapping proxies and lists become tuples, recursively."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def _load_settings(platform: str, env: str, overrides: tuple, environment: tuple, config_dir: str):
+    layers = [
+        ("config.json", _read_json(os.path.join(config_dir, "config.json"))),
+        (f"config.{platform}.json", _read_json(os.path.join(config_dir, f"config.{platform}.json"), required=False)),
+        (f"config.{env}.json", _read_json(os.path.join(config_dir, f"config.{env}.json"), required=False)),
+        (f"{ENV_PREFIX}* environment variables", environment_overrides(dict(environment))),
+        ("--config-override", parse_overrides(overrides)),
+    ]
+    merged: dict = {}
+    for name, layer in layers:
+        try:
+            validate(layer, CONFIG_SCHEMA, partial=True)
+        except ConfigError as exc:
+            raise ConfigError(f"{name}: {exc}") from None
+        merged = deep_merge(merged, layer)
+    validate(merged, CONFIG_SCHEMA)
+
+    if platform not in PLATFORMS:
+        raise ConfigError(f"Platform '{platform}' is not supported (expected one of: {', '.join(PLATFORMS)})")
+    if env != "browserstack" and platform not in merged:
+        raise ConfigError(f"No '{platform}' capabilities configured for a {env} run")
+    pool = merged.get("sessionPool", {})
+    if pool.get("enabled") and pool.get("reset", "relaunch") != "none" and not pool.get("appId"):
+        raise ConfigError("sessionPool.enabled needs sessionPool.appId, the app reset between classes "
+                          "(or sessionPool.reset 'none')")
+    return freeze(merged)
+
+
+def load_settings(platform: str = "android", env: str = "local", overrides=(), environ=None,
+                  config_dir: str = CONFIG_DIR):
+    """Merged, validated, read-only configuration for the platform/env; parsed once per process."""
+    environ = os.environ if environ is None else environ
+    environment = tuple(sorted((k, v) for k, v in environ.items() if k.startswith(ENV_PREFIX)))
+    return _load_settings(platform.lower(), env.lower(), tuple(overrides), environment, config_dir)
+
+
+@functools.lru_cache(maxsize=None)
+def load_test_data(env: str = "local", config_dir: str = CONFIG_DIR):
+    """`test_data.json` with the `test_data.<env>.json` overlay; validated, read-only, cached.
+
+    Either file may be missing, but not both.
+    """
+    overlay = os.path.join(config_dir, f"test_data.{env}.json")
+    data = _read_json(os.path.join(config_dir, "test_data.json"), required=not os.path.exists(overlay))
+    data = deep_merge(data, _read_json(overlay, required=False))
+    try:
+        validate(data, TEST_DATA_SCHEMA)
+    except ConfigError as exc:
+        raise ConfigError(f"test_data.json: {exc}") from None
+    return freeze(data)
+
+
+class JsonlDataset:
+    """A JSONL data set indexed by byte offset, so records are read one at a time.
+
+    Opening the data set streams the file once to validate every line and
+    remember where it starts; only offsets and ids stay in memory.
+
+    :param path: JSONL file, one JSON object per line (blank lines are skipped).
+    :param required: Keys every record must have.
+    :param id_key: Record key used as the pytest id (default: `id`, else the line number).
+    """
+
+    def __init__(self, path: str, required=(), id_key: str = "id"):
+        self.path = path
+        self.offsets: list[int] = []
+        self.ids: list[str] = []
+        with open(path, "rb") as f:
+            line_number = 0
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                line_number += 1
+                if not line.strip():
+                    continue
+                record = self._parse(line, line_number)
+                missing = [key for key in required if key not in record]
+                if missing:
+                    raise ConfigError(f"{path}:{line_number}: missing {', '.join(missing)}")
+                self.offsets.append(offset)
+                self.ids.append(str(record.get(id_key, f"line{line_number}")))
+
+    def _parse(self, line: bytes, line_number) -> dict:
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise ConfigError(f"{self.path}:{line_number}: invalid JSON ({exc})") from None
+        if not isinstance(record, dict):
+            raise ConfigError(f"{self.path}:{line_number}: expected an object")
+        return record
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def read(self, offset: int) -> dict:
+        """The record starting at `offset` (one of `offsets`)."""
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return self._parse(f.readline(), f"@{offset}")
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            for offset in self.offsets:
+                f.seek(offset)
+                yield self._parse(f.readline(), f"@{offset}")
+
+
+@functools.lru_cache(maxsize=None)
+def dataset(path: str, required: tuple = (), id_key: str = "id") -> JsonlDataset:
+    """Cached `JsonlDataset`; relative paths are resolved against the config directory."""
+    return JsonlDataset(path if os.path.isabs(path) else os.path.join(CONFIG_DIR, path), required, id_key)
@@ -0,0 +1,216 @@
+"""Per-test timing and outcome history, and the run ordering built on it.
+
+Every finished test is stored in a local SQLite database keyed by node id,
+platform and env. `HistoryPlugin` (pytest `--history`, always on under
+`run_tests.py`) records the run and, with `--recent-failures-first`, moves
+tests that failed in one of their last runs to the front (class by class,
+since the driver is class-scoped). Once there is a history, it also prints
+the expected run time after collection. `UnitDurations` gives `DeviceScheduler` the expected duration of a unit as the sum of its
+tests, so the pool is packed longest-first from the same data.
+
+Outcomes are `passed`, `failed`, `skipped` and `flaky` (passed only after a
+retry, see `utils.retry`); an xfailed test counts as failed, so quarantined
+tests keep their history.
+"""
+import os
+import sqlite3
+import statistics
+import time
+from contextlib import closing, contextmanager
+
+from utils.device_pool import unit_key
+
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".test_history.sqlite")
+DEFAULT_TEST_DURATION = 10.0
+RECENT_RUNS = 3  # a test "recently failed" if it failed in one of its last RECENT_RUNS runs
+EXPECTED_FROM = 5  # expected duration = median of the last EXPECTED_FROM runs
+KEEP_RUNS = 50  # rows kept per test and target
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    node_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    env TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_test ON results (platform, env, node_id, finished);
+"""
+
+
+class HistoryEntry:
+    """What the history says about one test on one platform/env."""
+
+    def __init__(self, durations: list[float], outcomes: list[str]):
+        self.durations = durations  # newest first
+        self.outcomes = outcomes  # newest first
+
+    @property
+    def expected(self) -> float:
+        return statistics.median(self.durations[:EXPECTED_FROM])
+
+    @property
+    def recently_failed(self) -> bool:
+        return "failed" in self.outcomes[:RECENT_RUNS]
+
+
+class TimingDB:
+    """SQLite store of test results; safe to share between parallel worker processes."""
+
+    def __init__(self, path: str = HISTORY_FILE):
+        self.path = path
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Connection committed (or rolled back) and closed on exit."""
+        with closing(sqlite3.connect(self.path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def record(self, rows: list[tuple[str, str, str, str, float]]):
+        """Store `(node_id, platform, env, outcome, duration)` rows and drop rows beyond KEEP_RUNS per test."""
+        finished = time.time()
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                [(*row, finished) for row in rows],
+            )
+            connection.execute(
+                """
+                DELETE FROM results WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, ROW_NUMBER() OVER (
+                            PARTITION BY platform, env, node_id ORDER BY finished DESC
+                        ) AS age FROM results
+                    ) WHERE age > ?
+                )
+                """,
+                (KEEP_RUNS,),
+            )
+
+    def load(self, platform: str, env: str) -> dict[str, HistoryEntry]:
+        """History of every known test on this platform/env (skipped runs are ignored)."""
+        entries: dict[str, HistoryEntry] = {}
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT node_id, outcome, duration FROM results "
+                "WHERE platform = ? AND env = ? AND outcome != 'skipped' ORDER BY finished DESC",
+                (platform, env),
+            )
+            for node_id, outcome, duration in rows:
+                entry = entries.setdefault(node_id, HistoryEntry([], []))
+                entry.durations.append(duration)
+                entry.outcomes.append(outcome)
+        return entries
+
+
+def expected_duration(history: dict[str, HistoryEntry], node_id: str) -> float:
+    """Expected duration of a test; unknown tests get the mean of the known ones."""
+    if node_id in history:
+        return history[node_id].expected
+    if history:
+        return statistics.mean(entry.expected for entry in history.values())
+    return DEFAULT_TEST_DURATION
+
+
+def recent_failures_first(node_ids: list[str], history: dict[str, HistoryEntry]) -> list[str]:
+    """Reorder node ids so recently failed tests come first without splitting units.
+
+    Units holding a recent failure move to the front (in their original
+    order) and inside each unit the recently failed tests lead.
+    """
+    units: dict[str, list[str]] = {}
+    for node_id in node_ids:
+        units.setdefault(unit_key(node_id), []).append(node_id)
+
+    def failed(node_id):
+        return node_id in history and history[node_id].recently_failed
+
+    ordered_units = sorted(units.values(), key=lambda unit: not any(failed(node_id) for node_id in unit))
+    return [node_id for unit in ordered_units for node_id in sorted(unit, key=lambda node_id: not failed(node_id))]
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(round(seconds), 60)
+    return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+
+class HistoryPlugin:
+    """pytest plugin: records results into the `TimingDB` and orders/estimates the run from it."""
+
+    def __init__(self, db: TimingDB, platform: str, env: str, failed_first: bool = False):
+        self.db = db
+        self.platform = platform
+        self.env = env
+        self.failed_first = failed_first
+        self.history = db.load(platform, env)
+        self._phases: dict[str, list] = {}
+        self._rows: list[tuple[str, str, str, str, float]] = []
+
+    def pytest_collection_modifyitems(self, items):
+        if not self.failed_first:
+            return
+        by_id = {item.nodeid: item for item in items}
+        items[:] = [by_id[node_id] for node_id in recent_failures_first(list(by_id), self.history)]
+
+    def pytest_report_collectionfinish(self, items):
+        if not items or not self.history:
+            return None
+        estimate = sum(expected_duration(self.history, item.nodeid) for item in items)
+        unknown = sum(item.nodeid not in self.history for item in items)
+        failing = sum(item.nodeid in self.history and self.history[item.nodeid].recently_failed for item in items)
+        line = f"history: {len(items)} tests, estimated {format_duration(estimate)}"
+        if unknown:
+            line += f" ({unknown} without history)"
+        if failing:
+            line += f", {failing} recently failed" + (" (running first)" if self.failed_first else "")
+        return line
+
+    def pytest_runtest_logreport(self, report):
+        test = self._phases.setdefault(report.nodeid, ["passed", 0.0])
+        test[1] += report.duration
+        if report.when == "setup":
+            # Waiting for a cloud session slot says nothing about the test itself
+            test[1] -= sum(seconds for name, seconds in report.user_properties if name == "queue_seconds")
+        if report.failed or (report.skipped and hasattr(report, "wasxfail")):
+            test[0] = "failed"
+        elif report.when == "call" and test[0] == "passed" and any(
+                name == "retry" for name, _ in report.user_properties):
+            test[0] = "flaky"
+        elif report.skipped and test[0] == "passed":
+            test[0] = "skipped"
+        if report.when == "teardown":
+            outcome, duration = self._phases.pop(report.nodeid)
+            self._rows.append((report.nodeid, self.platform, self.env, outcome, round(duration, 3)))
+
+    def pytest_sessionfinish(self):
+        if self._rows:
+            self.db.record(self._rows)
+            self._rows = []
+
+
+class UnitDurations:
+    """`DeviceScheduler` history backed by the timing database.
+
+    A unit is expected to take as long as its tests together. Nothing is
+    recorded here: the worker processes record every test themselves.
+    """
+
+    def __init__(self, db: TimingDB, units: dict[str, list[str]], platform: str, env: str):
+        self.units = units
+        self.history = db.load(platform, env)
+
+    def expected(self, key: str) -> float:
+        return sum(expected_duration(self.history, node_id) for node_id in self.units[key])
+
+    def recently_failed(self, key: str) -> bool:
+        return any(node_id in self.history and self.history[node_id].recently_failed for node_id in self.units[key])
+
+    def record(self, key: str, seconds: float):
+        pass
+
+    def save(self):
+        pass
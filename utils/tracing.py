@@ -0,0 +1,224 @@
+"""Nested timing spans for tests, Allure steps, page-object methods and driver commands.
+
+With `--trace-spans[=PATH]` every test, its setup/call/teardown, every Allure
+step, every page-object method and every WebDriver command becomes a span
+with start and end timestamps. Spans are written as Chrome trace events
+(open the file in https://ui.perfetto.dev or chrome://tracing for a flame
+view of the run) or, for a `.jsonl` path, one span per line. Without a
+PATH the file is `trace.json` next to the Allure results, one per process
+for pool workers (see `utils.results_stream.artifact_path`).
+
+Recording a span is two `perf_counter_ns` calls and a list append; spans
+are serialised and written in batches of `flush_every`. Nothing is patched
+unless tracing is on.
+
+    tracer = Tracer("trace.json")
+    with tracer.span("login", "page"):
+        ...
+    tracer.close()
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+import pytest
+from allure_commons import hookimpl
+from selenium.webdriver.remote.webdriver import WebDriver
+
+TEST = "test"
+PHASE = "phase"
+STEP = "step"
+PAGE = "page"
+COMMAND = "command"
+
+
+class Tracer:
+    """Collects spans per thread and writes them in batches.
+
+    :param path: Output file; `.jsonl` for one span per line, anything else for Chrome trace JSON.
+    :param flush_every: Spans buffered before a write.
+    """
+
+    def __init__(self, path: str, flush_every: int = 2000):
+        self.path = path
+        self.jsonl = path.endswith(".jsonl")
+        self.flush_every = flush_every
+        self.spans = 0
+        self._buffer: list[tuple] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()  # guards the buffer
+        self._write_lock = threading.Lock()  # keeps batches whole in the file
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._threads: dict[int, str] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "w", buffering=1 << 16)
+        self._first = True
+        if not self.jsonl:
+            self._file.write("[\n")
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            thread = threading.current_thread()
+            self._threads[thread.ident] = thread.name
+        return stack
+
+    def begin(self, name: str, category: str, args: dict | None = None):
+        """Open a span on this thread; close it with `end`."""
+        self._stack().append((name, category, args, time.perf_counter_ns()))
+
+    def end(self, error: str | None = None):
+        """Close the innermost open span of this thread."""
+        stack = self._stack()
+        if not stack:
+            return
+        name, category, args, started = stack.pop()
+        if error:
+            args = {**(args or {}), "error": error}
+        span = (name, category, args, started, time.perf_counter_ns(), threading.get_ident(), len(stack))
+        with self._lock:
+            self._buffer.append(span)
+            full = len(self._buffer) >= self.flush_every
+        if full:
+            self.flush()
+
+    class _Span:
+        __slots__ = ("tracer", "name", "category", "args")
+
+        def __init__(self, tracer, name, category, args):
+            self.tracer, self.name, self.category, self.args = tracer, name, category, args
+
+        def __enter__(self):
+            self.tracer.begin(self.name, self.category, self.args)
+
+        def __exit__(self, exc_type, exc, tb):
+            self.tracer.end(exc_type.__name__ if exc_type else None)
+
+    def span(self, name: str, category: str, args: dict | None = None) -> "_Span":
+        """Context manager timing its block as one span."""
+        return self._Span(self, name, category, args)
+
+    def flush(self):
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        with self._write_lock:
+            lines = [self._encode(*span) for span in spans]
+            if lines:
+                separator = "\n" if self.jsonl else ",\n"
+                prefix = "" if self._first or self.jsonl else separator
+                self._file.write(prefix + separator.join(lines) + ("\n" if self.jsonl else ""))
+                self._first = False
+                self.spans += len(lines)
+
+    def _encode(self, name, category, args, started, ended, thread_id, depth) -> str:
+        start_us = (started - self._origin) / 1000
+        duration_us = (ended - started) / 1000
+        if self.jsonl:
+            event = {"name": name, "cat": category, "start_us": round(start_us, 1), "dur_us": round(duration_us, 1),
+                     "thread": self._threads.get(thread_id, thread_id), "depth": depth}
+        else:
+            event = {"name": name, "cat": category, "ph": "X", "ts": round(start_us, 1),
+                     "dur": round(duration_us, 1), "pid": self._pid, "tid": thread_id}
+        if args:
+            event["args"] = args
+        return json.dumps(event, default=str)
+
+    def close(self):
+        """Write what is buffered (spans still open are dropped) and finish the file."""
+        self.flush()
+        if not self.jsonl:
+            names = [json.dumps({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": ident,
+                                 "args": {"name": name}}) for ident, name in self._threads.items()]
+            if names:
+                self._file.write(("" if self._first else ",\n") + ",\n".join(names))
+            self._file.write("\n]\n")
+        self._file.close()
+
+
+# --- Instrumentation ---
+def _traced(tracer: Tracer, function, name: str, category: str):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with tracer.span(name, category):
+            return function(*args, **kwargs)
+    wrapper.__wrapped_for_trace__ = function
+    return wrapper
+
+
+def instrument_pages(tracer: Tracer, classes, skip=()) -> list:
+    """Wrap the public methods each page-object class defines in spans; returns what `restore` needs.
+
+    :param skip: Method names left alone, e.g. cheap helpers that would only add noise.
+    """
+    patched = []
+    for cls in classes:
+        for name, member in list(vars(cls).items()):
+            if (name.startswith("_") or name in skip or not inspect.isfunction(member)
+                    or hasattr(member, "__wrapped_for_trace__")):
+                continue
+            setattr(cls, name, _traced(tracer, member, f"{cls.__name__}.{name}", PAGE))
+            patched.append((cls, name, member))
+    return patched
+
+
+def instrument_driver(tracer: Tracer) -> list:
+    """Time every WebDriver command (`WebDriver.execute`), named by its command, e.g. `findElement`."""
+    execute = WebDriver.execute
+
+    @functools.wraps(execute)
+    def traced_execute(self, driver_command, params=None):
+        with tracer.span(driver_command, COMMAND):
+            return execute(self, driver_command, params)
+
+    WebDriver.execute = traced_execute
+    return [(WebDriver, "execute", execute)]
+
+
+def restore(patched: list):
+    for cls, name, original in reversed(patched):
+        setattr(cls, name, original)
+
+
+class TracePlugin:
+    """pytest and allure_commons plugin recording tests, their phases and Allure steps as spans."""
+
+    def __init__(self, tracer: Tracer, patched: list):
+        self.tracer = tracer
+        self.patched = patched
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item):
+        with self.tracer.span(item.nodeid, TEST):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        with self.tracer.span("setup", PHASE):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        with self.tracer.span("call", PHASE):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item):
+        with self.tracer.span("teardown", PHASE):
+            yield
+
+    @hookimpl
+    def start_step(self, uuid, title, params):
+        self.tracer.begin(title, STEP)
+
+    @hookimpl
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        self.tracer.end(exc_type.__name__ if exc_type else None)
+
+    def close(self):
+        restore(self.patched)
+        self.tracer.close()
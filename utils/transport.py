@@ -0,0 +1,252 @@
+"""Shared, tuned HTTP transport for Appium commands, with per-command timing.
+
+Each `webdriver.Remote` normally builds its own urllib3 pool, so every new
+session opens new connections (and TLS handshakes to a remote hub). Here
+one `Transport` per process owns a keep-alive pool per host that every
+driver borrows, and adds:
+
+* separate connect/read timeouts;
+* retries with exponential backoff: a failed connect is retried for any
+  command, and a failed read or a 502/503/504 only for idempotent commands
+  (GET/DELETE, element lookups). `POST /session` is not one of them: cloud
+  hubs such as BrowserStack ignore Appium's idempotency key, so a retried
+  create could open a second, billed session outside the grid's slots;
+* `Accept-Encoding: gzip` so page sources and screenshots come back
+  compressed from servers that support it, and optionally gzip request
+  bodies above a size threshold;
+* a record of every command (`timings`): wall time, bytes on the wire,
+  status and attempts, grouped per test like the wait timings.
+
+    transport = Transport.from_settings(settings.get("transport", {}))
+    driver = webdriver.Remote(transport.connection(remote_url), options=options)
+"""
+import gzip
+import json
+import re
+import threading
+import time
+from collections.abc import Mapping
+
+from appium.webdriver.appium_connection import AppiumConnection
+from selenium.webdriver.remote.client_config import ClientConfig
+from urllib3 import Timeout
+from urllib3.exceptions import ConnectTimeoutError, HTTPError, NewConnectionError
+
+RETRY_STATUSES = (502, 503, 504)
+# Commands that can be sent twice without changing the app (besides GET/DELETE)
+_IDEMPOTENT_POSTS = re.compile(r"/session/[^/]+/(elements?|element/[^/]+/elements?|timeouts)$")
+_SESSION_ID = re.compile(r"/session/[^/]+")
+_ELEMENT_ID = re.compile(r"/element/(?!active\b)[^/]+")
+
+
+def is_idempotent(method: str, path: str) -> bool:
+    return method in ("GET", "DELETE", "HEAD") or (method == "POST" and bool(_IDEMPOTENT_POSTS.search(path)))
+
+
+def command_name(method: str, path: str) -> str:
+    """`POST /wd/hub/session/1a2b/element/3c/click` -> `POST /session/{id}/element/{id}/click`."""
+    path = path.split("?", 1)[0]
+    path = path[path.find("/session"):] if "/session" in path else path
+    return f"{method} {_ELEMENT_ID.sub('/element/{id}', _SESSION_ID.sub('/session/{id}', path))}"
+
+
+class CommandRecord:
+    """One HTTP command as seen on the wire."""
+
+    def __init__(self, command: str, seconds: float, sent: int, received: int, status: int | None, attempts: int):
+        self.command = command
+        self.seconds = seconds
+        self.sent = sent
+        self.received = received
+        self.status = status
+        self.attempts = attempts
+
+    def to_dict(self) -> dict:
+        return {
+            "command": self.command,
+            "seconds": round(self.seconds, 4),
+            "sent_bytes": self.sent,
+            "received_bytes": self.received,
+            "status": self.status,
+            "attempts": self.attempts,
+        }
+
+
+class NetworkTimings:
+    """Command records grouped by the test that was running when they were sent."""
+
+    def __init__(self):
+        self.current_test: str | None = None
+        self.by_test: dict[str, list[CommandRecord]] = {}
+        self._lock = threading.Lock()
+
+    def start_test(self, node_id: str):
+        self.current_test = node_id
+        self.by_test.setdefault(node_id, [])
+
+    def record(self, record: CommandRecord):
+        with self._lock:
+            self.by_test.setdefault(self.current_test or "<no test>", []).append(record)
+
+    def test_report(self, node_id: str) -> dict:
+        records = self.by_test.get(node_id, [])
+        return {
+            "test": node_id,
+            "commands": len(records),
+            "network_seconds": round(sum(r.seconds for r in records), 4),
+            "received_bytes": sum(r.received for r in records),
+            "retries": sum(r.attempts - 1 for r in records),
+            "records": [r.to_dict() for r in records],
+        }
+
+    def by_command(self, limit: int = 20) -> list[dict]:
+        """Commands aggregated over all tests, by total time."""
+        totals: dict[str, dict] = {}
+        for records in self.by_test.values():
+            for record in records:
+                entry = totals.setdefault(record.command, {
+                    "command": record.command, "count": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+                    "received_bytes": 0, "retries": 0,
+                })
+                entry["count"] += 1
+                entry["total_seconds"] += record.seconds
+                entry["max_seconds"] = max(entry["max_seconds"], record.seconds)
+                entry["received_bytes"] += record.received
+                entry["retries"] += record.attempts - 1
+        ranked = sorted(totals.values(), key=lambda e: e["total_seconds"], reverse=True)[:limit]
+        for entry in ranked:
+            entry["total_seconds"] = round(entry["total_seconds"], 4)
+            entry["max_seconds"] = round(entry["max_seconds"], 4)
+        return ranked
+
+    def summary(self, limit: int = 10) -> str:
+        lines = [f"{'command':<52} {'count':>6} {'total':>8} {'mean':>8} {'received':>10}"]
+        for entry in self.by_command(limit):
+            mean_ms = entry["total_seconds"] / entry["count"] * 1000
+            lines.append(f"{entry['command']:<52} {entry['count']:>6} {entry['total_seconds']:>7.2f}s "
+                         f"{mean_ms:>6.1f}ms {entry['received_bytes'] / 1024:>8.1f}K")
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        """Write the machine-readable summary of the whole run."""
+        summary = {
+            "tests": [self.test_report(node_id) for node_id in self.by_test],
+            "by_command": self.by_command(limit=100),
+        }
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+timings = NetworkTimings()
+
+
+class Transport:
+    """Process-wide HTTP transport shared by every driver (see module docstring).
+
+    :param pool_size: Keep-alive connections kept per host; size it to the
+        number of drivers (or threads) sending commands at the same time.
+    :param retries: Extra attempts after a failed connect, or after a failed
+        read of an idempotent command.
+    :param backoff: Seconds before the first retry, doubled for each further one.
+    :param compress: Ask for gzip-compressed responses.
+    :param compress_requests: Also gzip request bodies of at least `compress_min_bytes`.
+    """
+
+    def __init__(self, pool_size: int = 4, connect_timeout: float = 10.0, read_timeout: float = 300.0,
+                 retries: int = 2, backoff: float = 0.5, compress: bool = True, compress_requests: bool = False,
+                 compress_min_bytes: int = 1024, timings: NetworkTimings = timings):
+        self.pool_size = pool_size
+        self.timeout = Timeout(connect=connect_timeout, read=read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.compress = compress
+        self.compress_requests = compress_requests
+        self.compress_min_bytes = compress_min_bytes
+        self.timings = timings
+        self.pool = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, section: Mapping) -> "Transport":
+        """Build from the `transport` section of config.json."""
+        return cls(
+            pool_size=section.get("poolSize", 4),
+            connect_timeout=section.get("connectTimeout", 10.0),
+            read_timeout=section.get("readTimeout", 300.0),
+            retries=section.get("retries", 2),
+            backoff=section.get("backoff", 0.5),
+            compress=section.get("compress", True),
+            compress_requests=section.get("compressRequests", False),
+            compress_min_bytes=section.get("compressMinBytes", 1024),
+        )
+
+    def connection(self, remote_url: str) -> "PooledConnection":
+        """Command executor for `webdriver.Remote(command_executor=...)`."""
+        return PooledConnection(remote_url, self)
+
+    def _ensure_pool(self, connection: AppiumConnection):
+        # Built by the client itself, so proxy and certificate settings are honoured
+        with self._lock:
+            if self.pool is None:
+                self.pool = connection._get_connection_manager()
+
+    def request(self, method: str, url: str, body=None, headers=None, timeout=None):
+        """Send one command (the urllib3 `request` the Selenium client calls); returns the response."""
+        headers = dict(headers or {})
+        payload = body.encode("utf-8") if isinstance(body, str) else body
+        if self.compress:
+            headers["Accept-Encoding"] = "gzip, deflate"
+        if self.compress_requests and payload and len(payload) >= self.compress_min_bytes:
+            payload = gzip.compress(payload, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+        path = url.split("://", 1)[-1].partition("/")[2]
+        idempotent = is_idempotent(method, "/" + path.split("?", 1)[0])
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self.pool.request(method, url, body=payload, headers=headers, timeout=self.timeout,
+                                             retries=False)
+            except (NewConnectionError, ConnectTimeoutError):
+                if attempt > self.retries:
+                    self._record(method, url, started, payload, None, None, attempt)
+                    raise
+            except HTTPError:
+                if not idempotent or attempt > self.retries:
+                    self._record(method, url, started, payload, None, None, attempt)
+                    raise
+            else:
+                if response.status not in RETRY_STATUSES or not idempotent or attempt > self.retries:
+                    self._record(method, url, started, payload, response, response.status, attempt)
+                    return response
+            time.sleep(self.backoff * 2 ** (attempt - 1))
+
+    def _record(self, method, url, started, payload, response, status, attempts):
+        received = 0
+        if response is not None:
+            received = int(response.headers.get("Content-Length") or len(response.data))
+        self.timings.record(CommandRecord(
+            command_name(method, "/" + url.split("://", 1)[-1].partition("/")[2]),
+            time.perf_counter() - started, len(payload or b""), received, status, attempts,
+        ))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.clear()
+
+
+class PooledConnection(AppiumConnection):
+    """`AppiumConnection` whose requests go through a shared `Transport`."""
+
+    def __init__(self, remote_url: str, transport: Transport):
+        pool_args = {"init_args_for_pool_manager": {"maxsize": transport.pool_size, "block": False}}
+        super().__init__(client_config=ClientConfig(
+            remote_server_addr=remote_url, keep_alive=True, init_args_for_pool_manager=pool_args,
+        ))
+        transport._ensure_pool(self)
+        self._conn = transport  # RemoteConnection sends through `self._conn.request(...)`
+
+    def close(self):
+        """Called by `driver.quit()`; the pool is shared, so its connections stay open for the next session."""
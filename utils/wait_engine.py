@@ -0,0 +1,151 @@
+"""Explicit waits with adaptive polling and per-test timing records.
+
+`WebDriverWait` polls at a fixed 0.5s. Here the first polls come quickly
+(most elements are already there) and the interval grows geometrically, so
+fast hits resolve fast and long negative waits cost few round-trips. Every
+wait is recorded in `timings` so slow locators can be found afterwards.
+"""
+import json
+import time
+
+from selenium.common import NoSuchElementException, StaleElementReferenceException, TimeoutException
+
+DEFAULT_TIMEOUT = 15
+INITIAL_POLL = 0.05
+MAX_POLL = 1.0
+BACKOFF = 1.6
+
+# Callable `(locator, condition)` told about every satisfied wait, see `utils.device_metrics.instrument`
+on_satisfied = None
+
+
+class ElementNotFoundTimeout(TimeoutException):
+    """The wait timed out and the element was never found: a wrong locator or a missing screen, not a slow app."""
+
+
+def poll_intervals(initial: float = INITIAL_POLL, maximum: float = MAX_POLL, factor: float = BACKOFF):
+    """Endless sequence of sleep intervals growing from `initial` up to `maximum`."""
+    interval = initial
+    while True:
+        yield interval
+        interval = min(interval * factor, maximum)
+
+
+class WaitRecord:
+    """Outcome of one explicit wait."""
+
+    def __init__(self, locator, condition: str, attempts: int, seconds: float, timed_out: bool, timeout: float):
+        self.locator = locator
+        self.condition = condition
+        self.attempts = attempts
+        self.seconds = seconds
+        self.timed_out = timed_out
+        self.timeout = timeout
+
+    def to_dict(self) -> dict:
+        strategy, value = self.locator if isinstance(self.locator, tuple) else ("batch", str(self.locator))
+        return {
+            "strategy": strategy,
+            "locator": value,
+            "condition": self.condition,
+            "attempts": self.attempts,
+            "seconds": round(self.seconds, 4),
+            "timed_out": self.timed_out,
+            "timeout": self.timeout,
+        }
+
+
+class WaitTimings:
+    """Wait records grouped by the test that was running when they happened."""
+
+    def __init__(self):
+        self.current_test: str | None = None
+        self.by_test: dict[str, list[WaitRecord]] = {}
+
+    def start_test(self, node_id: str):
+        self.current_test = node_id
+        self.by_test.setdefault(node_id, [])
+
+    def record(self, record: WaitRecord):
+        self.by_test.setdefault(self.current_test or "<no test>", []).append(record)
+
+    def test_report(self, node_id: str) -> dict:
+        records = self.by_test.get(node_id, [])
+        return {
+            "test": node_id,
+            "waits": len(records),
+            "wait_seconds": round(sum(r.seconds for r in records), 4),
+            "records": [r.to_dict() for r in records],
+        }
+
+    def slowest_locators(self, limit: int = 20) -> list[dict]:
+        """Locators aggregated over all tests, by total time spent waiting."""
+        totals: dict[tuple, dict] = {}
+        for records in self.by_test.values():
+            for record in records:
+                item = record.to_dict()
+                key = (item["strategy"], item["locator"])
+                entry = totals.setdefault(key, {
+                    "strategy": key[0], "locator": key[1], "waits": 0,
+                    "total_seconds": 0.0, "max_seconds": 0.0, "timeouts": 0,
+                })
+                entry["waits"] += 1
+                entry["total_seconds"] += record.seconds
+                entry["max_seconds"] = max(entry["max_seconds"], record.seconds)
+                entry["timeouts"] += int(record.timed_out)
+        ranked = sorted(totals.values(), key=lambda e: e["total_seconds"], reverse=True)[:limit]
+        for entry in ranked:
+            entry["total_seconds"] = round(entry["total_seconds"], 4)
+            entry["max_seconds"] = round(entry["max_seconds"], 4)
+        return ranked
+
+    def dump(self, path: str):
+        """Write the machine-readable summary of the whole run."""
+        summary = {
+            "tests": [self.test_report(node_id) for node_id in self.by_test],
+            "slowest_locators": self.slowest_locators(),
+        }
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+timings = WaitTimings()
+
+
+def wait_until(driver, condition, timeout: float = DEFAULT_TIMEOUT, locator=None, name: str = "",
+               ignored: tuple = (NoSuchElementException, StaleElementReferenceException)):
+    """Poll `condition(driver)` with growing intervals until it returns a truthy value.
+
+    :param condition: Callable taking the driver, e.g. an `expected_conditions` predicate.
+    :param timeout: Per-call timeout in seconds.
+    :param locator: Locator the wait is about, for the timing record.
+    :param name: Short condition name for the timing record (e.g. "visible").
+    :return: The truthy value returned by the condition.
+    :raises ElementNotFoundTimeout: if every poll raised NoSuchElementException.
+    :raises TimeoutException: if the condition never became truthy otherwise.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    attempts = 0
+    intervals = poll_intervals()
+    found = False  # any poll that got past finding the element
+
+    while True:
+        attempts += 1
+        try:
+            value = condition(driver)
+            found = True
+            if value:
+                timings.record(WaitRecord(locator, name, attempts, time.monotonic() - started, False, timeout))
+                if on_satisfied is not None:
+                    on_satisfied(locator, name)
+                return value
+        except ignored as exc:
+            found = found or not isinstance(exc, NoSuchElementException)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timings.record(WaitRecord(locator, name, attempts, time.monotonic() - started, True, timeout))
+            error = TimeoutException if found else ElementNotFoundTimeout
+            raise error(f"Timed out after {timeout}s waiting for {name or 'condition'}: {locator}")
+        time.sleep(min(next(intervals), remaining))